@@ -0,0 +1,229 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+from starlette.templating import Jinja2Templates
+
+import metrics
+from inference import parse_batch_body, MAX_BATCH_RECORDS
+from model_bundle import BundleError
+from registry import registry
+from db import init_db
+from service import (prediction_cache, batcher, predict_one, predict_many, what_if, save_feedback, render_report,
+                     drift_report, save_report, load_report, form_options, admin_allowed)
+
+# ASGI serving mode: same routes as app.py. Run with
+#   uvicorn asgi_app:app --workers 4
+# CPU-bound work (inference, PDF stamping) goes through bounded executors so the
+# event loop keeps accepting requests; DB writes are already queued to db.writer.
+
+SECRET_KEY = 'super_secret_key_for_session'
+# With micro-batching the inference threads mostly wait on the batcher, so allow one per batch slot
+INFERENCE_WORKERS = int(os.environ.get('SLEEP_INFERENCE_WORKERS',
+                                       batcher.max_batch if batcher is not None else os.cpu_count() or 1))
+REPORT_WORKERS = int(os.environ.get('SLEEP_REPORT_WORKERS', 2))
+MAX_PENDING_PER_WORKER = 8
+
+templates = Jinja2Templates(directory='templates')
+
+
+class BoundedExecutor:
+    """Thread pool with a cap on queued jobs; callers past the cap wait on the event loop."""
+
+    def __init__(self, workers, name):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._slots = None
+
+    async def run(self, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers * MAX_PENDING_PER_WORKER)
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+
+inference_executor = BoundedExecutor(INFERENCE_WORKERS, 'inference')
+report_executor = BoundedExecutor(REPORT_WORKERS, 'reports')
+
+
+class RequestTimingMiddleware:
+    """Observes sleep_request_seconds per route endpoint (the ASGI twin of app.py's before/after hooks)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not metrics.registry.enabled:
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            endpoint = scope.get('endpoint')
+            if endpoint is not None and endpoint is not metrics_endpoint:
+                metrics.request_seconds.observe(time.perf_counter() - start, route=endpoint.__name__)
+
+
+async def get_bundle():
+    """registry.get(); the first call loads and warms the bundle, so it runs off the event loop."""
+    if registry.version is None:
+        return await asyncio.get_running_loop().run_in_executor(None, registry.get)
+    return registry.get()
+
+
+def in_thread(fn, *args):
+    """Run a blocking call (e.g. the report store's SQLite I/O) on the default thread pool."""
+    return asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+def with_version(response, bundle):
+    response.headers['X-Model-Version'] = bundle.version
+    return response
+
+
+async def home(request):
+    return templates.TemplateResponse(request, 'index.html', form_options(await get_bundle()))
+
+
+async def predict(request):
+    try:
+        with metrics.stage('predict', 'parse_form'):
+            data = dict(await request.form())
+        bundle = await get_bundle()
+        prediction, details, report_data = await inference_executor.run(predict_one, data, bundle)
+
+        # Session Save
+        with metrics.stage('predict', 'session'):
+            request.session['report_id'] = await in_thread(save_report, report_data)
+
+        with metrics.stage('predict', 'render_template'):
+            response = templates.TemplateResponse(request, 'result.html', {
+                'prediction': prediction, 'details': details, 'form_data': data})
+        return with_version(response, bundle)
+
+    except ValueError as e:
+        # Invalid input: back to the form with the validation message
+        metrics.errors.inc(route='predict', type=type(e).__name__)
+        return templates.TemplateResponse(request, 'index.html', dict(form_options(await get_bundle()), error=str(e)),
+                                          status_code=400)
+    except Exception as e:
+        metrics.errors.inc(route='predict', type=type(e).__name__)
+        return PlainTextResponse(f"Error: {e}")
+
+
+async def predict_batch_route(request):
+    try:
+        records = parse_batch_body(await request.body(), request.headers.get('content-type'))
+    except ValueError as e:
+        metrics.errors.inc(route='predict_batch', type='InvalidBody')
+        return JSONResponse({'error': f"Invalid batch body: {e}"}, status_code=400)
+
+    if len(records) > MAX_BATCH_RECORDS:
+        metrics.errors.inc(route='predict_batch', type='BatchTooLarge')
+        return JSONResponse({'error': f"Batch too large ({len(records)} > {MAX_BATCH_RECORDS} records)"},
+                            status_code=413)
+
+    bundle = await get_bundle()
+    payload = await inference_executor.run(predict_many, records, bundle)
+    return with_version(JSONResponse(payload), bundle)
+
+
+async def predict_whatif(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    bundle = await get_bundle()
+    try:
+        payload = await inference_executor.run(what_if, body, bundle)
+    except (ValueError, TypeError, KeyError) as e:
+        metrics.errors.inc(route='predict_whatif', type=type(e).__name__)
+        return JSONResponse({'error': str(e)}, status_code=400)
+    return with_version(JSONResponse(payload), bundle)
+
+
+async def submit_feedback(request):
+    try:
+        save_feedback(await request.json())
+        return JSONResponse({'status': 'success', 'message': 'Feedback saved!'})
+    except Exception as e:
+        metrics.errors.inc(route='submit_feedback', type=type(e).__name__)
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def download_report(request):
+    report_data = await in_thread(load_report, request.session.get('report_id'))
+    if report_data is None:
+        return PlainTextResponse("No report found.")
+
+    with metrics.stage('download_report', 'render_pdf'):
+        pdf = await report_executor.run(render_report, report_data)
+    return Response(pdf, media_type='application/pdf',
+                    headers={'Content-Disposition': 'attachment; filename=Sleep_Report.pdf'})
+
+
+async def metrics_endpoint(request):
+    if not metrics.registry.enabled:
+        return PlainTextResponse("Metrics disabled (SLEEP_METRICS=0)", status_code=404)
+    return Response(metrics.registry.render(), headers={'Content-Type': metrics.CONTENT_TYPE})
+
+
+async def cache_stats(request):
+    if prediction_cache is None:
+        return JSONResponse({'enabled': False})
+    return JSONResponse(dict(prediction_cache.snapshot(), enabled=True))
+
+
+async def microbatch_stats(request):
+    if batcher is None:
+        return JSONResponse({'enabled': False})
+    return JSONResponse(dict(batcher.snapshot(), enabled=True))
+
+
+async def drift_stats(request):
+    return JSONResponse(drift_report())
+
+
+async def admin_reload(request):
+    if not admin_allowed(request.headers.get('x-admin-token')):
+        return JSONResponse({'error': 'forbidden'}, status_code=403)
+    try:
+        body = await request.json()
+    except ValueError:
+        body = {}
+    previous = registry.version
+    try:
+        version = await asyncio.get_running_loop().run_in_executor(None, registry.reload, (body or {}).get('version'))
+    except (BundleError, OSError, ValueError) as e:
+        return JSONResponse({'error': str(e), 'model_version': previous}, status_code=500)
+    return JSONResponse({'status': 'success', 'previous_version': previous, 'model_version': version})
+
+
+init_db()
+
+app = Starlette(
+    routes=[
+        Route('/', home),
+        Route('/predict', predict, methods=['POST']),
+        Route('/predict/batch', predict_batch_route, methods=['POST']),
+        Route('/predict/whatif', predict_whatif, methods=['POST']),
+        Route('/submit_feedback', submit_feedback, methods=['POST']),
+        Route('/download_report', download_report),
+        Route('/metrics', metrics_endpoint),
+        Route('/admin/cache_stats', cache_stats),
+        Route('/admin/microbatch_stats', microbatch_stats),
+        Route('/admin/drift', drift_stats),
+        Route('/admin/reload', admin_reload, methods=['POST']),
+    ],
+    middleware=[Middleware(RequestTimingMiddleware), Middleware(SessionMiddleware, secret_key=SECRET_KEY)],
+)
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host='127.0.0.1', port=8000)
@@ -0,0 +1,87 @@
+import numpy as np
+
+from inference import FEATURE_FIELDS, GENDER_COL, OCCUP_COL, forward_pass
+from prediction_cache import feature_keys
+
+# Per-prediction feature attribution by occlusion: each of the 13 inputs is replaced
+# by its training mean (the scaler's mean_) and the drop in the predicted class's
+# probability is that input's contribution. The original row and its 13 occluded
+# copies go through the model as one 14-row batch.
+
+N_FEATURES = len(FEATURE_FIELDS)
+TOP_CAUSES = 3
+MIN_CONTRIBUTION = 0.01  # probability drop below which an input is not reported as a cause
+CACHE_NAMESPACE = 'occlusion'
+
+# Wording for the causes list: numeric fields get a High/Low prefix and the value
+BINARY_FIELDS = {
+    'blue_light': ('No blue light filter', 'Blue light filter on'),
+    'snoring': ('No snoring', 'Snoring'),
+    'night_walking': ('No night walking', 'Night walking'),
+}
+NUMERIC_LABELS = {
+    'age': ('age', ''), 'daily_screen': ('daily screen time', ' h'), 'night_screen': ('night screen time', ' h'),
+    'bmi': ('BMI', ''), 'heart_rate': ('heart rate', ' bpm'), 'stress': ('stress level', '/10'),
+    'phys_act': ('physical activity', ' min'), 'coffee': ('coffee intake', ' cups'),
+}
+
+
+def occlusion_rows(X, baseline):
+    """(n * 14, 13) matrix: each row of X followed by its 13 single-feature occlusions."""
+    n = len(X)
+    out = np.repeat(X, N_FEATURES + 1, axis=0).reshape(n, N_FEATURES + 1, N_FEATURES)
+    diag = np.arange(N_FEATURES)
+    out[:, diag + 1, diag] = baseline
+    return out.reshape(-1, N_FEATURES)
+
+
+def explain(X, bundle, cache=None, batcher=None):
+    """Class probabilities (n, k) and occlusion attributions (n, 13) for each row of X.
+
+    Attributions are for each row's predicted class: positive values pushed the
+    model towards it. With a PredictionCache, both are cached together under a
+    per-version namespace.
+    """
+    n, k = len(X), len(bundle.classes)
+    result = np.zeros((n, k + N_FEATURES))
+    misses = list(range(n))
+    if cache is not None:
+        namespace = f'{bundle.cache_version}/{CACHE_NAMESPACE}'
+        keys = feature_keys(X)
+        cached = cache.get_many(namespace, keys)
+        misses = [i for i, v in enumerate(cached) if v is None]
+        for i, v in enumerate(cached):
+            if v is not None:
+                result[i] = v
+
+    if misses:
+        P = forward_pass(bundle, occlusion_rows(X[misses], np.asarray(bundle.scaler_mean)), batcher)
+        P = P.reshape(len(misses), N_FEATURES + 1, k)
+        base = P[:, 0]
+        predicted = base.argmax(axis=1)
+        rows = np.arange(len(misses))
+        result[misses, :k] = base
+        result[misses, k:] = base[rows, predicted][:, None] - P[rows, 1:, predicted.reshape(-1)]
+        if cache is not None:
+            cache.put_many(namespace, [keys[i] for i in misses], result[misses])
+    return result[:, :k], result[:, k:]
+
+
+def describe(j, value, mean, bundle):
+    name = FEATURE_FIELDS[j][0]
+    if j == GENDER_COL:
+        return f"Gender: {bundle.gender_encoder.decode([value])[0]}"
+    if j == OCCUP_COL:
+        return f"Occupation: {bundle.occupation_encoder.decode([value])[0]}"
+    if name in BINARY_FIELDS:
+        return BINARY_FIELDS[name][int(value > 0.5)]
+    label, unit = NUMERIC_LABELS[name]
+    level = 'High' if value > mean else 'Low'
+    return f"{level} {label}: {value:g}{unit}"
+
+
+def top_causes(x, attributions, bundle, top=TOP_CAUSES):
+    """Wording for the inputs that pushed hardest towards the prediction."""
+    order = np.argsort(-attributions)[:top]
+    mean = np.asarray(bundle.scaler_mean)
+    return [describe(j, x[j], mean[j], bundle) for j in order if attributions[j] >= MIN_CONTRIBUTION]
@@ -0,0 +1,49 @@
+import os
+import queue
+import threading
+from collections import deque
+
+
+class QueueThread:
+    """Mixin: a queue drained by self._run() on a daemon thread started lazily.
+
+    The thread is created on first use rather than in __init__, so a process that
+    forks workers after importing the module (gunicorn --preload) does not hand them
+    a dead thread: each process starts its own, with a fresh queue.
+    """
+
+    thread_name = 'worker'
+
+    def _init_thread(self):
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _running_here(self):
+        return self._pid == os.getpid() and self._thread.is_alive()
+
+    def _ensure_started(self):
+        if self._running_here():
+            return
+        with self._start_lock:
+            if not self._running_here():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+
+def ordered_map(pool, fn, items, in_flight):
+    """Like pool.map(fn, items), but with at most in_flight tasks submitted at a time.
+
+    Executor.map submits every item up front, so results pile up in memory whenever
+    the consumer (a file writer) is slower than the workers.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Performance benchmark suite: inference (direct + Flask test client), SQLite
+# inserts, PDF reports and model startup. Results go to a JSON file; --compare
+# checks them against a stored baseline and exits 1 on regressions.
+#
+#   python benchmark.py --save-baseline     # record the reference numbers
+#   python benchmark.py --compare           # re-run and flag regressions
+
+RESULTS_PATH = 'benchmark_results.json'
+BASELINE_PATH = 'benchmark_baseline.json'
+THRESHOLD = 0.15  # relative slowdown tolerated before a metric counts as a regression
+SEED = 42
+BATCH_SIZE = 256
+
+_STARTUP_PROBES = {
+    'bundle': "from model_bundle import load_bundle\nb = load_bundle()\nb.model.predict(b.scaler_mean[None, :])",
+    'app': "import app\nfrom registry import registry\nregistry.get()",
+}
+
+
+def _isolate(tmpdir):
+    # Must run before app/db/service are imported: private DBs, no memoized predictions, no watcher
+    os.environ['SLEEP_DB_PATH'] = os.path.join(tmpdir, 'bench.db')
+    os.environ['SLEEP_PREDICTION_CACHE'] = 'off'
+    os.environ['SLEEP_MODEL_POLL_SECONDS'] = '0'
+    os.environ['SLEEP_REPORT_STORE_PATH'] = os.path.join(tmpdir, 'reports.db')
+
+
+def sample_records(n, seed=SEED):
+    """n form-style records drawn (with replacement) from the training CSV."""
+    import pandas as pd
+    from inference import FEATURE_FIELDS
+    df = pd.read_csv('sleep_disorder_dataset.csv').drop(columns='Disorder')
+    df.columns = [name for name, _ in FEATURE_FIELDS]
+    idx = np.random.default_rng(seed).integers(0, len(df), n)
+    return [{k: str(v) for k, v in row.items()} for row in df.iloc[idx].to_dict('records')]
+
+
+def _time(fn, repeats, warmup=3):
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+    return samples
+
+
+def _latency(results, name, samples, rows=1):
+    results[f'{name}.p50_ms'] = (float(np.median(samples)) * 1e3, 'ms', 'lower')
+    # Tail latency is too noisy on shared machines to gate on; it is reported, not compared
+    results[f'{name}.p99_ms'] = (float(np.percentile(samples, 99)) * 1e3, 'ms', None)
+    results[f'{name}.rows_per_s'] = (rows * len(samples) / float(samples.sum()), 'rows/s', 'higher')
+
+
+def bench_inference(results, records, repeats):
+    from inference import score_records
+    from registry import registry
+    bundle = registry.get()
+    X, _, _, _, _ = score_records(records, bundle)
+    one, batch = X[:1], X[:BATCH_SIZE]
+    _latency(results, 'inference.direct.single', _time(lambda: bundle.model.predict_proba(one), repeats))
+    _latency(results, 'inference.direct.batch', _time(lambda: bundle.model.predict_proba(batch), repeats // 10 or 1),
+             len(batch))
+    _latency(results, 'inference.pipeline.single', _time(lambda: score_records(records[:1], bundle), repeats))
+    _latency(results, 'inference.pipeline.batch',
+             _time(lambda: score_records(records[:BATCH_SIZE], bundle), repeats // 10 or 1), BATCH_SIZE)
+
+
+def bench_flask(results, records, repeats):
+    from app import app
+    client = app.test_client()
+    forms = iter(records * (repeats // len(records) + 2))
+    _latency(results, 'flask.predict', _time(lambda: client.post('/predict', data=next(forms)), repeats))
+    body = records[:BATCH_SIZE]
+    _latency(results, 'flask.predict_batch', _time(lambda: client.post('/predict/batch', json=body), repeats // 10 or 1),
+             BATCH_SIZE)
+    # /download_report for the last /predict in this session (served from the report cache after the first call)
+    _latency(results, 'flask.download_report', _time(lambda: client.get('/download_report'), repeats))
+
+
+def bench_sqlite(results, records, rows):
+    from db import writer, log_predictions
+    from registry import registry
+    from service import log_scored
+    from inference import score_records
+    bundle = registry.get()
+    X, _, _, proba, labels = score_records((records * (rows // len(records) + 1))[:rows], bundle)
+    writer.flush()
+    start = time.perf_counter()
+    for i in range(0, rows, BATCH_SIZE):
+        log_scored(bundle, X[i:i + BATCH_SIZE], labels[i:i + BATCH_SIZE], proba[i:i + BATCH_SIZE],
+                   '2026-01-01 00:00:00')
+    writer.flush()
+    results['sqlite.batched_insert.rows_per_s'] = (rows / (time.perf_counter() - start), 'rows/s', 'higher')
+
+    start = time.perf_counter()
+    for i in range(rows // 10):
+        log_predictions(X[i:i + 1], [str(labels[i])], proba[i:i + 1], [str(c) for c in bundle.classes],
+                        ['Student'], bundle.version, '2026-01-01 00:00:00')
+    writer.flush()
+    results['sqlite.single_insert.rows_per_s'] = (rows // 10 / (time.perf_counter() - start), 'rows/s', 'higher')
+
+
+def bench_reports(results, repeats):
+    from reports import renderer, _render_pdf
+    _latency(results, 'report.full_render', _time(lambda: _render_pdf('Insomnia', '2026-01-01 00:00:00', 3.1, 7),
+                                                  max(repeats // 10, 5)))
+    stamps = iter(range(10 ** 9))
+    _latency(results, 'report.stamp', _time(
+        lambda: renderer.stamp('Insomnia', timestamp=f'2026-01-01 00:{next(stamps) % 3600:05d}', night_screen=3.1,
+                               stress=7), repeats))
+
+
+def bench_startup(results, runs=3):
+    from model_bundle import probe_startup
+    for name, load in _STARTUP_PROBES.items():
+        samples = [probe_startup(load) for _ in range(runs)]
+        results[f'startup.{name}.seconds'] = (float(np.median([s['seconds'] for s in samples])), 's', 'lower')
+        results[f'startup.{name}.peak_rss_mb'] = (max(s['peak_rss_kb'] for s in samples) / 1024, 'MB', 'lower')
+
+
+def run(quick=False):
+    repeats = 200 if quick else 2000
+    tmpdir = tempfile.mkdtemp(prefix='sleep-bench-')
+    try:
+        _isolate(tmpdir)
+        from db import init_db
+        init_db()
+        records = sample_records(1000)
+
+        results = {}
+        for label, step in (('inference', lambda: bench_inference(results, records, repeats)),
+                            ('flask', lambda: bench_flask(results, records, repeats // 4)),
+                            ('sqlite', lambda: bench_sqlite(results, records, 2000 if quick else 20000)),
+                            ('reports', lambda: bench_reports(results, repeats)),
+                            ('startup', lambda: bench_startup(results, 1 if quick else 3))):
+            start = time.perf_counter()
+            step()
+            print(f"⏱️  {label:<10} {time.perf_counter() - start:6.2f}s")
+        results['process.peak_rss_mb'] = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 'MB', 'lower')
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    from registry import registry
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'git_commit': subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                         text=True).stdout.strip() or None,
+            'model_version': registry.version,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'quick': quick,
+        },
+        'metrics': {name: {'value': round(v, 6), 'unit': unit, 'better': better}
+                    for name, (v, unit, better) in sorted(results.items())},
+    }
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Per-metric relative change vs the baseline; returns the names of regressed metrics."""
+    regressions = []
+    print(f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, cur in results['metrics'].items():
+        base = baseline['metrics'].get(name)
+        if base is None or not base['value']:
+            print(f"{name:<40} {'-':>12} {cur['value']:>12.4g}      new")
+            continue
+        change = cur['value'] / base['value'] - 1
+        worse = change if cur['better'] == 'lower' else -change
+        flag = ''
+        if cur['better'] and worse > threshold:
+            regressions.append(name)
+            flag = '  ❌ regression'
+        print(f"{name:<40} {base['value']:>12.4g} {cur['value']:>12.4g} {change:>+8.1%}{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark inference, persistence, reports and startup")
+    parser.add_argument('--out', default=RESULTS_PATH, help="where to write this run's results")
+    parser.add_argument('--quick', action='store_true', help="fewer repeats (smoke test)")
+    parser.add_argument('--save-baseline', action='store_true', help=f"also store the results as {BASELINE_PATH}")
+    parser.add_argument('--compare', action='store_true', help="flag regressions against the baseline")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--results', default=None, help="compare an existing results file instead of running")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results, encoding='utf-8') as f:
+            results = json.load(f)
+    else:
+        results = run(args.quick)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results saved: {args.out}")
+        if args.save_baseline:
+            shutil.copyfile(args.out, args.baseline)
+            print(f"📌 Baseline saved: {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"📊 Comparing against {args.baseline} ({baseline['meta'].get('git_commit')}, "
+              f"threshold {args.threshold:.0%})")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ No regressions")
+    elif not args.results:
+        for name, m in results['metrics'].items():
+            print(f"{name:<40} {m['value']:>12.4g} {m['unit']}")
@@ -1,38 +1,249 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.metrics import accuracy_score, classification_report, recall_score, f1_score
+from sklearn.model_selection import StratifiedKFold
 from sklearn.neural_network import MLPClassifier
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.preprocessing import StandardScaler
+from compiled_model import VARIANTS, compile_variant, variant_array_names
+from model_bundle import bundle_arrays
+from preprocessing import load_splits, CACHE_DIR
+
+# Same model as train_model.py
+MODEL_CONFIG = {'hidden': [32, 16], 'max_iter': 1000, 'random_state': 42}
+CV_SEED = 42
+BOOTSTRAP_CHUNK = 250  # resamples per vectorized block (chunk x n_rows weights in memory)
+
+_cv_data = None
+
+
+def make_model(config):
+    return MLPClassifier(hidden_layer_sizes=tuple(config['hidden']), max_iter=config['max_iter'],
+                         random_state=config['random_state'])
+
+
+# --- single split (the original check) ---
+def single_split(splits):
+    scaler, X_train_scaled, X_test_scaled = splits.scaled()
+    mlp = make_model(MODEL_CONFIG)
+    mlp.fit(X_train_scaled, splits.y_train)
+    y_pred = mlp.predict(X_test_scaled)
+    acc = accuracy_score(splits.y_test, y_pred)
+
+    print("---------------------------------------")
+    print(f"📊 MODEL ACCURACY: {acc * 100:.2f}%")
+    print("---------------------------------------")
+    print("Detailed Report:")
+    print(classification_report(splits.y_test, y_pred))
+    return mlp, scaler
+
+
+# --- reduced-precision variants ---
+def throughput(model, X, batch_rows, seconds=0.5):
+    """Rows per second scoring repeated batches of batch_rows rows."""
+    batch = X[np.random.default_rng(0).integers(0, len(X), batch_rows)]
+    model.predict_proba(batch)
+    rows, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        model.predict_proba(batch)
+        rows += batch_rows
+    return rows / (time.perf_counter() - start)
+
+
+def compare_variants(splits, mlp, scaler, batch_rows):
+    # Same arrays a bundle stores, scored on raw test rows like the app does
+    arrays = bundle_arrays(mlp, scaler, [v for v in VARIANTS if v != 'float64'])
+    classes = [str(c) for c in mlp.classes_]
+    baseline = None
+    report = {}
+    for variant in VARIANTS:
+        model = compile_variant(arrays, len(mlp.coefs_), mlp.classes_, variant)
+        pred = model.predict(splits.X_test)
+        if baseline is None:
+            baseline = pred
+        report[variant] = {
+            'accuracy': accuracy_score(splits.y_test, pred),
+            'recall': dict(zip(classes, recall_score(splits.y_test, pred, labels=classes, average=None).tolist())),
+            'agreement_with_float64': float(np.mean(pred == baseline)),
+            'size_bytes': int(sum(arrays[name].nbytes for name in variant_array_names(variant, len(mlp.coefs_)))),
+            'rows_per_second': throughput(model, splits.X_test, batch_rows),
+        }
+    return report
+
+
+def print_variants(report, batch_rows):
+    base = report['float64']
+    print("---------------------------------------------------------------------------")
+    print(f"{'variant':>8} {'accuracy':>9} " + ' '.join(f"{c[:11]:>11}" for c in base['recall'])
+          + f" {'agree':>7} {'bytes':>7} {'rows/s':>11} {'speedup':>8}")
+    for variant, r in report.items():
+        print(f"{variant:>8} {r['accuracy'] * 100:8.2f}% " + ' '.join(f"{v * 100:10.2f}%" for v in r['recall'].values())
+              + f" {r['agreement_with_float64'] * 100:6.2f}% {r['size_bytes']:>7,} {r['rows_per_second']:>11,.0f}"
+              + f" {r['rows_per_second'] / base['rows_per_second']:7.2f}x")
+    print("---------------------------------------------------------------------------")
+    print(f"📌 Recall columns are per class; throughput is {batch_rows}-row batches")
+
+
+# --- stratified k-fold ---
+def _data():
+    # Whole dataset (train + test of the cached split), loaded once per worker process
+    global _cv_data
+    if _cv_data is None:
+        splits = load_splits()
+        X = np.vstack([splits.X_train, splits.X_test])
+        y = np.concatenate([splits.y_train, splits.y_test]).astype(str)
+        classes = np.unique(y)
+        _cv_data = (splits.dataset_hash, X, np.searchsorted(classes, y), classes)
+    return _cv_data
+
+
+def fold_indices(y, k, seed):
+    return list(StratifiedKFold(n_splits=k, shuffle=True, random_state=seed).split(np.zeros(len(y)), y))
+
+
+def fold_key(config, dataset_hash, k, fold, seed):
+    return hashlib.sha256(json.dumps([config, dataset_hash, k, fold, seed], sort_keys=True).encode()).hexdigest()[:20]
+
+
+def fold_cache_path(key):
+    return os.path.join(CACHE_DIR, f'cv-{key}.npz')
+
+
+def fit_fold(task):
+    """Train on k-1 folds, predict the held-out one; the result is cached as .npz."""
+    config, k, fold, seed = task
+    dataset_hash, X, y, _ = _data()
+    train, test = fold_indices(y, k, seed)[fold]
+    scaler = StandardScaler().fit(X[train])
+    model = make_model(config)
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        model.fit(scaler.transform(X[train]), y[train])
+    seconds = time.perf_counter() - start
+    pred = model.predict(scaler.transform(X[test]))
+
+    path = fold_cache_path(fold_key(config, dataset_hash, k, fold, seed))
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = path + f'.{os.getpid()}.tmp.npz'
+    np.savez(tmp, test=test, pred=pred.astype(np.int8), seconds=seconds, n_iter=model.n_iter_)
+    os.replace(tmp, path)
+    return fold
+
+
+def cross_validate(config, k, seed=CV_SEED, workers=None):
+    """Out-of-fold predictions for every row plus per-fold stats; trains only folds not in the cache."""
+    dataset_hash, X, y, classes = _data()
+    paths = [fold_cache_path(fold_key(config, dataset_hash, k, fold, seed)) for fold in range(k)]
+    todo = [fold for fold, path in enumerate(paths) if not os.path.exists(path)]
+    if todo:
+        print(f"   ⚙️  Training {len(todo)} fold(s), {k - len(todo)} cached")
+        with ProcessPoolExecutor(max_workers=min(len(todo), workers or os.cpu_count())) as pool:
+            list(pool.map(fit_fold, [(config, k, fold, seed) for fold in todo]))
+    else:
+        print(f"   ⚡ All {k} folds cached")
+
+    oof = np.empty(len(y), dtype=np.int64)
+    folds = []
+    for fold, path in enumerate(paths):
+        with np.load(path) as f:
+            oof[f['test']] = f['pred']
+            folds.append({'fold': fold, 'accuracy': float(np.mean(f['pred'] == y[f['test']])),
+                          'seconds': float(f['seconds']), 'n_iter': int(f['n_iter'])})
+    return y, oof, classes, folds
+
+
+def bootstrap(y_true, y_pred, n_classes, n_boot, seed=CV_SEED, level=0.95):
+    """Percentile CIs for accuracy and per-class F1 over n_boot resamples of the rows.
+
+    Each block of resamples is a (chunk, n) matrix of row counts, so the confusion
+    counts of every resample come out of three matrix products.
+    """
+    n = len(y_true)
+    onehot = np.eye(n_classes)
+    T, P = onehot[y_true], onehot[y_pred]
+    correct = (y_true == y_pred).astype(np.float64)
+    tp_rows, fp_rows, fn_rows = T * P, (1 - T) * P, T * (1 - P)
+
+    rng = np.random.default_rng(seed)
+    acc = np.empty(n_boot)
+    f1 = np.empty((n_boot, n_classes))
+    for start in range(0, n_boot, BOOTSTRAP_CHUNK):
+        b = min(BOOTSTRAP_CHUNK, n_boot - start)
+        idx = rng.integers(0, n, (b, n)) + (np.arange(b) * n)[:, None]
+        W = np.bincount(idx.ravel(), minlength=b * n).reshape(b, n).astype(np.float64)
+        acc[start:start + b] = W @ correct / n
+        tp, fp, fn = W @ tp_rows, W @ fp_rows, W @ fn_rows
+        denom = 2 * tp + fp + fn
+        f1[start:start + b] = np.divide(2 * tp, denom, out=np.zeros_like(tp), where=denom > 0)
+
+    q = [(1 - level) / 2 * 100, (1 + level) / 2 * 100]
+    return np.percentile(acc, q), np.percentile(f1, q, axis=0).T
 
-# 1. Load the data again
-df = pd.read_csv('sleep_disorder_dataset.csv')
 
-# 2. Preprocess (Convert text to numbers)
-le = LabelEncoder()
-df['Gender'] = le.fit_transform(df['Gender'])
-df['Occupation'] = le.fit_transform(df['Occupation'])
+def run_cv(k, n_boot, workers):
+    y, oof, classes, folds = cross_validate(MODEL_CONFIG, k, workers=workers)
+    acc_ci, f1_ci = bootstrap(y, oof, len(classes), n_boot)
+    fold_acc = np.array([f['accuracy'] for f in folds])
+    f1 = f1_score(y, oof, labels=range(len(classes)), average=None)
 
-X = df.drop('Disorder', axis=1)
-y = df['Disorder']
+    print("---------------------------------------")
+    print(f"📊 {k}-FOLD ACCURACY: {np.mean(y == oof) * 100:.2f}%  "
+          f"(95% CI {acc_ci[0] * 100:.2f}-{acc_ci[1] * 100:.2f}%, {n_boot} bootstrap resamples)")
+    print(f"   Per fold: {', '.join(f'{a * 100:.2f}%' for a in fold_acc)}  (std {fold_acc.std() * 100:.2f})")
+    print("---------------------------------------")
+    print(f"{'class':>12} {'F1':>7} {'95% CI':>16}")
+    for c, v, (lo, hi) in zip(classes, f1, f1_ci):
+        print(f"{c:>12} {v * 100:6.2f}% {lo * 100:7.2f}-{hi * 100:.2f}%")
+    print("---------------------------------------")
+    return {
+        'k': k, 'config': MODEL_CONFIG, 'bootstrap_resamples': n_boot,
+        'accuracy': float(np.mean(y == oof)), 'accuracy_ci95': acc_ci.tolist(),
+        'f1': dict(zip(classes.tolist(), f1.tolist())),
+        'f1_ci95': {c: ci.tolist() for c, ci in zip(classes.tolist(), f1_ci)},
+        'folds': folds,
+    }
 
-# 3. Split into Training (80%) and Testing (20%)
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# 4. Scale inputs
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check model accuracy on the test split or by k-fold cross-validation")
+    parser.add_argument('--cv', type=int, metavar='K', help="stratified K-fold cross-validation instead of one split")
+    parser.add_argument('--bootstrap', type=int, default=2000, help="bootstrap resamples for the --cv intervals")
+    parser.add_argument('--workers', type=int, default=None, help="processes training folds in parallel")
+    parser.add_argument('--min-accuracy', type=float,
+                        help="with --cv: exit 1 if the lower 95%% bound of accuracy (in %%) is below this")
+    parser.add_argument('--variants', action='store_true',
+                        help="also compare the float32 / int8 variants against the float64 baseline")
+    parser.add_argument('--batch-rows', type=int, default=4096, help="batch size for the throughput measurement")
+    parser.add_argument('--out', help="write the --cv / --variants results to this JSON file")
+    args = parser.parse_args()
 
-# 5. Train a temporary model to check score
-mlp = MLPClassifier(hidden_layer_sizes=(32, 16), max_iter=1000, random_state=42)
-mlp.fit(X_train_scaled, y_train)
+    splits = load_splits()
+    results = {}
+    if args.cv:
+        results['cv'] = run_cv(args.cv, args.bootstrap, args.workers)
+    if not args.cv or args.variants:
+        mlp, scaler = single_split(splits)
+        if args.variants:
+            results['variants'] = compare_variants(splits, mlp, scaler, args.batch_rows)
+            print_variants(results['variants'], args.batch_rows)
 
-# 6. Predict and Print Accuracy
-y_pred = mlp.predict(X_test_scaled)
-acc = accuracy_score(y_test, y_pred)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Report written to {args.out}")
 
-print("---------------------------------------")
-print(f"📊 MODEL ACCURACY: {acc * 100:.2f}%")
-print("---------------------------------------")
-print("Detailed Report:")
-print(classification_report(y_test, y_pred))
\ No newline at end of file
+    if args.cv and args.min_accuracy is not None:
+        lower = results['cv']['accuracy_ci95'][0] * 100
+        if lower < args.min_accuracy:
+            print(f"❌ Accuracy lower bound {lower:.2f}% is below {args.min_accuracy:.2f}%")
+            sys.exit(1)
+        print(f"✅ Accuracy lower bound {lower:.2f}% meets {args.min_accuracy:.2f}%")
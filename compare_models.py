@@ -1,62 +1,179 @@
-import pandas as pd
-import numpy as np
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
 import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.exceptions import ConvergenceWarning
 from sklearn.neural_network import MLPClassifier
-from sklearn.metrics import accuracy_score, confusion_matrix
-
-# 1. Load Data
-print("📊 Loading Dataset...")
-df = pd.read_csv('sleep_disorder_dataset.csv')
-
-# Encoding
-le = LabelEncoder()
-df['Gender'] = le.fit_transform(df['Gender'])
-df['Occupation'] = le.fit_transform(df['Occupation'])
-
-X = df.drop('Disorder', axis=1)
-y = df['Disorder']
-
-# Split & Scale
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
-
-# 2. Define 3 Different Neural Networks
-models = {
-    "Multi layer perceptron": MLPClassifier(hidden_layer_sizes=(32, 16), max_iter=2000, random_state=42), # BEST
-    "Shallow Network (1 Layer)": MLPClassifier(hidden_layer_sizes=(5,), max_iter=2000, random_state=42), # Too Simple
-    "Deep Narrow Network": MLPClassifier(hidden_layer_sizes=(4, 4, 4, 4), max_iter=2000, random_state=42) # Hard to train
+from sklearn.metrics import accuracy_score
+from preprocessing import load_splits, CACHE_DIR
+
+RESULTS_CACHE = os.path.join(CACHE_DIR, 'sweep_results.json')
+
+# The three hand-picked architectures of the original comparison
+ARCHITECTURES = {
+    "Multi layer perceptron": (32, 16),   # BEST
+    "Shallow Network (1 Layer)": (5,),    # Too Simple
+    "Deep Narrow Network": (4, 4, 4, 4),  # Hard to train
 }
 
-results = {}
-
-print("🚀 Training Architectures...")
-for name, model in models.items():
-    model.fit(X_train_scaled, y_train)
-    preds = model.predict(X_test_scaled)
-    acc = accuracy_score(y_test, preds)
-    results[name] = acc * 100
-    print(f"   -> {name}: {acc*100:.2f}%")
-
-# --- GRAPH: ARCHITECTURE COMPARISON ---
-plt.figure(figsize=(10, 6))
-# Colors: Purple for Winner, Gray for Losers
-colors = ['#8B5CF6' if "Multi" in x else '#CBD5E1' for x in results.keys()]
-
-bars = plt.bar(results.keys(), results.values(), color=colors)
-plt.title("Neural Network Architecture Optimization", fontsize=16, fontweight='bold')
-plt.ylabel("Accuracy (%)", fontsize=12)
-plt.ylim(60, 100) # Zoom in to show the gap clearly
-
-# Add numbers
-for bar in bars:
-    yval = bar.get_height()
-    plt.text(bar.get_x() + bar.get_width()/2, yval + 0.5, f"{yval:.1f}%", ha='center', fontweight='bold')
-
-plt.savefig('architecture_comparison.png')
-print("\n✅ Graph Saved: architecture_comparison.png")
-plt.show()
\ No newline at end of file
+_splits = None
+
+
+def _scaled_data():
+    # Loaded once per worker process (from the .npz cache after the first run)
+    global _splits
+    if _splits is None:
+        splits = load_splits()
+        _, X_train, X_test = splits.scaled()
+        _splits = (splits.dataset_hash, X_train, X_test, splits.y_train, splits.y_test)
+    return _splits
+
+
+def config_key(config, dataset_hash):
+    return hashlib.sha256(json.dumps([config, dataset_hash], sort_keys=True).encode()).hexdigest()[:20]
+
+
+def fit_config(config):
+    """Train one configuration and return its accuracy and wall-clock fit time."""
+    _, X_train, X_test, y_train, y_test = _scaled_data()
+    model = MLPClassifier(hidden_layer_sizes=tuple(config['hidden']), alpha=config['alpha'],
+                          learning_rate_init=config['lr'], max_iter=config['max_iter'],
+                          early_stopping=config['early_stopping'], random_state=42)
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        model.fit(X_train, y_train)
+    seconds = time.perf_counter() - start
+    acc = accuracy_score(y_test, model.predict(X_test))
+    return {'config': config, 'accuracy': acc * 100, 'seconds': seconds, 'n_iter': model.n_iter_}
+
+
+def load_cache():
+    try:
+        with open(RESULTS_CACHE, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_cache(cache):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = RESULTS_CACHE + f'.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=1)
+    os.replace(tmp, RESULTS_CACHE)
+
+
+def run_configs(configs, workers=None):
+    """Fit every configuration not already in the results cache, in parallel."""
+    dataset_hash = load_splits().dataset_hash
+    cache = load_cache()
+    keys = [config_key(c, dataset_hash) for c in configs]
+    todo = [c for c, k in zip(configs, keys) if k not in cache]
+
+    if todo:
+        print(f"   ⚙️  Training {len(todo)} new config(s), {len(configs) - len(todo)} cached")
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            for result in pool.map(fit_config, todo):
+                cache[config_key(result['config'], dataset_hash)] = result
+        save_cache(cache)
+    return [cache[k] for k in keys]
+
+
+def successive_halving(configs, max_iter, min_iter=50, eta=3, workers=None):
+    """Train all configs on a small iteration budget, keep the best 1/eta, repeat with eta x budget.
+
+    The last round always trains the survivors at max_iter, so the reported scores are full-budget ones.
+    """
+    budget = min_iter
+    while True:
+        budget = min(budget, max_iter)
+        results = run_configs([dict(c, max_iter=budget) for c in configs], workers)
+        print(f"   🔁 Budget {budget} iters: {len(configs)} config(s)")
+        if budget >= max_iter:
+            return results
+        ranked = sorted(zip(results, configs), key=lambda rc: -rc[0]['accuracy'])
+        configs = [c for _, c in ranked[:max(1, math.ceil(len(configs) / eta))]]
+        # A single survivor gains nothing from intermediate budgets
+        budget = max_iter if len(configs) == 1 else budget * eta
+
+
+def label(config):
+    return f"{tuple(config['hidden'])} a={config['alpha']:g} lr={config['lr']:g}"
+
+
+def plot_results(names, results, path='architecture_comparison.png'):
+    plt.figure(figsize=(max(10, 1.2 * len(names)), 6))
+    best = max(r['accuracy'] for r in results)
+    # Colors: Purple for Winner, Gray for Losers
+    colors = ['#8B5CF6' if r['accuracy'] == best else '#CBD5E1' for r in results]
+
+    bars = plt.bar(names, [r['accuracy'] for r in results], color=colors)
+    plt.title("Neural Network Architecture Optimization", fontsize=16, fontweight='bold')
+    plt.ylabel("Accuracy (%)", fontsize=12)
+    plt.ylim(60, 100)  # Zoom in to show the gap clearly
+    if len(names) > 4:
+        plt.xticks(rotation=45, ha='right', fontsize=8)
+
+    # Add accuracy and fit time
+    for bar, r in zip(bars, results):
+        yval = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width()/2, yval + 0.5, f"{yval:.1f}%\n{r['seconds']:.1f}s",
+                 ha='center', fontweight='bold', fontsize=9)
+
+    plt.tight_layout()
+    plt.savefig(path)
+    print(f"\n✅ Graph Saved: {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare MLP architectures / run a hyperparameter sweep")
+    parser.add_argument('--sweep', action='store_true', help="grid sweep instead of the 3 fixed architectures")
+    parser.add_argument('--hidden', nargs='+', default=['32,16', '64,32', '16', '32,16,8'],
+                        help="hidden layer sizes, e.g. 32,16 64")
+    parser.add_argument('--alpha', nargs='+', type=float, default=[1e-4, 1e-3, 1e-2])
+    parser.add_argument('--lr', nargs='+', type=float, default=[1e-3, 1e-2])
+    parser.add_argument('--max-iter', type=int, default=2000)
+    parser.add_argument('--halving', action='store_true', help="drop weak configs early via successive halving")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--top', type=int, default=12, help="configs shown in the sweep chart")
+    parser.add_argument('--no-show', action='store_true')
+    args = parser.parse_args()
+
+    print("📊 Loading Dataset...")
+    load_splits()
+
+    if args.sweep:
+        grid = [{'hidden': [int(h) for h in hidden.split(',')], 'alpha': alpha, 'lr': lr,
+                 'max_iter': args.max_iter, 'early_stopping': True}
+                for hidden, alpha, lr in itertools.product(args.hidden, args.alpha, args.lr)]
+        print(f"🚀 Sweeping {len(grid)} configurations...")
+        if args.halving:
+            results = successive_halving(grid, args.max_iter, workers=args.workers)
+        else:
+            results = run_configs(grid, args.workers)
+        results = sorted(results, key=lambda r: -r['accuracy'])[:args.top]
+        names = [label(r['config']) for r in results]
+        chart = 'sweep_results.png'
+    else:
+        configs = [{'hidden': list(h), 'alpha': 1e-4, 'lr': 1e-3, 'max_iter': args.max_iter, 'early_stopping': False}
+                   for h in ARCHITECTURES.values()]
+        print("🚀 Training Architectures...")
+        results = run_configs(configs, args.workers)
+        names = list(ARCHITECTURES)
+        chart = 'architecture_comparison.png'
+
+    for name, r in zip(names, results):
+        print(f"   -> {name}: {r['accuracy']:.2f}% ({r['seconds']:.2f}s, {r['n_iter']} iters)")
+
+    # --- GRAPH: ARCHITECTURE COMPARISON ---
+    plot_results(names, results, chart)
+    if not args.no_show:
+        plt.show()
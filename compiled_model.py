@@ -0,0 +1,194 @@
+import threading
+import time
+import numpy as np
+
+COMPILED_PATH = 'sleep_model_compiled.npz'
+
+# Served precisions: the float64 baseline, a float32 copy of the fused layers, and
+# int8 weights (symmetric, one scale per output unit) dequantized to float32 at load.
+VARIANTS = ('float64', 'float32', 'int8')
+
+
+def fold_scaler(coefs, intercepts, mean, scale):
+    # scaled = (x - mean) / scale  =>  scaled @ W + b == x @ (W / scale) + (b - (mean / scale) @ W)
+    w0 = coefs[0]
+    return ([w0 / scale[:, None]] + list(coefs[1:]),
+            [intercepts[0] - (mean / scale) @ w0] + list(intercepts[1:]))
+
+
+def quantize_int8(w):
+    """Per-output-column symmetric quantization: w ~= q * scale with q in [-127, 127]."""
+    scale = np.abs(w).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    return np.clip(np.rint(w / scale), -127, 127).astype(np.int8), scale.astype(np.float32)
+
+
+class CompiledModel:
+    """Plain-NumPy forward pass of the trained MLP with the scaler folded into layer 1.
+
+    Takes raw (unscaled, encoded) feature rows, so callers skip scaler.transform
+    and all of sklearn's per-call validation.
+    """
+
+    def __init__(self, coefs, intercepts, classes, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.coefs = [np.ascontiguousarray(w, dtype=self.dtype) for w in coefs]
+        self.intercepts = [np.ascontiguousarray(b, dtype=self.dtype) for b in intercepts]
+        self.classes_ = np.asarray(classes)
+        self.n_features = self.coefs[0].shape[0]
+        self._local = threading.local()
+
+    @classmethod
+    def from_sklearn(cls, model, scaler, dtype=np.float64):
+        coefs, intercepts = fold_scaler(model.coefs_, model.intercepts_, scaler.mean_, scaler.scale_)
+        return cls(coefs, intercepts, model.classes_, dtype=dtype)
+
+    def save(self, path=COMPILED_PATH):
+        arrays = {f'coef_{i}': w for i, w in enumerate(self.coefs)}
+        arrays.update({f'intercept_{i}': b for i, b in enumerate(self.intercepts)})
+        np.savez(path, classes=self.classes_.astype(str), **arrays)
+
+    @classmethod
+    def load(cls, path=COMPILED_PATH, dtype=None):
+        with np.load(path) as f:
+            n = sum(1 for k in f.files if k.startswith('coef_'))
+            coefs = [f[f'coef_{i}'] for i in range(n)]
+            intercepts = [f[f'intercept_{i}'] for i in range(n)]
+            classes = f['classes'].astype(object)
+        return cls(coefs, intercepts, classes, dtype=dtype or coefs[0].dtype)
+
+    def _buffers(self, n):
+        # Per-thread activation buffers, grown on demand and reused across calls
+        bufs = getattr(self._local, 'bufs', None)
+        if bufs is None or bufs[0].shape[0] < n:
+            cap = max(n, 64)
+            bufs = [np.empty((cap, w.shape[1]), dtype=self.dtype) for w in self.coefs]
+            self._local.bufs = bufs
+        return [b[:n] for b in bufs]
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=self.dtype)
+        if X.ndim == 1:
+            X = X[None, :]
+        bufs = self._buffers(X.shape[0])
+
+        h = X
+        last = len(self.coefs) - 1
+        for i, (w, b, out) in enumerate(zip(self.coefs, self.intercepts, bufs)):
+            np.matmul(h, w, out=out)
+            out += b
+            if i < last:
+                np.maximum(out, 0, out=out)
+            h = out
+
+        # Softmax, shifted by the row max for stability
+        proba = h - h.max(axis=1, keepdims=True)
+        np.exp(proba, out=proba)
+        proba /= proba.sum(axis=1, keepdims=True)
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def variant_arrays(variant, coefs, intercepts, fused_coefs, fused_intercepts):
+    """Arrays stored in a bundle for a reduced-precision variant.
+
+    float32 keeps the scaler-folded layers. int8 quantizes the raw layers instead:
+    their inputs are standardized, so one scale per unit fits every input row,
+    while folded layer-1 weights span the raw features' very different ranges.
+    """
+    arrays = {}
+    if variant == 'float32':
+        for i, (w, b) in enumerate(zip(fused_coefs, fused_intercepts)):
+            arrays[f'float32_coef_{i}'] = np.ascontiguousarray(w, dtype=np.float32)
+            arrays[f'float32_intercept_{i}'] = np.ascontiguousarray(b, dtype=np.float32)
+    elif variant == 'int8':
+        for i, (w, b) in enumerate(zip(coefs, intercepts)):
+            arrays[f'int8_qcoef_{i}'], arrays[f'int8_qscale_{i}'] = quantize_int8(np.asarray(w))
+            arrays[f'int8_intercept_{i}'] = np.ascontiguousarray(b, dtype=np.float32)
+    else:
+        raise ValueError(f"Unknown model variant {variant!r} (choose from {', '.join(VARIANTS)})")
+    return arrays
+
+
+def variant_array_names(variant, n_layers):
+    if variant == 'float64':
+        return (['fused_coef_0', 'fused_intercept_0']
+                + [f'{k}_{i}' for i in range(1, n_layers) for k in ('coef', 'intercept')])
+    kinds = ('coef', 'intercept') if variant == 'float32' else ('qcoef', 'qscale', 'intercept')
+    return [f'{variant}_{k}_{i}' for i in range(n_layers) for k in kinds]
+
+
+def compile_variant(arrays, n_layers, classes, variant='float64'):
+    """CompiledModel for one variant from a bundle's arrays."""
+    if variant == 'float64':
+        coefs = [arrays['fused_coef_0']] + [arrays[f'coef_{i}'] for i in range(1, n_layers)]
+        intercepts = [arrays['fused_intercept_0']] + [arrays[f'intercept_{i}'] for i in range(1, n_layers)]
+        return CompiledModel(coefs, intercepts, classes, dtype=coefs[0].dtype)
+    if variant == 'float32':
+        return CompiledModel([arrays[f'float32_coef_{i}'] for i in range(n_layers)],
+                             [arrays[f'float32_intercept_{i}'] for i in range(n_layers)], classes, dtype=np.float32)
+    if variant == 'int8':
+        coefs = [arrays[f'int8_qcoef_{i}'].astype(np.float64) * arrays[f'int8_qscale_{i}'] for i in range(n_layers)]
+        intercepts = [arrays[f'int8_intercept_{i}'].astype(np.float64) for i in range(n_layers)]
+        coefs, intercepts = fold_scaler(coefs, intercepts, np.asarray(arrays['scaler_mean']),
+                                        np.asarray(arrays['scaler_scale']))
+        return CompiledModel(coefs, intercepts, classes, dtype=np.float32)
+    raise ValueError(f"Unknown model variant {variant!r} (choose from {', '.join(VARIANTS)})")
+
+
+def compile_model(model, scaler, path=COMPILED_PATH):
+    compiled = CompiledModel.from_sklearn(model, scaler)
+    compiled.save(path)
+    return compiled
+
+
+def _time_call(fn, X, repeats):
+    fn(X)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return (time.perf_counter() - start) / repeats
+
+
+def benchmark(model, scaler, compiled, X, batch_sizes=(1, 64, 4096)):
+    rng = np.random.default_rng(0)
+    rows = []
+    for n in batch_sizes:
+        batch = X[rng.integers(0, len(X), n)]
+        repeats = max(5, 20000 // n)
+        t_sk = _time_call(lambda b: model.predict(scaler.transform(b)), batch, repeats)
+        t_np = _time_call(compiled.predict, batch, repeats)
+        rows.append((n, t_sk, t_np))
+    return rows
+
+
+if __name__ == "__main__":
+    import warnings
+    import joblib
+    import pandas as pd
+
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+    model = joblib.load('sleep_model.pkl')
+    scaler = joblib.load('scaler.pkl')
+    le_gender = joblib.load('le_gender.pkl')
+    le_occup = joblib.load('le_occup.pkl')
+
+    compiled = compile_model(model, scaler)
+    print(f"✅ Compiled model written to {COMPILED_PATH}")
+
+    df = pd.read_csv('sleep_disorder_dataset.csv')
+    df['Gender'] = le_gender.transform(df['Gender'])
+    df['Occupation'] = le_occup.transform(df['Occupation'])
+    X = df.drop('Disorder', axis=1).to_numpy(dtype=np.float64)
+
+    mismatches = int((compiled.predict(X) != model.predict(scaler.transform(X))).sum())
+    print(f"🔍 Class decisions differing from sklearn: {mismatches} / {len(X)}")
+
+    print("---------------------------------------------------")
+    print(f"{'batch':>6} {'sklearn (ms)':>14} {'compiled (ms)':>14} {'speedup':>8}")
+    for n, t_sk, t_np in benchmark(model, scaler, compiled, X):
+        print(f"{n:>6} {t_sk * 1e3:>14.4f} {t_np * 1e3:>14.4f} {t_sk / t_np:>7.1f}x")
+    print("---------------------------------------------------")
@@ -0,0 +1,271 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import metrics
+from background import QueueThread
+from inference import FEATURE_FIELDS
+
+DB_PATH = os.environ.get('SLEEP_DB_PATH', 'sleep_data.db')
+
+# Group-commit defaults: flush after this many rows or this many milliseconds
+BATCH_ROWS = 200
+BATCH_DELAY_MS = 50
+
+# One typed column per encoded input feature and per class probability
+FEATURE_DB_COLUMNS = [(name, 'REAL' if cast is float else 'INTEGER') for name, cast in FEATURE_FIELDS]
+PROBA_DB_COLUMNS = {'Healthy': 'proba_healthy', 'Insomnia': 'proba_insomnia', 'Sleep Apnea': 'proba_sleep_apnea'}
+USERS_EXTRA_COLUMNS = FEATURE_DB_COLUMNS + [(c, 'REAL') for c in PROBA_DB_COLUMNS.values()] + [('model_version', 'TEXT')]
+# Confirmed diagnosis, filled in later (e.g. by a clinic follow-up) and used for incremental retraining.
+# label_seq numbers labels in the order they were written, so retraining can resume after the last one
+# it saw even when an older row (lower id) is labelled later.
+LABEL_COLUMN = ('label', 'TEXT')
+LABEL_SEQ_COLUMN = ('label_seq', 'INTEGER')
+
+# Rollup buckets: granularity -> length of the timestamp prefix ("YYYY-MM-DD HH" / "YYYY-MM-DD")
+ROLLUP_GRANULARITIES = {'hour': 13, 'day': 10}
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, prediction TEXT, timestamp TEXT)",
+    "CREATE TABLE IF NOT EXISTS feedback (id INTEGER PRIMARY KEY, message TEXT, rating INTEGER, timestamp TEXT)",
+    """CREATE TABLE IF NOT EXISTS prediction_rollups (
+        granularity TEXT, bucket TEXT, occupation TEXT, prediction TEXT, count INTEGER NOT NULL,
+        PRIMARY KEY (granularity, bucket, occupation, prediction)) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_users_timestamp ON users (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_users_prediction ON users (prediction)",
+    "CREATE INDEX IF NOT EXISTS idx_users_model_version ON users (model_version)",
+    "CREATE INDEX IF NOT EXISTS idx_users_label_seq ON users (label_seq)",
+    "CREATE INDEX IF NOT EXISTS idx_feedback_timestamp ON feedback (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_rollups_bucket ON prediction_rollups (granularity, bucket)",
+]
+
+USERS_INSERT = "INSERT INTO users (prediction, timestamp, {}) VALUES ({})".format(
+    ', '.join(c for c, _ in USERS_EXTRA_COLUMNS), ', '.join('?' * (len(USERS_EXTRA_COLUMNS) + 2)))
+ROLLUP_UPSERT = """INSERT INTO prediction_rollups (granularity, bucket, occupation, prediction, count)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (granularity, bucket, occupation, prediction) DO UPDATE SET count = count + excluded.count"""
+
+
+def connect(path=DB_PATH):
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+class ConnectionPool:
+    """Per-process pool of WAL-mode connections; resets itself after a fork."""
+
+    def __init__(self, path=DB_PATH, size=4):
+        self.path = path
+        self.size = size
+        self._pid = None
+        self._idle = None
+        self._lock = threading.Lock()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._idle = queue.LifoQueue()
+                    self._pid = os.getpid()
+
+    @contextmanager
+    def connection(self):
+        self._check_pid()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = connect(self.path)
+        try:
+            yield conn
+        finally:
+            if self._idle.qsize() < self.size:
+                self._idle.put(conn)
+            else:
+                conn.close()
+
+
+class BatchWriter(QueueThread):
+    """Background writer that group-commits queued INSERTs off the request thread.
+
+    Rows are committed every `batch_rows` rows or `batch_delay_ms` milliseconds,
+    whichever comes first. The thread starts lazily (so it is created in each
+    forked worker, not the master) and is flushed at interpreter exit.
+    """
+
+    thread_name = 'db-writer'
+
+    def __init__(self, pool, batch_rows=BATCH_ROWS, batch_delay_ms=BATCH_DELAY_MS):
+        self.pool = pool
+        self.batch_rows = batch_rows
+        self.batch_delay = batch_delay_ms / 1000.0
+        self._init_thread()
+        atexit.register(self.close)
+
+    def submit(self, sql, params=()):
+        self._ensure_started()
+        self._queue.put((sql, params, False))
+
+    def submit_many(self, sql, rows):
+        """Queue an executemany(); counts as len(rows) toward the group-commit size."""
+        self._ensure_started()
+        self._queue.put((sql, rows, True))
+
+    def flush(self, timeout=None):
+        """Block until every row submitted so far has been committed."""
+        if self._pid != os.getpid():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        if not self._running_here():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+    def _run(self):
+        with self.pool.connection() as conn:
+            stop = False
+            while not stop:
+                item = self._queue.get()
+                batch, waiters, pending = [], [], 0
+                deadline = time.monotonic() + self.batch_delay
+                while True:
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+                        pending += len(item[1]) if item[2] else 1
+                    if stop or waiters or pending >= self.batch_rows:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                self._commit(conn, batch)
+                for w in waiters:
+                    w.set()
+
+    def _commit(self, conn, batch):
+        if not batch:
+            return
+        try:
+            with metrics.db_commit_seconds.time(), conn:
+                for sql, params, many in batch:
+                    (conn.executemany if many else conn.execute)(sql, params)
+            metrics.db_rows.inc(sum(len(params) if many else 1 for _, params, many in batch))
+        except sqlite3.Error:
+            # One bad statement must not lose the whole group: retry them one by one
+            for sql, params, many in batch:
+                try:
+                    with conn:
+                        (conn.executemany if many else conn.execute)(sql, params)
+                except sqlite3.Error as e:
+                    print(f"❌ DB writer dropped a write: {e}")
+
+
+pool = ConnectionPool()
+writer = BatchWriter(pool)
+
+
+def _migrate_users(conn):
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+    for column, sql_type in USERS_EXTRA_COLUMNS + [LABEL_COLUMN, LABEL_SEQ_COLUMN]:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE users ADD COLUMN {column} {sql_type}")
+    if 'label_seq' not in existing:
+        # Labels written before label_seq existed were consumed in id order: keep that order
+        conn.execute("UPDATE users SET label_seq = id WHERE label IS NOT NULL")
+
+
+def init_db(path=DB_PATH):
+    conn = connect(path)
+    conn.execute(SCHEMA[0])
+    _migrate_users(conn)
+    for stmt in SCHEMA[1:]:
+        conn.execute(stmt)
+    conn.commit()
+    conn.close()
+
+
+def _rollup_rows(timestamps, occupations, predictions):
+    counts = Counter()
+    for ts, occ, pred in zip(timestamps, occupations, predictions):
+        for granularity, width in ROLLUP_GRANULARITIES.items():
+            counts[(granularity, ts[:width], occ, pred)] += 1
+    return [key + (n,) for key, n in counts.items()]
+
+
+def log_predictions(X, predictions, proba, classes, occupations, model_version, timestamp):
+    """Queue scored rows (encoded features, probabilities, model version) plus their rollup increments.
+
+    X is the (n, 13) encoded feature matrix, proba the (n, n_classes) output and
+    occupations the decoded occupation labels used as the rollup dimension.
+    """
+    proba_index = {PROBA_DB_COLUMNS[c]: i for i, c in enumerate(classes) if c in PROBA_DB_COLUMNS}
+    rows = []
+    for x, pred, p in zip(X.tolist(), predictions, proba.tolist()):
+        probs = [p[proba_index[c]] if c in proba_index else None for c in PROBA_DB_COLUMNS.values()]
+        rows.append([pred, timestamp] + x + probs + [model_version])
+    writer.submit_many(USERS_INSERT, rows)
+    writer.submit_many(ROLLUP_UPSERT, _rollup_rows([timestamp] * len(rows), occupations, predictions))
+
+
+def set_labels(labels):
+    """Queue confirmed diagnoses as (users.id, label) pairs; each write takes the next label_seq."""
+    writer.submit_many("UPDATE users SET label = ?, label_seq = (SELECT COALESCE(MAX(label_seq), 0) + 1 FROM users) "
+                       "WHERE id = ?", [(label, uid) for uid, label in labels])
+
+
+def last_label_seq(path=DB_PATH):
+    conn = connect(path)
+    try:
+        return conn.execute("SELECT COALESCE(MAX(label_seq), 0) FROM users").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def iter_labelled(after_seq=0, batch_size=1000, path=DB_PATH, until_seq=None):
+    """Stream (seqs, X, labels) mini-batches of rows labelled after after_seq (up to until_seq), in label order."""
+    columns = ', '.join(c for c, _ in FEATURE_DB_COLUMNS)
+    conn = connect(path)
+    try:
+        cur = conn.execute(f"SELECT label_seq, {columns}, label FROM users WHERE label_seq > ? AND label_seq <= ? "
+                           f"AND label IS NOT NULL AND age IS NOT NULL ORDER BY label_seq",
+                           (after_seq, until_seq if until_seq is not None else 2 ** 63 - 1))
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [r[0] for r in rows], [r[1:-1] for r in rows], [r[-1] for r in rows]
+    finally:
+        conn.close()
+
+
+def rebuild_rollups(occupation_classes, path=DB_PATH):
+    """Recompute prediction_rollups from the users table (one full scan, for migrations).
+
+    Rows logged before feature vectors were stored have no occupation and roll up as 'unknown'.
+    """
+    label = "CASE occupation {} ELSE 'unknown' END".format(
+        ' '.join(f"WHEN {i} THEN ?" for i in range(len(occupation_classes))))
+    conn = connect(path)
+    with conn:
+        conn.execute("DELETE FROM prediction_rollups")
+        for granularity, width in ROLLUP_GRANULARITIES.items():
+            conn.execute(
+                "INSERT INTO prediction_rollups (granularity, bucket, occupation, prediction, count) "
+                f"SELECT ?, substr(timestamp, 1, ?), {label}, prediction, COUNT(*) FROM users GROUP BY 2, 3, 4",
+                [granularity, width] + [str(c) for c in occupation_classes])
+    conn.close()
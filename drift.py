@@ -0,0 +1,254 @@
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+from background import QueueThread
+from inference import FEATURE_FIELDS, GENDER_COL, OCCUP_COL
+
+# Streaming drift monitor: live inputs are compared against the training distribution
+# without rescanning the database. Request handlers only enqueue their feature rows;
+# a background thread folds them into per-feature Welford moments and fixed-bin
+# histograms (O(1) memory each) and periodically recomputes PSI / KS scores.
+
+DRIFT_ENABLED = os.environ.get('SLEEP_DRIFT_MONITOR', '1') != '0'
+SCORE_INTERVAL = float(os.environ.get('SLEEP_DRIFT_INTERVAL', 30))
+WINDOW_SECONDS = 3600
+WINDOW_BUCKETS = 60
+MIN_SAMPLES = 200          # no alerts until this many rows have been seen
+PSI_WARN, PSI_ALERT = 0.1, 0.25
+MAX_DISCRETE_VALUES = 30   # integer features with at most this many values get one bin per value
+_EPS = 1e-4
+
+FEATURE_NAMES = [name for name, _ in FEATURE_FIELDS]
+
+
+def _bins_for(values, discrete):
+    if discrete:
+        lo, hi = int(values.min()), int(values.max())
+        return np.arange(lo, hi) + 0.5  # one bin per integer value, plus under/overflow bins
+    return np.unique(np.quantile(values, np.linspace(0.1, 0.9, 9)))  # deciles
+
+
+def reference_profile(X_train, y_train, classes):
+    """Training-set bins and proportions per feature (stored in the bundle manifest by train_model.py)."""
+    features = {}
+    for j, (name, cast) in enumerate(FEATURE_FIELDS):
+        col = X_train[:, j]
+        discrete = j in (GENDER_COL, OCCUP_COL) or (
+            np.all(col == np.round(col)) and len(np.unique(col)) <= MAX_DISCRETE_VALUES)
+        edges = _bins_for(col, discrete)
+        counts = np.bincount(np.searchsorted(edges, col, side='right'), minlength=len(edges) + 1)
+        features[name] = {'edges': edges.tolist(), 'proportions': (counts / counts.sum()).round(6).tolist()}
+    y = np.asarray(y_train, dtype=object)
+    return {'features': features, 'class_rates': {str(c): round(float(np.mean(y == c)), 6) for c in classes}}
+
+
+def _normal_profile(mean, scale):
+    # Bundles without a stored profile: decile bins of a normal with the scaler's moments,
+    # for the continuous fields only (a normal says nothing useful about binary/categorical ones)
+    z = np.array([-1.2816, -0.8416, -0.5244, -0.2533, 0.0, 0.2533, 0.5244, 0.8416, 1.2816])
+    return {'features': {name: {'edges': (mean[j] + z * scale[j]).tolist(), 'proportions': [0.1] * 10}
+                         for j, (name, cast) in enumerate(FEATURE_FIELDS) if cast is float},
+            'class_rates': None}
+
+
+def psi(expected, actual):
+    e = np.maximum(np.asarray(expected, dtype=np.float64), _EPS)
+    a = np.maximum(np.asarray(actual, dtype=np.float64), _EPS)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def ks(expected, actual):
+    """Max CDF gap over the bins (the binned two-sample KS statistic)."""
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual))))
+
+
+class DriftMonitor(QueueThread):
+    """Running input statistics vs a reference profile, updated off the request path."""
+
+    thread_name = 'drift-monitor'
+
+    def __init__(self, score_interval=SCORE_INTERVAL):
+        self.score_interval = score_interval
+        self._init_thread()
+        self._lock = threading.Lock()
+        self.scores = {}
+        self.reset(None)
+
+    def reset(self, bundle):
+        """(Re)start statistics against bundle's reference (service.py calls it on every model swap)."""
+        with self._lock:
+            self.version = bundle.version if bundle is not None else None
+            if bundle is None:
+                self.reference = None
+            else:
+                self.reference = bundle.manifest.get('drift_reference') or _normal_profile(
+                    np.asarray(bundle.scaler_mean), np.asarray(bundle.scaler_scale))
+                self.ref_mean = np.asarray(bundle.scaler_mean, dtype=np.float64)
+                self.ref_std = np.asarray(bundle.scaler_scale, dtype=np.float64)
+                self.classes = [str(c) for c in bundle.classes]
+                self.edges = [np.asarray(self.reference['features'].get(n, {'edges': []})['edges'])
+                              for n in FEATURE_NAMES]
+                self.hist = [np.zeros(len(e) + 1, dtype=np.int64) for e in self.edges]
+                self.class_window = np.zeros((WINDOW_BUCKETS, len(self.classes)), dtype=np.int64)
+                self.window_ids = np.full(WINDOW_BUCKETS, -1, dtype=np.int64)
+            n = len(FEATURE_NAMES)
+            self.count = 0
+            self.mean = np.zeros(n)
+            self.m2 = np.zeros(n)
+            self.scores = {}
+            self._last_scored = 0.0
+
+    # --- request path ---
+    def observe(self, bundle, X, labels):
+        """Queue scored rows (encoded features + predicted labels); returns immediately.
+
+        The first call starts statistics for its bundle. Later version changes only come
+        from reset(): during a hot swap requests still holding the old bundle keep
+        arriving, and their rows are dropped rather than restarting the statistics.
+        """
+        if self.version is None:
+            self.reset(bundle)
+        self._ensure_started()
+        self._queue.put((bundle.version, np.array(X, dtype=np.float64), [str(l) for l in labels], time.time()))
+
+    # --- background thread ---
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.score_interval)
+            except queue.Empty:
+                item = None
+            if item is not None:
+                items = [item]
+                while True:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                self.update(items)
+            if time.monotonic() - self._last_scored >= self.score_interval:
+                self.compute_scores()
+
+    def update(self, items):
+        """Fold a drained queue into the running statistics in one vectorized pass."""
+        with self._lock:
+            items = [item for item in items if item[0] == self.version and len(item[1])]
+            if not items:
+                return
+            X = np.concatenate([item[1] for item in items])
+            labels = [label for item in items for label in item[2]]
+            ts = np.concatenate([np.full(len(item[1]), item[3]) for item in items])
+
+            # The drained rows are one batch for the moments
+            mean_b = X.mean(axis=0)
+            self._merge_moments(len(X), mean_b, ((X - mean_b) ** 2).sum(axis=0))
+
+            for j, edges in enumerate(self.edges):
+                self.hist[j] += np.bincount(np.searchsorted(edges, X[:, j], side='right'),
+                                            minlength=len(edges) + 1)
+
+            # Class counts per one-minute bucket of a ring covering the last WINDOW_SECONDS
+            class_index = {c: i for i, c in enumerate(self.classes)}
+            codes = np.array([class_index.get(label, -1) for label in labels])
+            buckets = (ts // (WINDOW_SECONDS / WINDOW_BUCKETS)).astype(np.int64)
+            for bucket in np.unique(buckets):
+                in_bucket = codes[(buckets == bucket) & (codes >= 0)]
+                self._add_to_window(bucket, np.bincount(in_bucket, minlength=len(self.classes)))
+
+    def _merge_moments(self, n_b, mean_b, m2_b):
+        # Chan et al.'s parallel form of Welford's update
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta ** 2 * self.count * n_b / n
+        self.count = n
+
+    def _add_to_window(self, bucket, counts):
+        slot = bucket % WINDOW_BUCKETS
+        if self.window_ids[slot] > bucket:
+            return  # older than the ring
+        if self.window_ids[slot] != bucket:
+            self.window_ids[slot] = bucket
+            self.class_window[slot] = 0
+        self.class_window[slot] += counts
+
+    def stats(self):
+        """Mergeable copy of the running statistics (see merge)."""
+        with self._lock:
+            return {'version': self.version, 'count': self.count, 'mean': self.mean.copy(), 'm2': self.m2.copy(),
+                    'hist': [h.copy() for h in self.hist], 'window_ids': self.window_ids.copy(),
+                    'class_window': self.class_window.copy()}
+
+    def merge(self, stats):
+        """Fold in stats() from another monitor on the same bundle, e.g. one per scoring process."""
+        with self._lock:
+            if stats['version'] != self.version or not stats['count']:
+                return
+            self._merge_moments(stats['count'], stats['mean'], stats['m2'])
+            for h, other in zip(self.hist, stats['hist']):
+                h += other
+            for bucket, counts in zip(stats['window_ids'], stats['class_window']):
+                if bucket >= 0:
+                    self._add_to_window(bucket, counts)
+
+    def compute_scores(self):
+        with self._lock:
+            self._last_scored = time.monotonic()
+            if self.reference is None or self.count == 0:
+                return self.scores
+            features = {}
+            for j, name in enumerate(FEATURE_NAMES):
+                ref = self.reference['features'].get(name)
+                live = self.hist[j] / self.hist[j].sum()
+                std = np.sqrt(self.m2[j] / self.count)
+                features[name] = {
+                    'psi': round(psi(ref['proportions'], live), 4) if ref else None,
+                    'ks': round(ks(ref['proportions'], live), 4) if ref else None,
+                    'mean': round(float(self.mean[j]), 4),
+                    'mean_shift_sd': round(float((self.mean[j] - self.ref_mean[j]) / self.ref_std[j]), 4),
+                    'std_ratio': round(float(std / self.ref_std[j]), 4),
+                }
+
+            current = int(time.time() // (WINDOW_SECONDS / WINDOW_BUCKETS))
+            in_window = self.window_ids > current - WINDOW_BUCKETS
+            window_counts = self.class_window[in_window].sum(axis=0)
+            window_total = int(window_counts.sum())
+            class_rates = {c: round(float(n / window_total), 4) if window_total else 0.0
+                           for c, n in zip(self.classes, window_counts)}
+            ref_rates = self.reference.get('class_rates')
+            class_psi = None
+            if ref_rates and window_total:
+                class_psi = round(psi([ref_rates.get(c, 0.0) for c in self.classes], list(class_rates.values())), 4)
+
+            alerts = []
+            if self.count >= MIN_SAMPLES:
+                for name, s in features.items():
+                    if s['psi'] is not None and s['psi'] >= PSI_WARN:
+                        alerts.append({'feature': name, 'psi': s['psi'],
+                                       'level': 'alert' if s['psi'] >= PSI_ALERT else 'warn'})
+                if class_psi is not None and class_psi >= PSI_WARN:
+                    alerts.append({'feature': 'prediction', 'psi': class_psi,
+                                   'level': 'alert' if class_psi >= PSI_ALERT else 'warn'})
+
+            self.scores = {
+                'model_version': self.version,
+                'reference': 'training' if self.reference.get('class_rates') else 'normal-approximation',
+                'samples': int(self.count),
+                'computed_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'features': features,
+                'class_rates_window': class_rates,
+                'window_predictions': window_total,
+                'class_psi': class_psi,
+                'alerts': alerts,
+            }
+            return self.scores
+
+    def snapshot(self):
+        return self.scores
+
+
+def create_monitor(enabled=DRIFT_ENABLED):
+    return DriftMonitor() if enabled else None
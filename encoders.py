@@ -0,0 +1,84 @@
+import os
+import numpy as np
+
+import metrics
+
+# Categorical encoding shared by training (preprocessing.py) and serving (inference.py,
+# score_file.py). Codes match sklearn's LabelEncoder: the index into the sorted classes.
+#
+# Categories the model never saw (the form also offers Nurse/Teacher/Others) are
+# handled per SLEEP_UNKNOWN_CATEGORY:
+#   error          reject the record (default)
+#   reserved       encode as len(classes), a code no real class uses; the MLP was never
+#                  trained on it, so its output for such rows is an extrapolation
+#   most_frequent  encode as the most frequent training category (needs a bundle that
+#                  records encoder_most_frequent)
+
+UNKNOWN_POLICIES = ('error', 'reserved', 'most_frequent')
+UNKNOWN_POLICY = os.environ.get('SLEEP_UNKNOWN_CATEGORY', 'error')
+UNKNOWN_LABEL = 'unknown'
+
+unknown_categories = metrics.registry.counter('sleep_unknown_categories_total',
+                                              'Categorical values outside the training classes', ['field', 'policy'])
+
+
+class UnknownCategoryError(ValueError):
+    pass
+
+
+class CategoryEncoder:
+    """A fitted LabelEncoder compiled into a dict (value -> code) and an array (code -> value)."""
+
+    def __init__(self, name, classes, unknown=UNKNOWN_POLICY, most_frequent=None):
+        if unknown not in UNKNOWN_POLICIES:
+            raise ValueError(f"Unknown-category policy must be one of {UNKNOWN_POLICIES}, got {unknown!r}")
+        self.name = name
+        self.classes_ = np.asarray([str(c) for c in classes], dtype=object)
+        self.codes = {c: i for i, c in enumerate(self.classes_)}
+        self.unknown = unknown
+        self.most_frequent = None if most_frequent is None else str(most_frequent)
+        self.reserved_code = len(self.classes_)
+        self._labels = np.append(self.classes_, UNKNOWN_LABEL)
+
+        if unknown == 'reserved':
+            self.fallback = self.reserved_code
+        elif unknown == 'most_frequent':
+            if self.most_frequent not in self.codes:
+                raise ValueError(f"'most_frequent' policy for {name} needs the training category counts "
+                                 f"(not recorded in this bundle; retrain to add them)")
+            self.fallback = self.codes[self.most_frequent]
+        else:
+            self.fallback = None
+
+    @classmethod
+    def fit(cls, name, values, unknown='error'):
+        """Fit on a column; returns (encoder, codes)."""
+        classes, codes, counts = np.unique(np.asarray(values, dtype=str), return_inverse=True, return_counts=True)
+        return cls(name, classes, unknown, most_frequent=classes[counts.argmax()]), codes
+
+    def check(self, value):
+        """Raise UnknownCategoryError if value is unknown and the policy is 'error'."""
+        if self.fallback is None and str(value) not in self.codes:
+            raise UnknownCategoryError(f"unknown {self.name} {str(value)!r} "
+                                       f"(expected one of: {', '.join(self.classes_)})")
+
+    def encode(self, values, strict=True):
+        """Vectorized encoding of a whole column; unknowns follow the policy.
+
+        With strict=False, unknowns under the 'error' policy come back as -1 instead of raising.
+        """
+        get = self.codes.get
+        codes = np.fromiter((get(str(v), -1) for v in values), dtype=np.int64, count=len(values))
+        unknown = codes < 0
+        if unknown.any():
+            if self.fallback is None:
+                if not strict:
+                    return codes
+                self.check(np.asarray(values, dtype=object)[unknown][0])
+            codes[unknown] = self.fallback
+            unknown_categories.inc(int(unknown.sum()), field=self.name, policy=self.unknown)
+        return codes
+
+    def decode(self, codes):
+        """Class labels for codes; the reserved code decodes to 'unknown'."""
+        return self._labels[np.minimum(np.asarray(codes, dtype=np.int64), self.reserved_code)]
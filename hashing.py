@@ -0,0 +1,10 @@
+import hashlib
+
+
+def file_digest(path):
+    """SHA-256 hex digest of a file's contents, read in 1 MiB blocks."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
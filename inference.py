@@ -0,0 +1,152 @@
+import json
+import numpy as np
+
+import metrics
+from prediction_cache import feature_keys
+
+# Input fields in the exact column order the scaler and model were trained on
+FEATURE_FIELDS = [
+    ('age', float), ('gender', str), ('occupation', str),
+    ('daily_screen', float), ('night_screen', float), ('blue_light', int),
+    ('bmi', float), ('heart_rate', int), ('stress', int),
+    ('phys_act', int), ('snoring', int), ('night_walking', int), ('coffee', int)
+]
+GENDER_COL = 1
+OCCUP_COL = 2
+
+MAX_BATCH_RECORDS = 10000
+# No real input comes near this; larger magnitudes (and NaN/inf) are rejected rather
+# than pushed through the network, where they overflow into NaN probabilities
+MAX_ABS_VALUE = 1e6
+
+
+class MalformedRecord:
+    """Stand-in for an NDJSON line that is not valid JSON; reported as that record's error."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _parse_line(line):
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return MalformedRecord(f"invalid JSON: {e}")
+
+
+def parse_batch_body(raw, content_type):
+    """Turn a /predict/batch request body into a list of records (JSON array or NDJSON).
+
+    In NDJSON a malformed line only fails its own record, not the batch.
+    """
+    text = raw.decode('utf-8') if isinstance(raw, bytes) else raw
+    if 'ndjson' in (content_type or '') or 'jsonlines' in (content_type or ''):
+        return [_parse_line(line) for line in text.splitlines() if line.strip()]
+    body = json.loads(text)
+    if isinstance(body, dict):
+        body = body.get('records')
+    if not isinstance(body, list):
+        raise ValueError("Expected a JSON array of records or {'records': [...]}")
+    return body
+
+
+def _parse_values(record):
+    if isinstance(record, MalformedRecord):
+        raise ValueError(record.error)
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+    missing = [name for name, _ in FEATURE_FIELDS if name not in record]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    values = []
+    for name, cast in FEATURE_FIELDS:
+        try:
+            value = cast(record[name])
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"invalid value for '{name}': {record[name]!r}")
+        if cast is not str and not abs(value) <= MAX_ABS_VALUE:
+            raise ValueError(f"invalid value for '{name}': {record[name]!r} (must be a finite number)")
+        values.append(value)
+    return values
+
+
+def encode_records(records, gender_encoder, occupation_encoder):
+    """Validate records and build one (n, 13) feature matrix.
+
+    Returns (X, rows, errors): rows maps each matrix row back to its record index
+    and errors maps record index -> message for records that failed validation
+    (including unknown categories under the 'error' policy).
+    """
+    parsed, rows, errors = [], [], {}
+    for i, record in enumerate(records):
+        try:
+            values = _parse_values(record)
+            gender_encoder.check(values[GENDER_COL])
+            occupation_encoder.check(values[OCCUP_COL])
+            parsed.append(values)
+            rows.append(i)
+        except ValueError as e:
+            errors[i] = str(e)
+
+    X = np.zeros((len(parsed), len(FEATURE_FIELDS)), dtype=np.float64)
+    if not parsed:
+        return X, rows, errors
+
+    numeric = [j for j in range(len(FEATURE_FIELDS)) if j not in (GENDER_COL, OCCUP_COL)]
+    X[:, numeric] = np.array([[p[j] for j in numeric] for p in parsed], dtype=np.float64)
+    X[:, GENDER_COL] = gender_encoder.encode([p[GENDER_COL] for p in parsed])
+    X[:, OCCUP_COL] = occupation_encoder.encode([p[OCCUP_COL] for p in parsed])
+    return X, rows, errors
+
+
+def forward_pass(bundle, X, batcher=None):
+    """predict_proba on the bundle's model, through the MicroBatcher when one is given."""
+    if batcher is None:
+        return bundle.model.predict_proba(X)
+    return batcher.predict_proba(bundle, X)
+
+
+def score_records(records, bundle, cache=None, batcher=None, route='score'):
+    """Encode and score records in one forward pass of the bundle's model.
+
+    With a PredictionCache, cached rows are served from it and only the misses
+    go through the forward pass. With a MicroBatcher, the forward pass is shared
+    with other concurrent requests. Stage timings are recorded under `route`.
+    Returns (X, rows, errors, proba, labels) where proba/labels line up with X and rows.
+    """
+    with metrics.stage(route, 'encode'):
+        X, rows, errors = encode_records(records, bundle.gender_encoder, bundle.occupation_encoder)
+    proba = np.zeros((len(rows), len(bundle.classes)))
+    if rows and cache is None:
+        with metrics.stage(route, 'inference'):
+            proba = forward_pass(bundle, X, batcher)
+    elif rows:
+        with metrics.stage(route, 'cache_lookup'):
+            keys = feature_keys(X)
+            cached = cache.get_many(bundle.cache_version, keys)
+            misses = [k for k, p in enumerate(cached) if p is None]
+            for k, p in enumerate(cached):
+                if p is not None:
+                    proba[k] = p
+        if misses:
+            with metrics.stage(route, 'inference'):
+                proba[misses] = forward_pass(bundle, X[misses], batcher)
+            with metrics.stage(route, 'cache_store'):
+                cache.put_many(bundle.cache_version, [keys[k] for k in misses], proba[misses])
+    labels = bundle.classes[proba.argmax(axis=1)] if rows else bundle.classes[:0]
+    return X, rows, errors, proba, labels
+
+
+def batch_results(n_records, rows, errors, proba, labels, classes):
+    """Per-record JSON results in input order: prediction + probabilities, or the validation error."""
+    results = [None] * n_records
+    for i, msg in errors.items():
+        results[i] = {'index': i, 'error': msg}
+    classes = [str(c) for c in classes]
+    for k, i in enumerate(rows):
+        results[i] = {
+            'index': i,
+            'prediction': str(labels[k]),
+            'probabilities': {c: round(float(p), 6) for c, p in zip(classes, proba[k])}
+        }
+    return results
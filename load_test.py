@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import numpy as np
+import httpx
+
+# Compares the Flask app (python app.py) and the ASGI app (uvicorn asgi_app:app)
+# under 1 / 50 / 500 concurrent clients posting the prediction form.
+
+FORM = {'age': '24', 'gender': 'Male', 'occupation': 'Student', 'bmi': '22.5', 'daily_screen': '6.0',
+        'night_screen': '1.0', 'blue_light': '0', 'phys_act': '30', 'stress': '5', 'heart_rate': '72',
+        'coffee': '2', 'snoring': '0', 'night_walking': '0'}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, port):
+    if mode == 'flask':
+        cmd = [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', str(port), '--with-threads']
+    else:
+        cmd = [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--port', str(port), '--log-level', 'warning']
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            env=dict(os.environ, PYTHONWARNINGS='ignore'))
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            httpx.get(url + '/', timeout=1)
+            return proc, url
+        except httpx.TransportError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+async def run_level(url, concurrency, total_requests, path='/predict'):
+    latencies, errors = [], 0
+    per_client = max(1, total_requests // concurrency)
+
+    async def worker():
+        # One keep-alive connection per simulated client; a single shared httpx pool
+        # serializes badly at high concurrency and would dominate the measurement.
+        nonlocal errors
+        async with httpx.AsyncClient(base_url=url, limits=httpx.Limits(max_connections=1), timeout=60) as client:
+            for _ in range(per_client):
+                start = time.perf_counter()
+                try:
+                    r = await client.post(path, data=FORM)
+                    if r.status_code != 200 or r.text.startswith('Error'):
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    lat = np.array(latencies) * 1e3
+    return {'concurrency': concurrency, 'requests': len(lat), 'errors': errors,
+            'throughput_rps': len(lat) / elapsed, 'p50_ms': float(np.percentile(lat, 50)),
+            'p99_ms': float(np.percentile(lat, 99))}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the Flask and ASGI serving modes")
+    parser.add_argument('--modes', nargs='+', default=['flask', 'asgi'], choices=['flask', 'asgi'])
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 50, 500])
+    parser.add_argument('--requests', type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument('--out', default=None, help="optional JSON results file")
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes:
+        proc, url = start_server(mode, free_port())
+        try:
+            for c in args.concurrency:
+                r = asyncio.run(run_level(url, c, max(args.requests, c)))
+                r['mode'] = mode
+                results.append(r)
+                print(f"{mode:>6} c={c:<4} {r['throughput_rps']:8.1f} req/s  p50 {r['p50_ms']:8.1f} ms  "
+                      f"p99 {r['p99_ms']:8.1f} ms  errors {r['errors']}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results saved: {args.out}")
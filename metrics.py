@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# In-process metrics served at /metrics in the Prometheus text exposition format.
+# SLEEP_METRICS=0 turns every observe/inc/timer into an immediate return.
+
+METRICS_ENABLED = os.environ.get('SLEEP_METRICS', '1') != '0'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, registry, name, help, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if not self.registry.enabled:
+            return
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f'{self.name}{_labels(self.labelnames, k)} {v}' for k, v in sorted(values.items())]
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        if not self.registry.enabled:
+            return
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            row[i] += 1
+            row[-1] += value
+
+    def time(self, **labels):
+        """Context manager observing the wall time of its body."""
+        if not self.registry.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            values = {k: list(v) for k, v in self._values.items()}
+        lines = []
+        for key, row in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), row[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, key, [("le", bound)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, key)} {row[-1]:.6f}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """Named counters/histograms plus collector callbacks for gauges read at scrape time."""
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(self, name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(self, name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, name, help, kind, fn):
+        """Register fn() -> [(labels_dict, value), ...], evaluated on every scrape."""
+        self._collectors.append((name, help, kind, fn))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += [f'# HELP {metric.name} {metric.help}', f'# TYPE {metric.name} {metric.kind}']
+            lines += metric.samples()
+        for name, help, kind, fn in self._collectors:
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} {kind}']
+            for labels, value in fn():
+                lines.append(f'{name}{_labels(labels.keys(), labels.values())} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# Request path
+stage_seconds = registry.histogram('sleep_stage_seconds', 'Time spent in each stage of a request', ['route', 'stage'])
+request_seconds = registry.histogram('sleep_request_seconds', 'End-to-end request handling time', ['route'])
+predictions = registry.counter('sleep_predictions_total', 'Predictions served per class', ['model_version', 'prediction'])
+errors = registry.counter('sleep_errors_total', 'Failed requests/records per error type', ['route', 'type'])
+
+# Storage and reports
+db_commit_seconds = registry.histogram('sleep_db_commit_seconds', 'Group-commit latency of the background DB writer')
+db_rows = registry.counter('sleep_db_rows_written_total', 'Rows (statements) committed by the background DB writer')
+report_render_seconds = registry.histogram('sleep_report_render_seconds', 'PDF report render latency', ['cache'])
+
+
+def stage(route, name):
+    """Time one stage of a request: `with metrics.stage('predict', 'encode'): ...`"""
+    if not registry.enabled:
+        return _NOOP_TIMER
+    return _Timer(stage_seconds, {'route': route, 'stage': name})
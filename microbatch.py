@@ -0,0 +1,113 @@
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import Future
+import numpy as np
+
+from background import QueueThread
+
+MICROBATCH_ENABLED = os.environ.get('SLEEP_MICROBATCH', '0') == '1'
+MAX_BATCH = int(os.environ.get('SLEEP_MICROBATCH_MAX_BATCH', 64))
+MAX_DELAY_MS = float(os.environ.get('SLEEP_MICROBATCH_DELAY_MS', 2.0))
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+WAIT_MS_BUCKETS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50]
+
+
+class MicroBatcher(QueueThread):
+    """Coalesces concurrent small prediction requests into one vectorized forward pass.
+
+    Callers enqueue their feature rows and block on a Future. A scheduler thread
+    collects rows for up to max_delay_ms (or until max_batch rows are waiting),
+    runs predict_proba once per model version and hands each caller its rows.
+    """
+
+    thread_name = 'microbatcher'
+
+    def __init__(self, max_batch=MAX_BATCH, max_delay_ms=MAX_DELAY_MS):
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self._init_thread()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.batch_sizes = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.wait_ms = [0] * (len(WAIT_MS_BUCKETS) + 1)
+        self.wait_ms_total = 0.0
+
+    def submit(self, bundle, X):
+        """Queue rows X for bundle's model; returns a Future of their probability rows."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((bundle, np.asarray(X, dtype=np.float64), time.perf_counter(), future))
+        return future
+
+    def predict_proba(self, bundle, X):
+        return self.submit(bundle, X).result()
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            n_rows = len(items[0][1])
+            deadline = time.perf_counter() + self.max_delay
+            while n_rows < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                items.append(item)
+                n_rows += len(item[1])
+            self._run_batch(items)
+
+    def _run_batch(self, items):
+        started = time.perf_counter()
+        # Requests that raced a model swap may carry different bundles: one pass per version
+        groups = {}
+        for item in items:
+            groups.setdefault(id(item[0]), []).append(item)
+        for group in groups.values():
+            bundle = group[0][0]
+            try:
+                proba = bundle.model.predict_proba(np.vstack([item[1] for item in group]))
+            except Exception as e:
+                for item in group:
+                    item[3].set_exception(e)
+                continue
+            offset = 0
+            for _, X, _, future in group:
+                future.set_result(proba[offset:offset + len(X)])
+                offset += len(X)
+
+        n_rows = sum(len(item[1]) for item in items)
+        with self._stats_lock:
+            self.batches += 1
+            self.rows += n_rows
+            self.batch_sizes[bisect_left(BATCH_SIZE_BUCKETS, n_rows)] += 1
+            for _, _, enqueued, _ in items:
+                waited = (started - enqueued) * 1e3
+                self.wait_ms[bisect_left(WAIT_MS_BUCKETS, waited)] += 1
+                self.wait_ms_total += waited
+
+    def snapshot(self):
+        with self._stats_lock:
+            requests = sum(self.wait_ms)
+            return {
+                'max_batch': self.max_batch,
+                'max_delay_ms': self.max_delay * 1e3,
+                'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+                'batches': self.batches,
+                'rows': self.rows,
+                'mean_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+                'batch_size_histogram': dict(zip([f'<={b}' for b in BATCH_SIZE_BUCKETS] + ['+Inf'], self.batch_sizes)),
+                'added_latency_ms_histogram': dict(zip([f'<={b}' for b in WAIT_MS_BUCKETS] + ['+Inf'], self.wait_ms)),
+                'mean_added_latency_ms': round(self.wait_ms_total / requests, 4) if requests else 0.0,
+            }
+
+
+def create_batcher(enabled=MICROBATCH_ENABLED):
+    return MicroBatcher() if enabled else None
@@ -0,0 +1,238 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import threading
+import numpy as np
+
+from compiled_model import CompiledModel, VARIANTS, variant_arrays, compile_variant
+from encoders import CategoryEncoder, UNKNOWN_POLICY
+from hashing import file_digest
+from inference import FEATURE_FIELDS
+
+BUNDLE_ROOT = 'models'
+CURRENT_FILE = 'CURRENT'
+FORMAT_VERSION = 1
+# Which stored precision to serve (SLEEP_MODEL_VARIANT=float64|float32|int8); see compiled_model.VARIANTS
+MODEL_VARIANT = os.environ.get('SLEEP_MODEL_VARIANT', 'float64')
+
+# Dataset column backing each input field, same order as FEATURE_FIELDS
+FEATURE_COLUMNS = ['Age', 'Gender', 'Occupation', 'DailyScreenTime', 'NightScreenTime', 'BlueLightFilter',
+                   'BMI', 'HeartRate', 'StressLevel', 'PhysicalActivity', 'Snoring', 'NightWalking', 'CoffeeIntake']
+
+
+class BundleError(Exception):
+    pass
+
+
+class ModelBundle:
+    """Everything needed to serve one training run: schema, encoders, scaler and MLP layers.
+
+    Arrays are opened with mmap_mode='r', so pre-forked workers share the same pages.
+    """
+
+    def __init__(self, path, manifest, arrays, unknown_policy=UNKNOWN_POLICY, variant=MODEL_VARIANT):
+        self.path = path
+        self.manifest = manifest
+        self.arrays = arrays
+        self.version = manifest['version']
+        self.classes = np.array(manifest['classes'], dtype=object)
+        self.gender_classes = np.array(manifest['encoders']['gender'], dtype=object)
+        self.occupation_classes = np.array(manifest['encoders']['occupation'], dtype=object)
+        most_frequent = manifest.get('encoder_most_frequent', {})
+        try:
+            self.gender_encoder = CategoryEncoder('gender', self.gender_classes, unknown_policy,
+                                                  most_frequent.get('gender'))
+            self.occupation_encoder = CategoryEncoder('occupation', self.occupation_classes, unknown_policy,
+                                                      most_frequent.get('occupation'))
+        except ValueError as e:
+            raise BundleError(f"{e} ({path})")
+        self.scaler_mean = arrays['scaler_mean']
+        self.scaler_scale = arrays['scaler_scale']
+
+        if variant not in VARIANTS:
+            raise BundleError(f"Unknown model variant {variant!r} (choose from {', '.join(VARIANTS)})")
+        if variant not in self.variants:
+            # Serving float64 instead would silently change the model's memory and latency profile
+            raise BundleError(f"Bundle {self.version} has no '{variant}' variant "
+                              f"(has {', '.join(self.variants)}; retrain to export it) ({path})")
+        self.variant = variant
+        self.model = compile_variant(arrays, manifest['n_layers'], self.classes, variant)
+
+    @property
+    def variants(self):
+        return ['float64'] + self.manifest.get('variants', [])
+
+    @property
+    def cache_version(self):
+        # Prediction-cache namespace: variants of one version must not share cached probabilities
+        return self.version if self.variant == 'float64' else f'{self.version}/{self.variant}'
+
+
+def _manifest_hash(manifest):
+    # Hash of the schema + every array digest; identifies the training run
+    body = {k: v for k, v in manifest.items() if k not in ('hash', 'version', 'created')}
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def bundle_arrays(model, scaler, variants=()):
+    """Collect the raw and scaler-folded layer arrays of a trained MLP + StandardScaler,
+    plus the arrays of any reduced-precision variants."""
+    compiled = CompiledModel.from_sklearn(model, scaler)
+    arrays = {
+        'scaler_mean': np.asarray(scaler.mean_, dtype=np.float64),
+        'scaler_scale': np.asarray(scaler.scale_, dtype=np.float64),
+        'fused_coef_0': compiled.coefs[0],
+        'fused_intercept_0': compiled.intercepts[0],
+    }
+    for i, (w, b) in enumerate(zip(model.coefs_, model.intercepts_)):
+        arrays[f'coef_{i}'] = np.ascontiguousarray(w)
+        arrays[f'intercept_{i}'] = np.ascontiguousarray(b)
+    for variant in variants:
+        arrays.update(variant_arrays(variant, model.coefs_, model.intercepts_, compiled.coefs, compiled.intercepts))
+    return arrays
+
+
+def write_bundle(model, scaler, le_gender, le_occup, root=BUNDLE_ROOT, extra=None, variants=()):
+    """Write a new bundle version under root/ and atomically point root/CURRENT at it."""
+    os.makedirs(root, exist_ok=True)
+    tmp_dir = os.path.join(root, f'.tmp-{os.getpid()}-{threading.get_ident()}')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    variants = [v for v in variants if v != 'float64']
+    arrays = bundle_arrays(model, scaler, variants)
+    array_meta = {}
+    for name, arr in sorted(arrays.items()):
+        fname = f'{name}.npy'
+        np.save(os.path.join(tmp_dir, fname), arr)
+        array_meta[name] = {'file': fname, 'dtype': str(arr.dtype), 'shape': list(arr.shape),
+                            'sha256': file_digest(os.path.join(tmp_dir, fname))}
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'created': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'feature_schema': [{'field': name, 'column': col, 'type': cast.__name__}
+                           for (name, cast), col in zip(FEATURE_FIELDS, FEATURE_COLUMNS)],
+        'classes': [str(c) for c in model.classes_],
+        'encoders': {'gender': [str(c) for c in le_gender.classes_],
+                     'occupation': [str(c) for c in le_occup.classes_]},
+        'hidden_layer_sizes': list(model.hidden_layer_sizes),
+        'n_layers': len(model.coefs_),
+        'arrays': array_meta,
+    }
+    if variants:
+        manifest['variants'] = variants
+    # Training-set modes for the 'most_frequent' unknown-category policy (CategoryEncoder only)
+    if getattr(le_gender, 'most_frequent', None) and getattr(le_occup, 'most_frequent', None):
+        manifest['encoder_most_frequent'] = {'gender': le_gender.most_frequent, 'occupation': le_occup.most_frequent}
+    if extra:
+        manifest.update(extra)
+    manifest['hash'] = _manifest_hash(manifest)
+    manifest['version'] = datetime.datetime.now().strftime('%Y%m%d-%H%M%S') + '-' + manifest['hash'][:8]
+
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    final_dir = os.path.join(root, manifest['version'])
+    shutil.rmtree(final_dir, ignore_errors=True)
+    os.rename(tmp_dir, final_dir)
+    set_current(manifest['version'], root)
+    return final_dir
+
+
+def set_current(version, root=BUNDLE_ROOT):
+    tmp = os.path.join(root, f'.{CURRENT_FILE}.{os.getpid()}')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(version + '\n')
+    os.replace(tmp, os.path.join(root, CURRENT_FILE))
+
+
+def current_version(root=BUNDLE_ROOT):
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding='utf-8') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        raise BundleError(f"No model bundle found in '{root}/' (run train_model.py)")
+
+
+def load_bundle(path=None, root=BUNDLE_ROOT, verify=True, unknown_policy=UNKNOWN_POLICY, variant=MODEL_VARIANT):
+    """Open a bundle directory (default: the CURRENT version) with memory-mapped arrays."""
+    path = path or os.path.join(root, current_version(root))
+    with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise BundleError(f"Unsupported bundle format {manifest.get('format_version')} in {path}")
+
+    if verify:
+        if _manifest_hash(manifest) != manifest['hash']:
+            raise BundleError(f"Manifest hash mismatch in {path}")
+        for name, meta in manifest['arrays'].items():
+            if file_digest(os.path.join(path, meta['file'])) != meta['sha256']:
+                raise BundleError(f"Array '{name}' in {path} does not match its manifest hash")
+
+    arrays = {name: np.load(os.path.join(path, meta['file']), mmap_mode='r')
+              for name, meta in manifest['arrays'].items()}
+    return ModelBundle(path, manifest, arrays, unknown_policy, variant)
+
+
+# --- Startup / memory measurement ---
+_LEGACY_LOAD = """
+import joblib
+model = joblib.load('sleep_model.pkl'); scaler = joblib.load('scaler.pkl')
+le_gender = joblib.load('le_gender.pkl'); le_occup = joblib.load('le_occup.pkl')
+"""
+_BUNDLE_LOAD = """
+from model_bundle import load_bundle
+bundle = load_bundle()
+bundle.model.predict(bundle.scaler_mean[None, :])
+"""
+_PROBE = """
+import json, time
+t0 = time.perf_counter()
+{load}
+elapsed = time.perf_counter() - t0
+status = dict(l.split(':', 1) for l in open('/proc/self/status') if ':' in l)
+kb = lambda field: int(status.get(field, '0 kB').split()[0])
+print(json.dumps({{'seconds': elapsed, 'rss_kb': kb('VmRSS'), 'rss_anon_kb': kb('RssAnon'),
+                   'peak_rss_kb': kb('VmHWM')}}))
+"""
+
+
+def probe_startup(load):
+    """Run the code `load` in a fresh interpreter; its seconds and resident memory (kB) after it."""
+    import subprocess
+    import sys
+    out = subprocess.run([sys.executable, '-W', 'ignore', '-c', _PROBE.format(load=load)],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_startup():
+    return {label: probe_startup(load)
+            for label, load in (('4x joblib.load', _LEGACY_LOAD), ('memmap bundle', _BUNDLE_LOAD))}
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build or inspect the versioned model bundle")
+    parser.add_argument('--from-pkl', action='store_true', help="build a bundle from the legacy .pkl files")
+    parser.add_argument('--measure', action='store_true', help="compare startup time and RSS against joblib loading")
+    args = parser.parse_args()
+
+    if args.from_pkl:
+        import joblib
+        path = write_bundle(joblib.load('sleep_model.pkl'), joblib.load('scaler.pkl'),
+                            joblib.load('le_gender.pkl'), joblib.load('le_occup.pkl'))
+        print(f"✅ Bundle written: {path}")
+
+    bundle = load_bundle()
+    print(f"📦 Current bundle: {bundle.version} (hash {bundle.manifest['hash'][:12]})")
+
+    if args.measure:
+        print("---------------------------------------------------")
+        for label, r in measure_startup().items():
+            print(f"{label:>16}: {r['seconds'] * 1e3:8.1f} ms  RSS {r['rss_kb'] / 1024:6.1f} MB"
+                  f"  (private {r['rss_anon_kb'] / 1024:6.1f} MB)")
+        print("---------------------------------------------------")
@@ -0,0 +1,187 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+CACHE_MODE = os.environ.get('SLEEP_PREDICTION_CACHE', 'memory')  # off | memory | sqlite
+CACHE_MAX_BYTES = int(os.environ.get('SLEEP_PREDICTION_CACHE_BYTES', 16 * 1024 * 1024))
+CACHE_TTL_SECONDS = float(os.environ.get('SLEEP_PREDICTION_CACHE_TTL', 3600))
+CACHE_SHARED_ROWS = int(os.environ.get('SLEEP_PREDICTION_CACHE_SHARED_ROWS', 200000))
+SHARED_CACHE_PATH = 'prediction_cache.db'
+
+
+def feature_keys(X):
+    """Normalized cache keys for each row of X, or None for rows that are off the 0.1 grid.
+
+    Every input is an integer or a 0.1-step decimal, so rows are keyed by their values
+    in tenths. Rows with finer values are not cached rather than rounded onto a
+    neighbour's entry.
+    """
+    tenths = np.rint(np.asarray(X) * 10)
+    on_grid = np.all(np.abs(np.asarray(X) * 10 - tenths) < 1e-6, axis=1)
+    tenths = tenths.astype(np.int64)
+    return [tuple(t) if ok else None for t, ok in zip(tenths.tolist(), on_grid)]
+
+
+class PredictionCache:
+    """Two-tier LRU/TTL cache of class probabilities keyed by (model version, feature tuple).
+
+    Tier 1 is a per-process OrderedDict bounded by an estimated byte budget. The
+    optional tier 2 is a SQLite file shared by every worker on the host; expired and
+    over-capacity rows are pruned every PRUNE_EVERY rows written.
+    """
+
+    PRUNE_EVERY = 1024
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL_SECONDS, shared_path=None,
+                 shared_rows=CACHE_SHARED_ROWS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.shared_path = shared_path
+        self.shared_rows = shared_rows
+        self._shared_writes = 0
+        self._entries = OrderedDict()
+        self._entry_bytes = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {'hits': 0, 'shared_hits': 0, 'misses': 0, 'uncacheable': 0, 'evictions': 0, 'invalidations': 0}
+        if shared_path:
+            conn = self._shared()
+            conn.execute("CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, version TEXT, "
+                         "proba BLOB, expires REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_expires ON predictions (expires)")
+            conn.commit()
+
+    # --- tier 2 (shared SQLite) ---
+    def _shared(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.shared_path, timeout=1, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @staticmethod
+    def _shared_key(version, key):
+        return version + ':' + ','.join(map(str, key))
+
+    def _shared_get(self, version, key):
+        try:
+            row = self._shared().execute("SELECT proba, expires FROM predictions WHERE key = ?",
+                                         (self._shared_key(version, key),)).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or row[1] < time.time():
+            return None
+        return np.frombuffer(row[0], dtype=np.float64)
+
+    def _shared_put_many(self, version, items):
+        expires = time.time() + self.ttl
+        try:
+            conn = self._shared()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                                 [(self._shared_key(version, k), version, p.tobytes(), expires) for k, p in items])
+        except sqlite3.Error:
+            return  # the shared tier is best-effort; tier 1 still has the entry
+        with self._lock:
+            before = self._shared_writes
+            self._shared_writes += len(items)
+            due = before // self.PRUNE_EVERY != self._shared_writes // self.PRUNE_EVERY
+        if due:
+            self.prune_shared()
+
+    def prune_shared(self):
+        """Delete expired shared rows, then the soonest-expiring ones beyond shared_rows."""
+        try:
+            conn = self._shared()
+            with conn:
+                conn.execute("DELETE FROM predictions WHERE expires < ?", (time.time(),))
+                conn.execute("DELETE FROM predictions WHERE rowid IN (SELECT rowid FROM predictions "
+                             "ORDER BY expires DESC LIMIT -1 OFFSET ?)", (self.shared_rows,))
+        except sqlite3.Error:
+            pass
+
+    # --- tier 1 (in-process LRU) ---
+    def _budget_entries(self, key, proba):
+        if self._entry_bytes is None:
+            # Rough per-entry footprint: key tuple + its ints, value tuple, array, LRU links
+            self._entry_bytes = (sys.getsizeof(key) + sum(sys.getsizeof(v) for v in key)
+                                 + sys.getsizeof(proba) + proba.nbytes + 200)
+        return max(1, self.max_bytes // self._entry_bytes)
+
+    def get_many(self, version, keys):
+        """Cached probability rows for each key (None on miss or uncacheable key)."""
+        now = time.monotonic()
+        out = [None] * len(keys)
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key is None:
+                    self.stats['uncacheable'] += 1
+                    continue
+                entry = self._entries.get((version, key))
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end((version, key))
+                    self.stats['hits'] += 1
+                    out[i] = entry[1]
+        if self.shared_path:
+            for i, key in enumerate(keys):
+                if key is not None and out[i] is None:
+                    proba = self._shared_get(version, key)
+                    if proba is not None:
+                        self.stats['shared_hits'] += 1
+                        self._put_local(version, key, proba)
+                        out[i] = proba
+        with self._lock:
+            self.stats['misses'] += sum(1 for k, p in zip(keys, out) if k is not None and p is None)
+        return out
+
+    def _put_local(self, version, key, proba):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[(version, key)] = (expires, proba)
+            self._entries.move_to_end((version, key))
+            limit = self._budget_entries(key, proba)
+            while len(self._entries) > limit:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def put_many(self, version, keys, proba):
+        items = [(k, np.array(p, dtype=np.float64)) for k, p in zip(keys, proba) if k is not None]
+        for key, p in items:
+            self._put_local(version, key, p)
+        if self.shared_path and items:
+            self._shared_put_many(version, items)
+
+    def invalidate(self, keep_version=None):
+        """Drop every entry (and shared rows from other model versions and their '<version>/...' namespaces)."""
+        with self._lock:
+            self._entries.clear()
+            self.stats['invalidations'] += 1
+        if self.shared_path:
+            keep_version = keep_version or ''
+            try:
+                conn = self._shared()
+                with conn:
+                    conn.execute("DELETE FROM predictions WHERE (version != ? AND substr(version, 1, ?) != ?) "
+                                 "OR expires < ?",
+                                 (keep_version, len(keep_version) + 1, keep_version + '/', time.time()))
+            except sqlite3.Error:
+                pass
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats, entries=len(self._entries), max_bytes=self.max_bytes)
+        lookups = stats['hits'] + stats['shared_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['shared_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+def create_cache(mode=CACHE_MODE):
+    if mode == 'off':
+        return None
+    return PredictionCache(shared_path=SHARED_CACHE_PATH if mode == 'sqlite' else None)
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler, LabelEncoder
+
+from encoders import CategoryEncoder
+from hashing import file_digest
+
+DATASET_PATH = 'sleep_disorder_dataset.csv'
+CACHE_DIR = '.cache'
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+CACHE_VERSION = 1
+
+TARGET_COLUMN = 'Disorder'
+
+
+class Splits:
+    """Encoded train/test arrays plus the category labels used to encode them."""
+
+    def __init__(self, X_train, X_test, y_train, y_test, feature_names, gender_classes, occupation_classes, dataset_hash):
+        self.X_train = X_train
+        self.X_test = X_test
+        self.y_train = y_train
+        self.y_test = y_test
+        self.feature_names = list(feature_names)
+        self.gender_classes = gender_classes
+        self.occupation_classes = occupation_classes
+        self.dataset_hash = dataset_hash
+
+    def scaled(self):
+        """Fit a StandardScaler on the training split; returns (scaler, X_train_scaled, X_test_scaled)."""
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(self.X_train)
+        return scaler, X_train_scaled, scaler.transform(self.X_test)
+
+    def encoders(self, unknown='error'):
+        """CategoryEncoders for Gender/Occupation; most-frequent categories come from the training split."""
+        encoders = []
+        for name, classes, col in (('gender', self.gender_classes, self.feature_names.index('Gender')),
+                                   ('occupation', self.occupation_classes, self.feature_names.index('Occupation'))):
+            counts = np.bincount(self.X_train[:, col].astype(np.int64), minlength=len(classes))
+            encoders.append(CategoryEncoder(name, classes, unknown, most_frequent=classes[counts.argmax()]))
+        return encoders
+
+    def label_encoders(self):
+        """LabelEncoders equivalent to the ones fitted on the raw columns (for the .pkl artifacts)."""
+        encoders = []
+        for classes in (self.gender_classes, self.occupation_classes):
+            le = LabelEncoder()
+            le.classes_ = np.asarray(classes, dtype=object)
+            encoders.append(le)
+        return encoders
+
+
+def _encode(df):
+    df = df.copy()
+    gender, df['Gender'] = CategoryEncoder.fit('gender', df['Gender'])
+    occupation, df['Occupation'] = CategoryEncoder.fit('occupation', df['Occupation'])
+    return df, gender.classes_, occupation.classes_
+
+
+def splits_cache_path(dataset_hash, test_size=TEST_SIZE, random_state=RANDOM_STATE, cache_dir=CACHE_DIR):
+    key = hashlib.sha256(f"{dataset_hash}|{test_size}|{random_state}|{CACHE_VERSION}".encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f'splits-{key}.npz')
+
+
+def load_splits(path=DATASET_PATH, test_size=TEST_SIZE, random_state=RANDOM_STATE, cache_dir=CACHE_DIR, use_cache=True):
+    """Parsed, encoded and split dataset, cached as .npz keyed by dataset hash + split params."""
+    dataset_hash = file_digest(path)
+    cache_path = splits_cache_path(dataset_hash, test_size, random_state, cache_dir)
+
+    if use_cache and os.path.exists(cache_path):
+        with np.load(cache_path) as f:
+            return Splits(f['X_train'], f['X_test'], f['y_train'].astype(object), f['y_test'].astype(object),
+                          f['feature_names'], f['gender_classes'].astype(object),
+                          f['occupation_classes'].astype(object), dataset_hash)
+
+    df, gender_classes, occupation_classes = _encode(pd.read_csv(path))
+    X = df.drop(TARGET_COLUMN, axis=1)
+    y = df[TARGET_COLUMN]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+    splits = Splits(X_train.to_numpy(dtype=np.float64), X_test.to_numpy(dtype=np.float64),
+                    y_train.to_numpy(dtype=object), y_test.to_numpy(dtype=object), X.columns,
+                    gender_classes.astype(object), occupation_classes.astype(object), dataset_hash)
+
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + f'.{os.getpid()}.tmp.npz'
+        np.savez(tmp_path, X_train=splits.X_train, X_test=splits.X_test,
+                 y_train=splits.y_train.astype(str), y_test=splits.y_test.astype(str),
+                 feature_names=np.array(splits.feature_names), gender_classes=gender_classes.astype(str),
+                 occupation_classes=occupation_classes.astype(str))
+        os.replace(tmp_path, cache_path)
+    return splits
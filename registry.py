@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+
+from model_bundle import load_bundle, current_version, set_current, BundleError, BUNDLE_ROOT
+
+POLL_SECONDS = float(os.environ.get('SLEEP_MODEL_POLL_SECONDS', 5))
+
+
+class ModelRegistry:
+    """Holds the active model bundle and swaps in new versions without a restart.
+
+    Requests take a reference via get() and keep using it until they finish, so a
+    swap never changes the model under an in-flight request. New versions are
+    loaded and warmed in the background before the reference is replaced.
+    """
+
+    def __init__(self, root=BUNDLE_ROOT, poll_seconds=POLL_SECONDS):
+        self.root = root
+        self.poll_seconds = poll_seconds
+        self._bundle = None
+        self._lock = threading.Lock()
+        self._watcher_pid = None
+        self._listeners = []
+        self.reloads = 0
+        self.last_error = None
+
+    def get(self):
+        bundle = self._bundle
+        if bundle is None:
+            with self._lock:
+                if self._bundle is None:
+                    self._bundle = self._load(None)
+                bundle = self._bundle
+        if self.poll_seconds > 0 and self._watcher_pid != os.getpid():
+            self._start_watcher()
+        return bundle
+
+    @property
+    def version(self):
+        return self._bundle.version if self._bundle is not None else None
+
+    def on_swap(self, callback):
+        """Register callback(old_bundle, new_bundle), called after every swap."""
+        self._listeners.append(callback)
+
+    def _load(self, version):
+        path = os.path.join(self.root, version) if version else None
+        bundle = load_bundle(path, root=self.root)
+        # Warm-up: touch every mapped page and run the forward pass once before serving
+        bundle.model.predict(bundle.scaler_mean[None, :])
+        return bundle
+
+    def reload(self, version=None):
+        """Swap in whatever CURRENT points to, or pin `version` first by repointing CURRENT
+        (so every worker's watcher follows, e.g. for a rollback)."""
+        new = None
+        if version:
+            if version.startswith('.') or version not in os.listdir(self.root):
+                raise BundleError(f"Unknown model version '{version}'")
+            new = self._load(version)  # validate before repointing
+            set_current(version, self.root)
+        version = current_version(self.root)
+        if self._bundle is not None and self._bundle.version == version:
+            return version
+        new = new if new is not None and new.version == version else self._load(version)
+        with self._lock:
+            old, self._bundle = self._bundle, new
+            self.reloads += 1
+        for callback in self._listeners:
+            callback(old, new)
+        print(f"🔄 Model swapped: {old.version if old else None} -> {new.version}")
+        return new.version
+
+    def _start_watcher(self):
+        with self._lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+        threading.Thread(target=self._watch, name='model-watcher', daemon=True).start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                if current_version(self.root) != self.version:
+                    self.reload()
+                self.last_error = None
+            except Exception as e:
+                # Keep serving the old version; a half-written or bad bundle is retried next poll
+                self.last_error = str(e)
+
+
+registry = ModelRegistry()
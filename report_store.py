@@ -0,0 +1,197 @@
+import datetime
+import fcntl
+import mmap
+import os
+import secrets
+import sqlite3
+import struct
+import threading
+import time
+
+from reports import OUTCOME_DETAILS, STAMP_FIELDS, CAUSE_FIELDS, build_details
+
+# Server-side store for the data behind /download_report. The session cookie only
+# carries an opaque report id; the store keeps one fixed-size record per report:
+# outcome code, timestamp, the two stats and the cause lines, each at the width the
+# PDF stamps it (reports.STAMP_FIELDS). The outcome text is rebuilt from the class.
+#
+# SLEEP_REPORT_STORE picks the backend, both shared by every worker on the host:
+#   sqlite  a small WAL-mode SQLite file (default)
+#   shm     a ring of fixed-size slots in a memory-mapped file under /dev/shm
+
+STORE_MODE = os.environ.get('SLEEP_REPORT_STORE', 'sqlite')
+STORE_CAPACITY = int(os.environ.get('SLEEP_REPORT_STORE_CAPACITY', 10000))
+STORE_TTL_SECONDS = float(os.environ.get('SLEEP_REPORT_TTL', 24 * 3600))
+SQLITE_PATH = os.environ.get('SLEEP_REPORT_STORE_PATH', 'report_store.db')
+SHM_PATH = '/dev/shm/sleep_report_store' if os.path.isdir('/dev/shm') else 'report_store.shm'
+
+OUTCOMES = list(OUTCOME_DETAILS)
+CAUSE_WIDTH = STAMP_FIELDS['cause_0'] - 2  # stamped as '- <cause>'
+# outcome, timestamp as YYYYMMDDHHMMSS, night_screen, stress, causes
+RECORD = struct.Struct(f"<Bq{STAMP_FIELDS['night_screen']}s{STAMP_FIELDS['stress']}s"
+                       + f'{CAUSE_WIDTH}s' * len(CAUSE_FIELDS))
+
+
+def _text(value, width):
+    return str(value).encode('utf-8', 'ignore')[:width]
+
+
+def pack(report_data):
+    causes = list(report_data['details'].get('causes', ()))[:len(CAUSE_FIELDS)]
+    causes += [''] * (len(CAUSE_FIELDS) - len(causes))
+    stamp = int(report_data['timestamp'].replace('-', '').replace(' ', '').replace(':', ''))
+    return RECORD.pack(OUTCOMES.index(report_data['prediction']), stamp,
+                       _text(report_data['stats']['night_screen'], STAMP_FIELDS['night_screen']),
+                       _text(report_data['stats']['stress'], STAMP_FIELDS['stress']),
+                       *(_text(c, CAUSE_WIDTH) for c in causes))
+
+
+def unpack(record):
+    """The report_data dict that service.render_report expects."""
+    outcome, stamp, night_screen, stress, *causes = RECORD.unpack(record)
+    prediction = OUTCOMES[outcome]
+    causes = [c.rstrip(b'\0').decode('utf-8', 'ignore') for c in causes]
+    return {
+        'prediction': prediction,
+        'timestamp': datetime.datetime.strptime(str(stamp), '%Y%m%d%H%M%S').strftime('%Y-%m-%d %H:%M:%S'),
+        'details': build_details(prediction, [c for c in causes if c]),
+        'stats': {'night_screen': night_screen.rstrip(b'\0').decode('utf-8', 'ignore'),
+                  'stress': stress.rstrip(b'\0').decode('utf-8', 'ignore')},
+    }
+
+
+class SQLiteReportStore:
+    """Reports in a shared SQLite file; expired and over-capacity rows are pruned every PRUNE_EVERY puts."""
+
+    PRUNE_EVERY = 256
+
+    def __init__(self, path=SQLITE_PATH, capacity=STORE_CAPACITY, ttl=STORE_TTL_SECONDS):
+        self.path = path
+        self.capacity = capacity
+        self.ttl = ttl
+        self._local = threading.local()
+        self._puts = 0
+        conn = self._conn()
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS reports (id TEXT PRIMARY KEY, expires REAL, record BLOB) "
+                         "WITHOUT ROWID")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_expires ON reports (expires)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # reports are re-creatable: losing some on a crash is fine
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def put(self, report_data):
+        report_id = secrets.token_urlsafe(16)
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT INTO reports VALUES (?, ?, ?)", (report_id, time.time() + self.ttl, pack(report_data)))
+        self._puts += 1
+        if self._puts % self.PRUNE_EVERY == 0:
+            self.prune()
+        return report_id
+
+    def get(self, report_id):
+        row = self._conn().execute("SELECT expires, record FROM reports WHERE id = ?", (report_id,)).fetchone()
+        if row is None or row[0] < time.time():
+            return None
+        return unpack(row[1])
+
+    def prune(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM reports WHERE expires < ?", (time.time(),))
+            conn.execute("DELETE FROM reports WHERE id IN (SELECT id FROM reports ORDER BY expires DESC "
+                         "LIMIT -1 OFFSET ?)", (self.capacity,))
+
+
+class SharedMemoryReportStore:
+    """Reports in a fixed ring of slots in a memory-mapped file; the oldest slot is overwritten when full.
+
+    A report id is '<slot>.<token>'; a slot that has since been reused no longer
+    matches the token, so ids of evicted reports simply stop resolving.
+    """
+
+    HEADER = struct.Struct('<Q')          # next slot counter
+    SLOT = struct.Struct('<16sd')         # token, expires
+
+    def __init__(self, path=SHM_PATH, capacity=STORE_CAPACITY, ttl=STORE_TTL_SECONDS):
+        self.path = path
+        self.capacity = capacity
+        self.ttl = ttl
+        self.slot_size = self.SLOT.size + RECORD.size
+        self.size = self.HEADER.size + capacity * self.slot_size
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _map(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                        if os.fstat(fd).st_size != self.size:
+                            os.ftruncate(fd, 0)  # new file or a different capacity: start empty
+                            os.ftruncate(fd, self.size)
+                        fcntl.flock(fd, fcntl.LOCK_UN)
+                        self._mm = mmap.mmap(fd, self.size)
+                    finally:
+                        os.close(fd)
+                    self._lock_fd = os.open(self.path, os.O_RDWR)
+                    self._pid = os.getpid()
+        return self._mm
+
+    def _offset(self, slot):
+        return self.HEADER.size + slot * self.slot_size
+
+    def put(self, report_data):
+        mm = self._map()
+        token = secrets.token_bytes(16)
+        record = pack(report_data)
+        with self._lock:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                counter, = self.HEADER.unpack_from(mm, 0)
+                self.HEADER.pack_into(mm, 0, counter + 1)
+                slot = counter % self.capacity
+                offset = self._offset(slot)
+                self.SLOT.pack_into(mm, offset, token, time.time() + self.ttl)
+                mm[offset + self.SLOT.size:offset + self.slot_size] = record
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        return f'{slot}.{token.hex()}'
+
+    def get(self, report_id):
+        try:
+            slot, token = report_id.split('.')
+            slot, token = int(slot), bytes.fromhex(token)
+        except (AttributeError, ValueError):
+            return None
+        if not 0 <= slot < self.capacity:
+            return None
+        mm = self._map()
+        offset = self._offset(slot)
+        with self._lock:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_SH)
+            try:
+                stored, expires = self.SLOT.unpack_from(mm, offset)
+                record = mm[offset + self.SLOT.size:offset + self.slot_size]
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        if stored != token or expires < time.time():
+            return None
+        return unpack(record)
+
+
+def create_store(mode=STORE_MODE):
+    if mode == 'shm':
+        return SharedMemoryReportStore()
+    if mode != 'sqlite':
+        raise ValueError(f"SLEEP_REPORT_STORE must be 'sqlite' or 'shm', got {mode!r}")
+    return SQLiteReportStore()
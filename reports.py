@@ -0,0 +1,257 @@
+import hashlib
+import os
+import re
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from fpdf import FPDF
+
+import metrics
+from background import ordered_map
+
+# Static per-outcome text shown on the result page and in the PDF
+OUTCOME_DETAILS = {
+    'Healthy': {
+        'is_bad': False,  # Flag to tell HTML this is good news
+        'title': 'Healthy 🎉',
+        'desc': 'Your sleep patterns and screen time habits are well-balanced. You are maintaining a healthy lifestyle.',
+        'action': 'Keep up the consistent schedule and continue prioritizing your rest!'
+    },
+    'Insomnia': {
+        'is_bad': True,  # Flag to tell HTML to show medical info
+        'title': 'Insomnia',
+        'desc': 'A sleep disorder where you have trouble falling and/or staying asleep.',
+        'cause': 'High screen time (Blue light), Stress, irregular sleep schedule.',
+        'remedy': 'Follow the 20-20-20 rule, use Blue Light filters, avoid caffeine.'
+    },
+    'Sleep Apnea': {
+        'is_bad': True,
+        'title': 'Sleep Apnea',
+        'desc': 'A serious disorder where breathing repeatedly stops and starts.',
+        'cause': 'High BMI (Obesity), Snoring, airway anatomy, genetics.',
+        'remedy': 'Weight management, side-sleeping, or consulting a doctor.'
+    },
+}
+
+# Per-user fields stamped into a pre-rendered template: name -> fixed width in characters.
+# Templates are written uncompressed, so a placeholder of the same width can be
+# overwritten in place without touching the PDF's xref byte offsets.
+STAMP_FIELDS = {'timestamp': 19, 'night_screen': 6, 'stress': 4, 'cause_0': 48, 'cause_1': 48, 'cause_2': 48}
+CAUSE_FIELDS = ['cause_0', 'cause_1', 'cause_2']  # one line each, only in Insomnia / Sleep Apnea reports
+_SAFE_CHARS = re.compile(r'[^0-9A-Za-z .:\-/]')
+
+REPORT_CACHE_SIZE = 512
+
+
+def build_details(prediction, causes=None):
+    """Outcome text for the result page/PDF; `causes` (from attribution.top_causes) replace the generic cause text."""
+    details = dict(OUTCOME_DETAILS[prediction])
+    if details['is_bad'] and causes:
+        details['causes'] = list(causes)
+    return details
+
+
+def _stamp_fields(prediction):
+    return [name for name in STAMP_FIELDS if OUTCOME_DETAILS[prediction]['is_bad'] or name not in CAUSE_FIELDS]
+
+
+def _placeholder(name):
+    # e.g. '~1~~~~' for the second field: unique per field, needs no escaping in a PDF string
+    return f'~{list(STAMP_FIELDS).index(name)}'.ljust(STAMP_FIELDS[name], '~')
+
+
+def _render_pdf(prediction, timestamp, night_screen, stress, causes=(), compress=True, cause_slots=None):
+    details = build_details(prediction, causes)
+
+    pdf = FPDF()
+    pdf.set_compression(compress)
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(200, 10, txt="SLEEP HEALTH ANALYSIS REPORT", ln=True, align='C')
+    pdf.ln(10)
+
+    pdf.set_font("Arial", size=12)
+    pdf.cell(200, 10, txt=f"Date: {timestamp}", ln=True)
+    pdf.cell(200, 10, txt=f"Night Screen Time (hrs): {night_screen}   Stress Level: {stress}", ln=True)
+
+    pdf.set_font("Arial", 'B', 14)
+    if prediction == 'Healthy':
+        pdf.set_text_color(0, 128, 0)
+    else:
+        pdf.set_text_color(255, 0, 0)
+
+    pdf.cell(200, 10, txt=f"Prediction Result: {prediction}", ln=True)
+    pdf.set_text_color(0, 0, 0)
+    pdf.ln(5)
+
+    # DYNAMIC CONTENT BASED ON HEALTH
+    pdf.set_font("Arial", size=12)
+
+    if details['is_bad']:
+        # Show Medical Info
+        pdf.multi_cell(0, 10, txt=f"Definition: {details['desc']}")
+        pdf.ln(2)
+        if cause_slots:
+            # Template: fixed-width lines stamped per user
+            pdf.cell(0, 10, txt="Potential Causes (from your answers):", ln=True)
+            for slot in cause_slots:
+                pdf.cell(0, 8, txt=f"  {slot}", ln=True)
+        elif details.get('causes'):
+            pdf.cell(0, 10, txt="Potential Causes (from your answers):", ln=True)
+            for cause in details['causes']:
+                pdf.cell(0, 8, txt=f"  - {cause}", ln=True)
+        else:
+            pdf.multi_cell(0, 10, txt=f"Potential Causes: {details['cause']}")
+        pdf.ln(2)
+        pdf.multi_cell(0, 10, txt=f"Remedies: {details['remedy']}")
+    else:
+        # Show Happy Message
+        pdf.multi_cell(0, 10, txt=f"{details['desc']}")
+        pdf.ln(5)
+        pdf.set_font("Arial", 'I', 12)
+        pdf.multi_cell(0, 10, txt=f"Advice: {details['action']}")
+
+    pdf.ln(10)
+    pdf.set_font("Arial", 'B', 10)
+    pdf.cell(0, 10, txt="DISCLAIMER: This is an AI prediction and not a medical diagnosis. Please consult a doctor.", ln=True, align='C')
+    return pdf.output(dest='S').encode('latin-1')
+
+
+class ReportRenderer:
+    """Renders report PDFs from one pre-built template per outcome plus an LRU cache of finished files."""
+
+    def __init__(self, cache_size=REPORT_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._templates = {}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _template(self, prediction):
+        template = self._templates.get(prediction)
+        if template is None:
+            fields = {name: _placeholder(name) for name in _stamp_fields(prediction)}
+            slots = [fields.pop(name) for name in CAUSE_FIELDS if name in fields]
+            pdf = _render_pdf(prediction, compress=False, cause_slots=slots, **fields)
+            fields.update(zip(CAUSE_FIELDS, slots))
+            for name, marker in fields.items():
+                if pdf.count(marker.encode('latin-1')) != 1:
+                    raise RuntimeError(f"Placeholder for '{name}' not found exactly once in the {prediction} template")
+            template = (pdf, {name: marker.encode('latin-1') for name, marker in fields.items()})
+            self._templates[prediction] = template
+        return template
+
+    def stamp(self, prediction, **values):
+        pdf, markers = self._template(prediction)
+        for name, marker in markers.items():
+            text = _SAFE_CHARS.sub('', str(values.get(name, '')))
+            pdf = pdf.replace(marker, text.ljust(STAMP_FIELDS[name])[:STAMP_FIELDS[name]].encode('latin-1'))
+        return pdf
+
+    @staticmethod
+    def cache_key(prediction, **values):
+        raw = '|'.join([prediction] + [f"{k}={values.get(k, '')}" for k in STAMP_FIELDS])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def render(self, prediction, timestamp, night_screen, stress, causes=()):
+        start = time.perf_counter()
+        values = {'timestamp': timestamp, 'night_screen': night_screen, 'stress': stress}
+        values.update(zip(CAUSE_FIELDS, (f'- {c}' for c in causes)))
+        key = self.cache_key(prediction, **values)
+        with self._lock:
+            pdf = self._cache.get(key)
+            if pdf is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                metrics.report_render_seconds.observe(time.perf_counter() - start, cache='hit')
+                return pdf
+            self.misses += 1
+
+        if OUTCOME_DETAILS[prediction]['is_bad'] and not causes:
+            # No attribution (e.g. rows logged before feature vectors were stored): generic cause text
+            pdf = _render_pdf(prediction, timestamp, night_screen, stress)
+        else:
+            pdf = self.stamp(prediction, **values)
+        with self._lock:
+            self._cache[key] = pdf
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        metrics.report_render_seconds.observe(time.perf_counter() - start, cache='miss')
+        return pdf
+
+
+renderer = ReportRenderer()
+
+
+def _render_job(reports):
+    return [(report['name'], renderer.render(report['prediction'], report['timestamp'], report['night_screen'],
+                                             report['stress'], report.get('causes', ())))
+            for report in reports]
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_reports_zip(reports, fileobj, workers=None, chunksize=64):
+    """Render many reports across a process pool and stream them into a zip archive.
+
+    reports is an iterable of dicts with name, prediction, timestamp, night_screen, stress
+    and optionally causes. Reports go to workers in batches of chunksize, at most 2 batches
+    per worker in flight, so memory stays bounded for any number of reports.
+    """
+    workers = workers or os.cpu_count() or 1
+    with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for rendered in ordered_map(pool, _render_job, _batches(reports, chunksize), 2 * workers):
+                for name, pdf in rendered:
+                    zf.writestr(name, pdf)
+    return fileobj
+
+
+if __name__ == "__main__":
+    import argparse
+    import sqlite3
+    import numpy as np
+    from attribution import explain, top_causes
+    from db import DB_PATH, FEATURE_DB_COLUMNS
+    from model_bundle import load_bundle
+
+    parser = argparse.ArgumentParser(description="Bulk-render PDF reports for logged predictions into a zip")
+    parser.add_argument('--out', default='reports.zip')
+    parser.add_argument('--limit', type=int, default=1000, help="most recent N predictions")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    columns = ', '.join(c for c, _ in FEATURE_DB_COLUMNS)
+    rows = conn.execute(f"SELECT id, prediction, timestamp, night_screen, stress, {columns} FROM users "
+                        "WHERE night_screen IS NOT NULL ORDER BY id DESC LIMIT ?", (args.limit,)).fetchall()
+    conn.close()
+
+    # Causes from the stored feature vectors: one batched occlusion pass over every complete row
+    bundle = load_bundle()
+    complete = [i for i, row in enumerate(rows) if None not in row[5:]]
+    causes = {}
+    if complete:
+        X = np.array([rows[i][5:] for i in complete], dtype=np.float64)
+        _, attributions = explain(X, bundle)
+        causes = {i: top_causes(x, a, bundle) for i, x, a in zip(complete, X, attributions)}
+
+    reports = [{'name': f'Sleep_Report_{row[0]}.pdf', 'prediction': row[1], 'timestamp': row[2],
+                'night_screen': row[3], 'stress': row[4], 'causes': causes.get(i, [])} for i, row in enumerate(rows)]
+    start = time.perf_counter()
+    with open(args.out, 'wb') as f:
+        write_reports_zip(reports, f, workers=args.workers)
+    print(f"✅ {len(reports)} reports written to {args.out} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,98 @@
+import argparse
+import types
+import warnings
+import numpy as np
+from sklearn.neural_network import MLPClassifier
+from sklearn.metrics import accuracy_score
+
+from db import DB_PATH, init_db, iter_labelled, last_label_seq
+from model_bundle import load_bundle, write_bundle, BUNDLE_ROOT
+from preprocessing import load_splits
+
+BATCH_SIZE = 256
+EPOCHS = 5
+LEARNING_RATE = 1e-4
+
+
+def warm_start_model(bundle, learning_rate=LEARNING_RATE):
+    """Rebuild an MLPClassifier from a bundle's raw layer arrays, ready for partial_fit."""
+    n_layers = bundle.manifest['n_layers']
+    mlp = MLPClassifier(hidden_layer_sizes=tuple(bundle.manifest['hidden_layer_sizes']),
+                        learning_rate_init=learning_rate, random_state=42)
+    # One throwaway partial_fit call sets up the label binarizer, shapes and output activation
+    n_classes = len(bundle.classes)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        mlp.partial_fit(np.zeros((n_classes, len(bundle.scaler_mean))), bundle.classes, classes=bundle.classes)
+    mlp.coefs_ = [np.array(bundle.arrays[f'coef_{i}']) for i in range(n_layers)]
+    mlp.intercepts_ = [np.array(bundle.arrays[f'intercept_{i}']) for i in range(n_layers)]
+    del mlp._optimizer  # fresh Adam state for the loaded weights
+    return mlp
+
+
+def scale(bundle, X):
+    return (np.asarray(X, dtype=np.float64) - bundle.scaler_mean) / bundle.scaler_scale
+
+
+def retrain(db_path=DB_PATH, root=BUNDLE_ROOT, epochs=EPOCHS, batch_size=BATCH_SIZE,
+            learning_rate=LEARNING_RATE, tolerance=0.0):
+    """Continue training the current bundle on rows labelled since its last retrain.
+
+    The new bundle only becomes CURRENT if held-out accuracy does not drop by more than tolerance.
+    Returns a dict describing what happened.
+    """
+    bundle = load_bundle(root=root)
+    # label_seq of the last label the bundle was trained on; the snapshot bound keeps every
+    # epoch on the same rows while new labels keep arriving
+    watermark = bundle.manifest.get('retrain_watermark', 0)
+    until = last_label_seq(db_path)
+
+    splits = load_splits()
+    X_test = scale(bundle, splits.X_test)
+    baseline_acc = accuracy_score(splits.y_test, bundle.model.predict(splits.X_test))
+
+    mlp = warm_start_model(bundle, learning_rate)
+    last_seq, n_rows = watermark, 0
+    for epoch in range(epochs):
+        # Re-stream every epoch so memory stays at one mini-batch regardless of backlog size
+        for seqs, X, y in iter_labelled(watermark, batch_size, db_path, until):
+            mlp.partial_fit(scale(bundle, X), np.asarray(y, dtype=object))
+            if epoch == 0:
+                n_rows += len(seqs)
+                last_seq = seqs[-1]
+        if n_rows == 0:
+            return {'status': 'no-new-data', 'version': bundle.version, 'accuracy': baseline_acc}
+
+    new_acc = accuracy_score(splits.y_test, mlp.predict(X_test))
+    result = {'rows': n_rows, 'baseline_accuracy': baseline_acc, 'accuracy': new_acc}
+    if new_acc + tolerance < baseline_acc:
+        result.update(status='rejected', version=bundle.version)
+        return result
+
+    scaler = types.SimpleNamespace(mean_=np.array(bundle.scaler_mean), scale_=np.array(bundle.scaler_scale))
+    path = write_bundle(mlp, scaler, bundle.gender_encoder, bundle.occupation_encoder, root=root,
+                        extra={'parent_version': bundle.version, 'retrain_watermark': last_seq,
+                               'drift_reference': bundle.manifest.get('drift_reference')},
+                        variants=bundle.manifest.get('variants', ()))
+    result.update(status='swapped', version=load_bundle(path, verify=False).version)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally retrain the served model from labelled predictions")
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--lr', type=float, default=LEARNING_RATE)
+    parser.add_argument('--tolerance', type=float, default=0.0, help="allowed accuracy drop (fraction)")
+    args = parser.parse_args()
+
+    init_db()
+    result = retrain(epochs=args.epochs, batch_size=args.batch_size, learning_rate=args.lr, tolerance=args.tolerance)
+    if result['status'] == 'no-new-data':
+        print("📭 No new labelled rows since the last retrain.")
+    elif result['status'] == 'rejected':
+        print(f"❌ Kept {result['version']}: accuracy {result['accuracy'] * 100:.2f}% "
+              f"< baseline {result['baseline_accuracy'] * 100:.2f}% after {result['rows']} new rows")
+    else:
+        print(f"✅ Swapped in {result['version']}: accuracy {result['accuracy'] * 100:.2f}% "
+              f"(was {result['baseline_accuracy'] * 100:.2f}%) from {result['rows']} new rows")
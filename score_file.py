@@ -0,0 +1,249 @@
+import argparse
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from background import ordered_map
+from drift import create_monitor
+from encoders import UNKNOWN_POLICIES
+from inference import MAX_ABS_VALUE
+from model_bundle import load_bundle, FEATURE_COLUMNS
+
+# Offline scoring of CSV/Parquet files shaped like sleep_disorder_dataset.csv, in
+# fixed-size chunks so memory stays constant regardless of file size:
+#   python score_file.py population.csv predictions.csv --workers 8
+# Workers read their own byte range / row group and map the bundle's arrays, so
+# only the (small) output chunks travel between processes. CSV inputs are cut
+# into --chunk-rows pieces; Parquet inputs are scored one row group at a time.
+# Rows with an empty, non-numeric or unknown-category cell get a blank prediction and
+# a message in the Error column instead of failing the run.
+# Each chunk's inputs also go through a drift monitor; workers send back only its
+# mergeable statistics, and the merged scores vs the training profile are reported.
+
+CHUNK_ROWS = 200_000
+TARGET_COLUMN = 'Disorder'
+_HEAD_BYTES = 1 << 16
+
+_bundle = None
+
+
+def _init_worker(bundle_path, unknown_policy=None):
+    global _bundle
+    _bundle = load_bundle(bundle_path) if unknown_policy is None else load_bundle(bundle_path,
+                                                                                  unknown_policy=unknown_policy)
+
+
+def proba_columns(classes):
+    return [f"proba_{re.sub(r'[^0-9a-z]+', '_', str(c).lower())}" for c in classes]
+
+
+def encode_frame(df, bundle):
+    """Feature matrix for a chunk plus per-row error messages (None for valid rows)."""
+    X = np.empty((len(df), len(FEATURE_COLUMNS)), dtype=np.float64)
+    errors = np.full(len(df), None, dtype=object)
+    # Right to left, so a row's message names its first bad column
+    for j, col in reversed(list(enumerate(FEATURE_COLUMNS))):
+        raw = df[col].to_numpy()
+        if col in ('Gender', 'Occupation'):
+            encoder = bundle.gender_encoder if col == 'Gender' else bundle.occupation_encoder
+            X[:, j] = codes = encoder.encode(raw, strict=False)
+            bad = codes < 0
+            errors[bad] = [f"unknown {encoder.name} {str(v)!r}" for v in raw[bad]]
+        else:
+            X[:, j] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+            bad = ~(np.abs(X[:, j]) <= MAX_ABS_VALUE)  # empty, non-numeric, NaN/inf or absurd
+            errors[bad] = [f"invalid value for '{col}': {v!r}" for v in raw[bad].tolist()]
+    return X, errors
+
+
+def score_frame(df, bundle, X=None, errors=None):
+    """Encode + predict one chunk; returns (labels, proba, n_correct or None).
+
+    Rows with an error get an empty label and NaN probabilities.
+    """
+    if X is None:
+        X, errors = encode_frame(df, bundle)
+    valid = np.ones(len(X), dtype=bool) if errors is None else np.equal(errors, None)
+    proba = np.full((len(X), len(bundle.classes)), np.nan)
+    labels = np.full(len(X), '', dtype=object)
+    if valid.any():
+        proba[valid] = bundle.model.predict_proba(X[valid])
+        labels[valid] = bundle.classes[proba[valid].argmax(axis=1)]
+    correct = int((df[TARGET_COLUMN].to_numpy()[valid] == labels[valid]).sum()) if TARGET_COLUMN in df else None
+    return labels, proba, correct
+
+
+def drift_stats(bundle, X, labels):
+    """Mergeable drift statistics for one chunk (None with SLEEP_DRIFT_MONITOR=0)."""
+    monitor = create_monitor()
+    if monitor is None:
+        return None
+    monitor.reset(bundle)
+    monitor.update([(bundle.version, X, [str(l) for l in labels], time.time())])
+    return monitor.stats()
+
+
+def format_csv(labels, proba, errors):
+    # One format call per row is ~3x faster than DataFrame.to_csv(float_format=...)
+    line = '{},' + ','.join(['{:.6f}'] * proba.shape[1]) + ','
+    failed = ',' * (proba.shape[1] + 1) + '"{}"'
+    return ('\n'.join(line.format(label, *p) if error is None else failed.format(error.replace('"', '""'))
+                      for label, p, error in zip(labels, proba.tolist(), errors)) + '\n').encode('utf-8')
+
+
+def csv_ranges(path, chunk_rows):
+    """Split a CSV into newline-aligned byte ranges of ~chunk_rows rows each.
+
+    Returns (header, ranges). Assumes no quoted newlines, which holds for the
+    dataset's plain numeric/categorical columns.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        head = f.read(_HEAD_BYTES)
+        row_bytes = max(1, len(head) // max(1, head.count(b'\n')))
+        step = max(row_bytes * chunk_rows, 1)
+        ranges, start = [], len(header)
+        while start < size:
+            f.seek(min(start + step, size))
+            f.readline()  # advance to the end of the row the cut landed in
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return header.decode('utf-8').strip().split(','), ranges
+
+
+def _read_job(job):
+    kind, path, part, columns = job
+    usecols = FEATURE_COLUMNS + ([TARGET_COLUMN] if TARGET_COLUMN in columns else [])
+    if kind == 'csv':
+        start, end = part
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        return pd.read_csv(io.BytesIO(data), header=None, names=columns, usecols=usecols)
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(path).read_row_group(part, columns=usecols).to_pandas()
+
+
+def _score_job(job):
+    out_format = job[-1]
+    df = _read_job(job[:-1])
+    X, errors = encode_frame(df, _bundle)
+    labels, proba, correct = score_frame(df, _bundle, X, errors)
+    valid = np.equal(errors, None)
+    drift = drift_stats(_bundle, X[valid], labels[valid])
+    if out_format == 'csv':
+        payload = format_csv(labels, proba, errors)
+    else:
+        import pyarrow as pa
+        columns = {'Prediction': pa.array(np.where(valid, labels, None), type=pa.string())}
+        columns.update((name, pa.array(p, mask=~valid)) for name, p in zip(proba_columns(_bundle.classes), proba.T))
+        columns['Error'] = pa.array(errors, type=pa.string())
+        payload = pa.table(columns)
+    return len(df), int(valid.sum()), correct, payload, drift
+
+
+def _ordered_results(jobs, workers, bundle_path, unknown_policy=None):
+    # Keep at most 2 chunks per worker in flight so memory stays bounded
+    if workers <= 1:
+        _init_worker(bundle_path, unknown_policy)
+        for job in jobs:
+            yield _score_job(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(bundle_path, unknown_policy)) as pool:
+        yield from ordered_map(pool, _score_job, jobs, 2 * workers)
+
+
+def print_drift(scores):
+    if not scores:
+        return
+    print(f"📈 Drift vs {scores['reference']} profile ({scores['samples']:,} rows):")
+    for name, s in scores['features'].items():
+        if s['psi'] is not None:
+            print(f"   {name:<14} PSI {s['psi']:7.4f}  KS {s['ks']:6.4f}  mean shift {s['mean_shift_sd']:+.2f} sd")
+    for alert in scores['alerts']:
+        print(f"   ⚠️  {alert['feature']}: PSI {alert['psi']} ({alert['level']})")
+
+
+def score_file(src, dst, workers=1, chunk_rows=CHUNK_ROWS, bundle_path=None, drift_out=None, unknown_policy=None):
+    start = time.perf_counter()
+    bundle = load_bundle(bundle_path)
+    monitor = create_monitor()
+    if monitor is not None:
+        monitor.reset(bundle)
+    in_format = 'parquet' if src.endswith('.parquet') else 'csv'
+    out_format = 'parquet' if dst.endswith('.parquet') else 'csv'
+
+    if in_format == 'csv':
+        columns, parts = csv_ranges(src, chunk_rows)
+    else:
+        import pyarrow.parquet as pq
+        meta = pq.ParquetFile(src)
+        columns, parts = meta.schema_arrow.names, list(range(meta.num_row_groups))
+    missing = [c for c in FEATURE_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"{src} is missing columns: {', '.join(missing)}")
+    jobs = [(in_format, src, part, columns, out_format) for part in parts]
+
+    rows, scored, correct = 0, 0, 0
+    csv_out, parquet_out = None, None
+    try:
+        if out_format == 'csv':
+            csv_out = open(dst, 'wb')
+            csv_out.write((','.join(['Prediction'] + proba_columns(bundle.classes) + ['Error']) + '\n').encode('utf-8'))
+        for n, n_scored, n_correct, payload, drift in _ordered_results(jobs, workers, bundle.path, unknown_policy):
+            rows += n
+            scored += n_scored
+            correct += n_correct or 0
+            if drift is not None:
+                monitor.merge(drift)
+            if csv_out is not None:
+                csv_out.write(payload)
+            else:
+                import pyarrow.parquet as pq
+                if parquet_out is None:
+                    parquet_out = pq.ParquetWriter(dst, payload.schema)
+                parquet_out.write_table(payload)
+    finally:
+        if csv_out is not None:
+            csv_out.close()
+        if parquet_out is not None:
+            parquet_out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Scored {rows:,} rows with model {bundle.version} -> {dst} "
+          f"({elapsed:.2f}s, {rows / elapsed:,.0f} rows/s, {workers} worker(s))")
+    if scored < rows:
+        print(f"⚠️  {rows - scored:,} row(s) not scored (see the Error column)")
+    if TARGET_COLUMN in columns and scored:
+        print(f"📊 Accuracy vs '{TARGET_COLUMN}' column: {correct / scored * 100:.2f}%")
+    if monitor is not None and scored:
+        scores = monitor.compute_scores()
+        print_drift(scores)
+        if drift_out:
+            with open(drift_out, 'w', encoding='utf-8') as f:
+                json.dump(scores, f, indent=2)
+            print(f"✅ Drift report written to {drift_out}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream-score a CSV/Parquet file with the current model bundle")
+    parser.add_argument('input', help="CSV or .parquet file with the dataset's feature columns")
+    parser.add_argument('output', help="predictions file (.csv or .parquet), rows in input order")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="rows per CSV chunk")
+    parser.add_argument('--bundle', default=None, help="bundle directory (default: models/CURRENT)")
+    parser.add_argument('--drift-out', default=None, help="also write the drift scores to this JSON file")
+    parser.add_argument('--unknown-category', choices=UNKNOWN_POLICIES, default=None,
+                        help="policy for unseen Gender/Occupation values (default: SLEEP_UNKNOWN_CATEGORY)")
+    args = parser.parse_args()
+    score_file(args.input, args.output, args.workers, args.chunk_rows, args.bundle, args.drift_out,
+               args.unknown_category)
@@ -0,0 +1,165 @@
+import datetime
+import hmac
+import os
+import numpy as np
+
+import metrics
+from inference import encode_records, score_records, batch_results, OCCUP_COL
+from attribution import explain, top_causes
+from prediction_cache import create_cache
+from microbatch import create_batcher
+from drift import create_monitor
+from registry import registry
+from db import writer, log_predictions
+from reports import build_details, renderer
+from whatif import what_if
+from report_store import create_store
+
+# Route logic shared by the Flask app (app.py) and the ASGI app (asgi_app.py)
+
+# Required by /admin/* write endpoints; unset means they are disabled
+ADMIN_TOKEN = os.environ.get('SLEEP_ADMIN_TOKEN')
+
+# Memoized predictions (SLEEP_PREDICTION_CACHE=off|memory|sqlite), dropped on every model swap
+prediction_cache = create_cache()
+if prediction_cache is not None:
+    registry.on_swap(lambda old, new: prediction_cache.invalidate(new.version))
+
+# Concurrent single-record requests share one forward pass (SLEEP_MICROBATCH=1)
+batcher = create_batcher()
+
+# Report data behind /download_report, kept server-side; the session cookie holds only its id
+report_store = create_store()
+
+# Running input/prediction distributions vs the training profile (SLEEP_DRIFT_MONITOR=0 disables)
+drift_monitor = create_monitor()
+if drift_monitor is not None:
+    registry.on_swap(lambda old, new: drift_monitor.reset(new))
+
+metrics.registry.collector('sleep_model_info', 'Active model bundle version and served variant', 'gauge',
+                           lambda: [({'model_version': registry.version, 'variant': registry.get().variant}, 1)]
+                           if registry.version else [])
+if prediction_cache is not None:
+    metrics.registry.collector('sleep_prediction_cache_events', 'Prediction cache hits/misses/evictions', 'counter',
+                               lambda: [({'event': k}, v) for k, v in prediction_cache.stats.items()])
+if batcher is not None:
+    metrics.registry.collector('sleep_microbatch_queue_depth', 'Rows waiting for the micro-batcher', 'gauge',
+                               lambda: [({}, batcher.snapshot()['queue_depth'])])
+if drift_monitor is not None:
+    metrics.registry.collector('sleep_drift_psi', 'Population stability index of live inputs vs training', 'gauge',
+                               lambda: [({'feature': name}, s['psi'])
+                                        for name, s in drift_monitor.snapshot().get('features', {}).items()
+                                        if s['psi'] is not None])
+    metrics.registry.collector('sleep_drift_ks', 'Binned KS statistic of live inputs vs training', 'gauge',
+                               lambda: [({'feature': name}, s['ks'])
+                                        for name, s in drift_monitor.snapshot().get('features', {}).items()
+                                        if s['ks'] is not None])
+
+
+def now_timestamp():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def count_predictions(bundle, labels):
+    if metrics.registry.enabled and len(labels):
+        for label, n in zip(*np.unique(labels, return_counts=True)):
+            metrics.predictions.inc(int(n), model_version=bundle.version, prediction=label)
+
+
+def log_scored(bundle, X, labels, proba, timestamp):
+    occupations = bundle.occupation_encoder.decode(X[:, OCCUP_COL])
+    log_predictions(X, [str(l) for l in labels], proba, [str(c) for c in bundle.classes],
+                    [str(o) for o in occupations], bundle.version, timestamp)
+    if drift_monitor is not None:
+        drift_monitor.observe(bundle, X, labels)
+
+
+# Display names for occupation classes on the form (the value sent is always the class itself)
+OCCUPATION_LABELS = {'Engineer': 'Software Engineer'}
+
+
+def admin_allowed(token):
+    """Whether a request presenting token may use admin endpoints (never, with no SLEEP_ADMIN_TOKEN set)."""
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def form_options(bundle):
+    """Gender/occupation choices for index.html: exactly the categories the model was trained on."""
+    occupations = sorted(((str(c), OCCUPATION_LABELS.get(str(c), str(c))) for c in bundle.occupation_classes),
+                         key=lambda o: o[1])
+    return {'genders': sorted((str(c) for c in bundle.gender_classes), reverse=True), 'occupations': occupations}
+
+
+def predict_one(data, bundle):
+    """Score one form submission. Returns (prediction, details, report_data); raises ValueError on bad input."""
+    # Validation + Categorical Encoding
+    with metrics.stage('predict', 'encode'):
+        features, _, errors = encode_records([data], bundle.gender_encoder, bundle.occupation_encoder)
+    if errors:
+        raise ValueError(errors[0])
+
+    # Inference + occlusion attribution: one 14-row forward pass, cached with the prediction
+    with metrics.stage('predict', 'inference'):
+        proba, attributions = explain(features, bundle, prediction_cache, batcher)
+    labels = bundle.classes[proba.argmax(axis=1)]
+    prediction = str(labels[0])
+    count_predictions(bundle, labels)
+
+    # Outcome text; the causes come from this user's strongest contributing inputs
+    causes = top_causes(features[0], attributions[0], bundle)
+    details = build_details(prediction, causes)
+
+    # DB Save (queued; the background writer group-commits it)
+    timestamp = now_timestamp()
+    with metrics.stage('predict', 'db_queue'):
+        log_scored(bundle, features, labels, proba, timestamp)
+
+    report_data = {
+        'prediction': prediction,
+        'timestamp': timestamp,
+        'details': details,
+        'stats': {'stress': data['stress'], 'night_screen': data['night_screen']}
+    }
+    return prediction, details, report_data
+
+
+def predict_many(records, bundle):
+    """Score a batch of records; returns the /predict/batch JSON payload."""
+    X, rows, errors, proba, labels = score_records(records, bundle, prediction_cache, route='predict_batch')
+    if errors:
+        metrics.errors.inc(len(errors), route='predict_batch', type='InvalidRecord')
+    if rows:
+        count_predictions(bundle, labels)
+        with metrics.stage('predict_batch', 'db_queue'):
+            log_scored(bundle, X, labels, proba, now_timestamp())
+
+    results = batch_results(len(records), rows, errors, proba, labels, bundle.classes)
+    return {'count': len(results), 'errors': len(errors), 'model_version': bundle.version, 'results': results}
+
+
+def drift_report():
+    """Latest drift scores (recomputed every SLEEP_DRIFT_INTERVAL seconds by the monitor thread)."""
+    if drift_monitor is None:
+        return {'enabled': False}
+    return {'enabled': True, **drift_monitor.snapshot()}
+
+
+def save_feedback(data):
+    writer.submit("INSERT INTO feedback (message, rating, timestamp) VALUES (?, ?, ?)",
+                  (data['message'], int(data['rating']), now_timestamp()))
+
+
+def save_report(report_data):
+    """Store report_data; returns the opaque id to put in the session."""
+    return report_store.put(report_data)
+
+
+def load_report(report_id):
+    """report_data for an id from the session, or None if unknown, evicted or expired."""
+    return report_store.get(report_id) if report_id else None
+
+
+def render_report(report_data):
+    return renderer.render(report_data['prediction'], report_data['timestamp'],
+                           report_data['stats']['night_screen'], report_data['stats']['stress'],
+                           report_data['details'].get('causes', ()))
@@ -1,308 +1,331 @@
+import argparse
+import ast
+import hashlib
+import json
 import os
-import sys
+import shutil
 import subprocess
-
-# --- 1. SETUP FOLDERS ---
-print("📂 Creating folder structure...")
-os.makedirs('templates', exist_ok=True)
-
-# --- 2. CREATE DATA GENERATOR ---
-print("📄 Writing Data Generator...")
-with open('generate_dataset.py', 'w', encoding='utf-8') as f:
-    f.write(r'''import pandas as pd
-import numpy as np
-import random
-
-NUM_SAMPLES = 5000
-np.random.seed(42)
-
-def generate_data():
-    data = []
-    for _ in range(NUM_SAMPLES):
-        age = np.random.randint(18, 60)
-        gender = np.random.choice(['Male', 'Female'])
-        occupation = np.random.choice(['Student', 'Engineer', 'Doctor', 'Artist', 'Manager'])
-        daily_screen = np.round(np.random.uniform(2.0, 12.0), 1)
-        night_screen = np.round(np.random.uniform(0.0, 4.0), 1)
-        if night_screen > daily_screen: night_screen = daily_screen
-        blue_light = np.random.choice([0, 1])
-        bmi = np.round(np.random.uniform(18.5, 35.0), 1)
-        heart_rate = np.random.randint(60, 95)
-        stress = np.random.randint(1, 10)
-        phys_act = np.random.randint(0, 120)
-        snoring = np.random.choice([0, 1])
-        night_walking = np.random.choice([0, 1], p=[0.95, 0.05])
-        coffee = np.random.randint(0, 5)
-
-        # Logic for Disorders
-        insomnia_score = 0
-        if night_screen > 2.0: insomnia_score += 3
-        if blue_light == 0: insomnia_score += 1
-        if stress > 6: insomnia_score += 3
-        if coffee > 2: insomnia_score += 2
-        
-        apnea_score = 0
-        if bmi > 28: apnea_score += 4
-        if snoring == 1: apnea_score += 3
-        if heart_rate > 80: apnea_score += 1
-
-        if apnea_score >= 5: disorder = "Sleep Apnea"
-        elif insomnia_score >= 5: disorder = "Insomnia"
-        else: disorder = "Healthy"
-
-        data.append([age, gender, occupation, daily_screen, night_screen, blue_light, bmi, heart_rate, stress, phys_act, snoring, night_walking, coffee, disorder])
-    
-    columns = ['Age', 'Gender', 'Occupation', 'DailyScreenTime', 'NightScreenTime', 'BlueLightFilter', 'BMI', 'HeartRate', 'StressLevel', 'PhysicalActivity', 'Snoring', 'NightWalking', 'CoffeeIntake', 'Disorder']
-    pd.DataFrame(data, columns=columns).to_csv('sleep_disorder_dataset.csv', index=False)
-    print("✅ Dataset Created!")
-
-if __name__ == "__main__":
-    generate_data()
-''')
-
-# --- 3. CREATE MODEL TRAINER ---
-print("📄 Writing Model Trainer...")
-with open('train_model.py', 'w', encoding='utf-8') as f:
-    f.write(r'''import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.neural_network import MLPClassifier
-import joblib
-
-df = pd.read_csv('sleep_disorder_dataset.csv')
-
-le_gender = LabelEncoder()
-df['Gender'] = le_gender.fit_transform(df['Gender'])
-le_occup = LabelEncoder()
-df['Occupation'] = le_occup.fit_transform(df['Occupation'])
-
-X = df.drop('Disorder', axis=1)
-y = df['Disorder']
-
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-
-# MLP Model
-mlp = MLPClassifier(hidden_layer_sizes=(32, 16), max_iter=1000, random_state=42)
-mlp.fit(X_train_scaled, y_train)
-
-# Save files
-joblib.dump(mlp, 'sleep_model.pkl')
-joblib.dump(scaler, 'scaler.pkl')
-joblib.dump(le_gender, 'le_gender.pkl')
-joblib.dump(le_occup, 'le_occup.pkl')
-print("✅ Model Trained!")
-''')
-
-# --- 4. CREATE FLASK BACKEND ---
-print("📄 Writing App Backend...")
-with open('app.py', 'w', encoding='utf-8') as f:
-    f.write(r'''from flask import Flask, request, jsonify, render_template
-import joblib
-import sqlite3
-import numpy as np
-import os
-
-app = Flask(__name__)
-
-# Load Models
-model = joblib.load('sleep_model.pkl')
-scaler = joblib.load('scaler.pkl')
-le_gender = joblib.load('le_gender.pkl')
-le_occup = joblib.load('le_occup.pkl')
-
-def init_db():
-    conn = sqlite3.connect('sleep_data.db')
-    c = conn.cursor()
-    c.execute("CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, prediction TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
-    conn.commit()
-    conn.close()
-
-init_db()
-
-@app.route('/')
-def home():
-    return render_template('index.html')
-
-@app.route('/predict', methods=['POST'])
-def predict():
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from hashing import file_digest
+
+# Incremental project build: dataset -> splits (encoders + scaler inputs) -> model -> bundle,
+# plus evaluation alongside the model. Every step is keyed by the content hash of its
+# scripts (and the local modules they import), its parameters and its upstream outputs.
+# A step whose key and outputs match the last build is skipped; a step whose key is in
+# the artifact cache is restored by copying its outputs back. Restoring a cache directory
+# (SLEEP_BUILD_CACHE, e.g. from CI) brings a fresh node up without any training.
+# On a fresh checkout (no build history for a step) outputs that already exist, such as
+# the committed dataset and model, are adopted as that step's build instead of being
+# regenerated. Only a step whose inputs are themselves the committed files may adopt:
+# an explicit --rows/--seed regenerates the dataset, and everything downstream of it
+# is then rebuilt rather than adopted. --force rebuilds regardless.
+# Pointers (models/CURRENT) are cached with a step but are not part of its outputs: a
+# pointer changed since the build (a retrain, a rollback) is left alone, and only a
+# missing one is put back.
+
+BUILD_CACHE = os.environ.get('SLEEP_BUILD_CACHE', os.path.join('.cache', 'build'))
+DATASET_PATH = 'sleep_disorder_dataset.csv'
+EVALUATION_REPORT = 'evaluation_report.json'
+PKL_FILES = ['sleep_model.pkl', 'scaler.pkl', 'le_gender.pkl', 'le_occup.pkl']
+CV_FOLDS = 5
+
+
+def path_digest(path):
+    """Digest of a file, or of every file under a directory (with relative paths); None if missing."""
+    if os.path.isfile(path):
+        return file_digest(path)
+    if not os.path.isdir(path):
+        return None
+    h = hashlib.sha256()
+    for root, _, files in sorted(os.walk(path)):
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            h.update(f'{os.path.relpath(full, path)}:{file_digest(full)}\n'.encode())
+    return h.hexdigest()
+
+
+def local_modules(script):
+    """script plus every repo module it imports, transitively."""
+    seen, todo = set(), [script]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        with open(path, encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            names = ([a.name for a in node.names] if isinstance(node, ast.Import)
+                     else [node.module] if isinstance(node, ast.ImportFrom) and node.module and not node.level else [])
+            for name in names:
+                candidate = name.split('.')[0] + '.py'
+                if os.path.isfile(candidate):
+                    todo.append(candidate)
+    return sorted(seen)
+
+
+def _splits_output():
+    from preprocessing import splits_cache_path
+    return [splits_cache_path(file_digest(DATASET_PATH))]
+
+
+def _model_outputs():
+    from model_bundle import current_version, BundleError, BUNDLE_ROOT
     try:
-        data = request.json
-        
-        # Safely handle categorical data
-        try: gender_enc = le_gender.transform([data['gender']])[0]
-        except: gender_enc = 0
-        
-        try: occup_enc = le_occup.transform([data['occupation']])[0]
-        except: occup_enc = 0
-
-        features = [
-            float(data['age']), gender_enc, occup_enc,
-            float(data['daily_screen']), float(data['night_screen']), int(data['blue_light']),
-            float(data['bmi']), int(data['heart_rate']), int(data['stress']),
-            int(data['phys_act']), int(data['snoring']), int(data['night_walking']), int(data['coffee'])
-        ]
-        
-        final_features = scaler.transform([features])
-        prediction = model.predict(final_features)[0]
-        
-        insight = "Great habits! Keep it up."
-        if prediction == 'Insomnia': insight = "Limit night screen time. Try blue light filters."
-        elif prediction == 'Sleep Apnea': insight = "High risk detected. Please consult a doctor."
-
-        return jsonify({'prediction': prediction, 'insight': insight})
-    except Exception as e:
-        print("ERROR:", e)
-        return jsonify({'error': str(e)}), 500
+        bundle = [os.path.join(BUNDLE_ROOT, current_version())]
+    except BundleError:
+        bundle = []  # not trained yet; the missing pointer marks the outputs incomplete
+    return PKL_FILES + bundle
+
+
+def _model_pointers():
+    from model_bundle import BUNDLE_ROOT, CURRENT_FILE
+    return [os.path.join(BUNDLE_ROOT, CURRENT_FILE)]
+
+
+class Step:
+    def __init__(self, name, deps, script, cmd, outputs, adopt=True, pointers=lambda: []):
+        self.name = name
+        self.deps = deps
+        self.script = script
+        self.cmd = cmd
+        self.outputs = outputs    # callable: output paths, resolved once inputs exist
+        self.adopt = adopt        # existing outputs may stand in for a first build
+        self.pointers = pointers  # callable: files that select among outputs; restored only if missing
+
+    def key(self, upstream):
+        sources = {path: file_digest(path) for path in local_modules(self.script)}
+        body = {'step': self.name, 'cmd': self.cmd, 'sources': sources,
+                'upstream': {dep: upstream[dep] for dep in self.deps}}
+        return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()[:20]
+
+
+def build_steps(rows=None, seed=None):
+    """The build graph; rows/seed None means "the dataset as committed" (generator defaults if missing)."""
+    py = sys.executable
+    params = [arg for flag, value in (('--rows', rows), ('--seed', seed)) if value is not None
+              for arg in (flag, str(value))]
+    return [
+        # The committed CSV is not the output of any particular --rows/--seed, so only the
+        # parameterless step can adopt it
+        Step('dataset', [], 'generate_dataset.py', ['generate_dataset.py'] + params + ['--out', DATASET_PATH],
+             lambda: [DATASET_PATH], adopt=not params),
+        Step('splits', ['dataset'], 'preprocessing.py',
+             ['-c', 'from preprocessing import load_splits; load_splits()'], _splits_output),
+        # train_model.py writes the .pkl files and the versioned bundle in one run
+        Step('model', ['splits'], 'train_model.py', ['train_model.py'], _model_outputs, pointers=_model_pointers),
+        Step('bundle', ['model'], 'model_bundle.py',
+             ['-c', 'from model_bundle import load_bundle; b = load_bundle(verify=True); '
+                    'b.model.predict(b.scaler_mean[None, :]); print(f"📦 Bundle {b.version} verified")'],
+             lambda: []),
+        Step('evaluation', ['splits'], 'check_accuracy.py',
+             ['check_accuracy.py', '--cv', str(CV_FOLDS), '--out', EVALUATION_REPORT], lambda: [EVALUATION_REPORT]),
+    ], py
+
+
+class ArtifactCache:
+    """Outputs of finished steps, stored under <root>/<step>-<key>/ with a manifest of their digests."""
+
+    def __init__(self, root=BUILD_CACHE):
+        self.root = root
+
+    def _dir(self, step, key):
+        return os.path.join(self.root, f'{step.name}-{key}')
+
+    def manifest(self, step, key):
+        try:
+            with open(os.path.join(self._dir(step, key), 'manifest.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def store(self, step, key, outputs, seconds, committed=False):
+        final = self._dir(step, key)
+        tmp = final + f'.{os.getpid()}.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        pointers = [path for path in step.pointers() if os.path.isfile(path)]
+        for path in outputs + pointers:
+            dst = os.path.join(tmp, 'files', path)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            (shutil.copytree if os.path.isdir(path) else shutil.copy2)(path, dst)
+        # committed: the outputs derive from the repo's committed files only (adopted, or built from them)
+        manifest = {'outputs': {path: path_digest(path) for path in outputs}, 'pointers': pointers,
+                    'seconds': seconds, 'built': time.strftime('%Y-%m-%d %H:%M:%S'), 'committed': committed}
+        os.makedirs(tmp, exist_ok=True)
+        with open(os.path.join(tmp, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        return manifest
+
+    def has_history(self, step):
+        """Whether this cache has ever built (or adopted) any version of step."""
+        return os.path.isdir(self.root) and any(name.startswith(f'{step.name}-') and not name.endswith('.tmp')
+                                                for name in os.listdir(self.root))
+
+    def restore(self, step, key, manifest):
+        """Copy back outputs that differ from the build, and pointers that are missing."""
+        changed = [path for path, digest in manifest['outputs'].items() if path_digest(path) != digest]
+        missing = [path for path in manifest.get('pointers', []) if not os.path.exists(path)]
+        for path in changed + missing:
+            src = os.path.join(self._dir(step, key), 'files', path)
+            if os.path.isdir(src):
+                shutil.rmtree(path, ignore_errors=True)
+                shutil.copytree(src, path)
+            else:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                shutil.copy2(src, path)
+
+
+def outputs_digest(manifest):
+    return hashlib.sha256(json.dumps(manifest['outputs'], sort_keys=True).encode()).hexdigest()
+
+
+def adoptable(step, cache, committed_inputs):
+    """Existing outputs of a step this cache has never built (e.g. files committed to the repo).
+
+    Only when the step allows it and its inputs are the committed files too.
+    """
+    if not (step.adopt and committed_inputs) or cache.has_history(step):
+        return None
+    outputs = step.outputs()
+    complete = outputs and all(os.path.exists(path) for path in outputs + step.pointers())
+    return outputs if complete else None
+
+
+def is_fresh(manifest):
+    """Outputs match the build and no pointer is missing (a repointed one is left as it is)."""
+    return (all(path_digest(path) == digest for path, digest in manifest['outputs'].items())
+            and all(os.path.exists(path) for path in manifest.get('pointers', [])))
+
+
+def run_step(step, key, py, cache, force, committed_inputs=True):
+    """Bring one step up to date; returns (status, seconds, manifest)."""
+    start = time.perf_counter()
+    manifest = None if force else cache.manifest(step, key)
+    if manifest is not None:
+        if is_fresh(manifest):
+            return 'up-to-date', time.perf_counter() - start, manifest
+        cache.restore(step, key, manifest)
+        return 'restored', time.perf_counter() - start, manifest
+    outputs = None if force else adoptable(step, cache, committed_inputs)
+    if outputs:
+        return 'adopted', time.perf_counter() - start, cache.store(step, key, outputs, 0.0, committed=True)
+
+    proc = subprocess.run([py, '-W', 'ignore'] + step.cmd, capture_output=True, text=True)
+    output = (proc.stdout + proc.stderr).strip()
+    if output:
+        print('\n'.join(f'   [{step.name}] {line}' for line in output.splitlines()[-8:]))
+    if proc.returncode != 0:
+        raise RuntimeError(f"step '{step.name}' failed with exit code {proc.returncode}")
+    seconds = time.perf_counter() - start
+    # A step without inputs (the dataset) built new data; others inherit their inputs' origin
+    return 'built', seconds, cache.store(step, key, step.outputs(), seconds,
+                                         committed=bool(step.deps) and committed_inputs)
+
+
+def build(steps, py, cache, jobs, force=(), dry_run=False):
+    """Run the graph, starting each step as soon as its dependencies are done."""
+    by_name = {s.name: s for s in steps}
+    upstream, results, failed = {}, {}, []
+    committed = {}  # step -> its outputs derive only from committed files
+    pending = list(steps)
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for step in [s for s in pending if all(d in upstream for d in s.deps)]:
+                pending.remove(step)
+                key = step.key(upstream)
+                committed_inputs = all(committed[d] for d in step.deps)
+                if dry_run:
+                    forced = step.name in force
+                    manifest = None if forced else cache.manifest(step, key)
+                    adopt = None if forced or manifest else adoptable(step, cache, committed_inputs)
+                    fresh = manifest is not None and is_fresh(manifest)
+                    print(f"   {step.name:<11} {key}  " + ('up-to-date' if fresh else 'restorable' if manifest
+                                                         else 'would adopt' if adopt else 'would build'))
+                    if adopt:
+                        manifest = {'outputs': {path: path_digest(path) for path in adopt}, 'committed': True}
+                    committed[step.name] = (manifest.get('committed', False) if manifest
+                                            else bool(step.deps) and committed_inputs)
+                    # Downstream keys depend on this step's outputs: unknown until it is built
+                    upstream[step.name] = outputs_digest(manifest) if manifest else f'pending:{key}'
+                    continue
+                print(f"▶️  {step.name} ({key})")
+                running[pool.submit(run_step, step, key, py, cache, step.name in force, committed_inputs)] = step
+            if not running:
+                if pending and not dry_run:
+                    for step in pending:
+                        results[step.name] = ('skipped', 0.0)
+                    pending = []
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                try:
+                    status, seconds, manifest = future.result()
+                except Exception as e:
+                    print(f"❌ {e}")
+                    failed.append(step.name)
+                    results[step.name] = ('failed', 0.0)
+                    # Dependents of a failed step never become ready
+                    pending = [s for s in pending if not _depends_on(s, step.name, by_name)]
+                    for s in steps:
+                        if _depends_on(s, step.name, by_name):
+                            results[s.name] = ('skipped', 0.0)
+                    continue
+                upstream[step.name] = outputs_digest(manifest)
+                committed[step.name] = manifest.get('committed', False)
+                results[step.name] = (status, seconds)
+                print(f"✅ {step.name}: {status} in {seconds:.2f}s")
+    return results, failed
+
+
+def _depends_on(step, name, by_name):
+    return any(d == name or _depends_on(by_name[d], name, by_name) for d in step.deps)
+
 
 if __name__ == "__main__":
-    app.run(debug=True)
-''')
-
-# --- 5. CREATE FRONTEND (PASTEL THEME) ---
-print("📄 Writing Frontend Template...")
-with open('templates/index.html', 'w', encoding='utf-8') as f:
-    f.write(r'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Sleep Disorder Prediction</title>
-    <link href="https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600&family=Montserrat:wght@700&display=swap" rel="stylesheet">
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
-        :root { --bg-color: #FDF2F8; --card-bg: rgba(255, 255, 255, 0.85); }
-        body { font-family: 'Poppins', sans-serif; background: linear-gradient(135deg, #FDF2F8 0%, #E0F2FE 100%); display: flex; justify-content: center; align-items: center; min-height: 100vh; margin: 0; }
-        .dashboard-container { background: var(--card-bg); backdrop-filter: blur(12px); border-radius: 24px; padding: 30px; width: 90%; max-width: 850px; box-shadow: 0 20px 50px rgba(0,0,0,0.1); text-align: center; }
-        h1 { font-family: 'Montserrat', sans-serif; color: #8B5CF6; margin-bottom: 5px; }
-        .subtitle { color: #6B7280; font-size: 0.9rem; margin-bottom: 30px; }
-        
-        .form-grid { display: grid; grid-template-columns: 1fr 1fr; gap: 15px; text-align: left; }
-        label { font-size: 0.85rem; font-weight: 600; color: #374151; }
-        input, select { width: 100%; padding: 12px; border: 2px solid #E5E7EB; border-radius: 10px; box-sizing: border-box; }
-        
-        .analyze-btn { grid-column: span 2; width: 100%; padding: 15px; background: linear-gradient(to right, #C4B5FD, #86EFAC); border: none; border-radius: 12px; color: white; font-weight: bold; font-size: 1rem; cursor: pointer; margin-top: 20px; transition: transform 0.2s; }
-        .analyze-btn:hover { transform: scale(1.02); }
-
-        #result-box { display: none; margin-top: 30px; padding-top: 20px; border-top: 1px solid #eee; animation: fadeIn 0.5s; }
-        .prediction-badge { padding: 10px 25px; border-radius: 50px; color: white; font-weight: bold; font-size: 1.5rem; display: inline-block; margin-bottom: 15px; }
-        .bg-healthy { background-color: #6EE7B7; } 
-        .bg-insomnia { background-color: #FCA5A5; } 
-        .bg-apnea { background-color: #FDBA74; }
-        
-        @keyframes fadeIn { from { opacity: 0; transform: translateY(10px); } to { opacity: 1; transform: translateY(0); } }
-    </style>
-</head>
-<body>
-
-<div class="dashboard-container">
-    <h1>Sleep Disorder Prediction</h1>
-    <p class="subtitle">VIA SMARTPHONE SCREEN TIME PATTERNS</p>
-
-    <form id="predictionForm">
-        <div class="form-grid">
-            <div><label>Age</label><input type="number" id="age" value="24" required></div>
-            <div><label>Gender</label><select id="gender"><option value="Male">Male</option><option value="Female">Female</option></select></div>
-            <div><label>Daily Screen Time (Hrs)</label><input type="number" step="0.1" id="daily_screen" value="6.0" required></div>
-            <div><label>Nighttime Usage (Hrs)</label><input type="number" step="0.1" id="night_screen" value="1.0" required></div>
-            <div><label>BMI</label><input type="number" step="0.1" id="bmi" value="22.5" required></div>
-            <div><label>Heart Rate</label><input type="number" id="heart_rate" value="72" required></div>
-        </div>
-
-        <input type="hidden" id="occupation" value="Student">
-        <input type="hidden" id="blue_light" value="0">
-        <input type="hidden" id="phys_act" value="30">
-        <input type="hidden" id="stress" value="5">
-        <input type="hidden" id="snoring" value="0">
-        <input type="hidden" id="night_walking" value="0">
-        <input type="hidden" id="coffee" value="1">
-
-        <button type="submit" class="analyze-btn">Analyze Patterns ✨</button>
-    </form>
-
-    <div id="result-box">
-        <h3>Prediction Result</h3>
-        <div id="predBadge" class="prediction-badge"></div>
-        <p id="insightText" style="color: #555;"></p>
-        <div style="height: 200px; width: 100%;"><canvas id="sleepChart"></canvas></div>
-    </div>
-</div>
-
-<script>
-    document.getElementById('predictionForm').addEventListener('submit', async function(e) {
-        e.preventDefault();
-        
-        const data = {
-            age: document.getElementById('age').value,
-            gender: document.getElementById('gender').value,
-            occupation: document.getElementById('occupation').value,
-            daily_screen: document.getElementById('daily_screen').value,
-            night_screen: document.getElementById('night_screen').value,
-            blue_light: document.getElementById('blue_light').value,
-            bmi: document.getElementById('bmi').value,
-            heart_rate: document.getElementById('heart_rate').value,
-            stress: document.getElementById('stress').value,
-            phys_act: document.getElementById('phys_act').value,
-            snoring: document.getElementById('snoring').value,
-            night_walking: document.getElementById('night_walking').value,
-            coffee: document.getElementById('coffee').value
-        };
-
-        try {
-            const response = await fetch('/predict', {
-                method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(data)
-            });
-            const result = await response.json();
-            
-            if(result.error) { alert("Server Error: " + result.error); return; }
-
-            const resBox = document.getElementById('result-box');
-            resBox.style.display = 'block';
-            
-            const badge = document.getElementById('predBadge');
-            badge.innerText = result.prediction;
-            badge.className = 'prediction-badge ' + (result.prediction === 'Healthy' ? 'bg-healthy' : result.prediction === 'Insomnia' ? 'bg-insomnia' : 'bg-apnea');
-            
-            document.getElementById('insightText').innerText = result.insight;
-
-            // Chart
-            const ctx = document.getElementById('sleepChart').getContext('2d');
-            if(window.myChart) window.myChart.destroy();
-            window.myChart = new Chart(ctx, {
-                type: 'bar',
-                data: {
-                    labels: ['Your Night Screen Time', 'Recommended Limit'],
-                    datasets: [{
-                        label: 'Hours',
-                        data: [data.night_screen, 1.0],
-                        backgroundColor: ['#FCA5A5', '#6EE7B7']
-                    }]
-                },
-                options: { responsive: true, maintainAspectRatio: false }
-            });
-
-        } catch (err) { alert("Connection Failed. Is python app.py running?"); }
-    });
-</script>
-
-</body>
-</html>
-''')
-
-# --- 6. AUTO-RUN SETUP COMMANDS ---
-print("\n🚀 STARTING AUTOMATED SETUP...")
-print("--------------------------------")
-
-try:
-    print("1️⃣  Generating Dataset...")
-    subprocess.run([sys.executable, 'generate_dataset.py'], check=True)
-    
-    print("2️⃣  Training ML Model (This takes 5-10 seconds)...")
-    subprocess.run([sys.executable, 'train_model.py'], check=True)
-    
+    parser = argparse.ArgumentParser(description="Build the dataset, model bundle and evaluation, skipping up-to-date steps")
+    parser.add_argument('--rows', type=int, help="regenerate the dataset with this many rows")
+    parser.add_argument('--seed', type=int, help="regenerate the dataset with this seed")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="steps run in parallel")
+    parser.add_argument('--force', nargs='*', metavar='STEP', help="rebuild these steps (no names: all)")
+    parser.add_argument('--skip', nargs='*', default=[], metavar='STEP', help="leave these steps out (e.g. evaluation)")
+    parser.add_argument('--dry-run', action='store_true', help="only show which steps are up to date")
+    parser.add_argument('--cache-dir', default=BUILD_CACHE, help="artifact cache (env SLEEP_BUILD_CACHE)")
+    args = parser.parse_args()
+
+    steps, py = build_steps(args.rows, args.seed)
+    skipped = set(args.skip)
+    steps = [s for s in steps if s.name not in skipped and not any(d in skipped for d in s.deps)]
+    force = {s.name for s in steps} if args.force == [] else set(args.force or ())
+
+    print("🚀 Building project...")
+    print("--------------------------------")
+    start = time.perf_counter()
+    results, failed = build(steps, py, ArtifactCache(args.cache_dir), max(1, args.jobs or 1), force, args.dry_run)
+    total = time.perf_counter() - start
+    if args.dry_run:
+        sys.exit(0)
+
+    print("--------------------------------")
+    print(f"⏱️  {'step':<11} {'status':<11} {'seconds':>8}")
+    for step in steps:
+        status, seconds = results.get(step.name, ('skipped', 0.0))
+        print(f"   {step.name:<11} {status:<11} {seconds:8.2f}")
+    print(f"   {'total':<11} {'':<11} {total:8.2f}")
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+    with open(os.path.join(args.cache_dir, 'last_build.json'), 'w', encoding='utf-8') as f:
+        json.dump({'finished': time.strftime('%Y-%m-%d %H:%M:%S'), 'seconds': total,
+                   'steps': {name: {'status': s, 'seconds': sec} for name, (s, sec) in results.items()}}, f, indent=2)
+
+    if failed:
+        print(f"❌ Build failed: {', '.join(failed)}")
+        sys.exit(1)
     print("\n✅ SETUP COMPLETE! EVERYTHING IS READY.")
     print("👉 TYPE THIS COMMAND TO START:  python app.py")
-
-except Exception as e:
-    print(f"❌ Error during auto-setup: {e}")
\ No newline at end of file
@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+
+# Keep test runs away from the working databases: set before any repo module reads its config
+_tmp = tempfile.mkdtemp(prefix='sleep-tests-')
+os.environ.setdefault('SLEEP_DB_PATH', os.path.join(_tmp, 'sleep_data.db'))
+os.environ.setdefault('SLEEP_REPORT_STORE_PATH', os.path.join(_tmp, 'report_store.db'))
+os.environ.setdefault('SLEEP_PREDICTION_CACHE', 'memory')
+os.environ.setdefault('SLEEP_MODEL_POLL_SECONDS', '0')
+os.environ.setdefault('SLEEP_DRIFT_MONITOR', '0')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def splits():
+    from preprocessing import load_splits
+    return load_splits(use_cache=False)
+
+
+@pytest.fixture(scope='session')
+def sklearn_model():
+    import warnings
+    import joblib
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return joblib.load('sleep_model.pkl'), joblib.load('scaler.pkl')
+
+
+@pytest.fixture
+def record():
+    return {'age': 35, 'gender': 'Male', 'occupation': 'Engineer', 'daily_screen': 6.5, 'night_screen': 2.0,
+            'blue_light': 0, 'bmi': 24.5, 'heart_rate': 72, 'stress': 6, 'phys_act': 3, 'snoring': 0,
+            'night_walking': 0, 'coffee': 2}
+
+
+@pytest.fixture
+def client():
+    import warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        from app import app
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
@@ -0,0 +1,16 @@
+import service
+
+
+def test_reload_is_forbidden_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(service, 'ADMIN_TOKEN', None)
+    assert client.post('/admin/reload').status_code == 403
+    assert client.post('/admin/reload', headers={'X-Admin-Token': ''}).status_code == 403
+
+
+def test_reload_requires_the_configured_token(client, monkeypatch):
+    monkeypatch.setattr(service, 'ADMIN_TOKEN', 's3cret')
+    assert client.post('/admin/reload').status_code == 403
+    assert client.post('/admin/reload', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    res = client.post('/admin/reload', headers={'X-Admin-Token': 's3cret'})
+    assert res.status_code == 200
+    assert res.get_json()['status'] == 'success'
@@ -0,0 +1,27 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from background import ordered_map
+
+
+def test_ordered_map_keeps_order_and_bounds_in_flight_tasks():
+    lock = threading.Lock()
+    submitted = consumed = 0
+    peak = 0
+
+    def items():
+        nonlocal submitted, peak
+        for i in range(50):
+            with lock:
+                submitted += 1
+                peak = max(peak, submitted - consumed)
+            yield i
+
+    results = []
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for result in ordered_map(pool, lambda x: x * x, items(), in_flight=3):
+            results.append(result)
+            with lock:
+                consumed += 1
+    assert results == [i * i for i in range(50)]
+    assert peak <= 3
@@ -0,0 +1,47 @@
+import json
+
+
+def test_batch_json_array_reports_invalid_records(client, record):
+    body = [record, dict(record, age='old'), 'not an object']
+    res = client.post('/predict/batch', json=body)
+    assert res.status_code == 200
+    results = res.get_json()['results']
+    assert [r['index'] for r in results] == [0, 1, 2]
+    assert 'prediction' in results[0]
+    assert 'error' in results[1] and 'error' in results[2]
+
+
+def test_batch_ndjson_malformed_line_fails_only_that_record(client, record):
+    lines = [json.dumps(record), '{"gender": "Male", "age": ', json.dumps(dict(record, age=50))]
+    res = client.post('/predict/batch', data='\n'.join(lines), content_type='application/x-ndjson')
+    assert res.status_code == 200
+    results = res.get_json()['results']
+    assert len(results) == 3
+    assert 'prediction' in results[0] and 'prediction' in results[2]
+    assert results[1]['index'] == 1
+    assert results[1]['error'].startswith('invalid JSON')
+
+
+def test_batch_body_that_is_not_json_is_rejected(client):
+    res = client.post('/predict/batch', data='{not json', content_type='application/json')
+    assert res.status_code == 400
+
+
+def test_batch_unknown_category_is_rejected_by_default(client, record):
+    res = client.post('/predict/batch', json=[dict(record, occupation='Nurse'), record])
+    results = res.get_json()['results']
+    assert 'unknown occupation' in results[0]['error']
+    assert 'prediction' in results[1]
+
+
+def test_batch_rejects_non_finite_values(client, record):
+    body = [dict(record, age='nan'), dict(record, bmi='inf'), dict(record, heart_rate='-inf'),
+            dict(record, daily_screen=1e308), record]
+    res = client.post('/predict/batch', json=body)
+    assert res.status_code == 200
+    results = res.get_json()['results']
+    for r in results[:4]:
+        assert 'must be a finite number' in r['error'] or 'invalid value' in r['error']
+        assert 'prediction' not in r
+    assert 'prediction' in results[4]
+    assert b'NaN' not in res.data
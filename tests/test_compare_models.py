@@ -0,0 +1,34 @@
+import compare_models
+
+
+def _fake_run(calls):
+    def run_configs(configs, workers=None):
+        calls.append([c['max_iter'] for c in configs])
+        # Larger 'score' configs win; more iterations never hurt
+        return [{'config': c, 'accuracy': c['score'] + c['max_iter'] / 1e6, 'seconds': 0.0, 'n_iter': c['max_iter']}
+                for c in configs]
+    return run_configs
+
+
+def test_halving_trains_the_winner_at_max_iter(monkeypatch):
+    calls = []
+    monkeypatch.setattr(compare_models, 'run_configs', _fake_run(calls))
+    configs = [{'score': i} for i in range(9)]
+    results = compare_models.successive_halving(configs, max_iter=2000, min_iter=50, eta=3)
+
+    assert [len(c) for c in calls] == [9, 3, 1]
+    assert calls[0] == [50] * 9 and calls[1] == [150] * 3
+    assert calls[-1] == [2000]
+    assert [r['config']['score'] for r in results] == [8]
+    assert results[0]['n_iter'] == 2000
+
+
+def test_halving_budget_is_capped_at_max_iter(monkeypatch):
+    calls = []
+    monkeypatch.setattr(compare_models, 'run_configs', _fake_run(calls))
+    configs = [{'score': i} for i in range(30)]
+    results = compare_models.successive_halving(configs, max_iter=400, min_iter=50, eta=3)
+
+    assert [c[0] for c in calls] == [50, 150, 400]
+    assert all(r['n_iter'] == 400 for r in results)
+    assert len(results) == 4
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from compiled_model import CompiledModel, compile_variant
+from model_bundle import bundle_arrays
+
+
+def test_compiled_model_matches_sklearn(splits, sklearn_model):
+    model, scaler = sklearn_model
+    compiled = CompiledModel.from_sklearn(model, scaler)
+    expected = model.predict_proba(scaler.transform(splits.X_test))
+    np.testing.assert_allclose(compiled.predict_proba(splits.X_test), expected, rtol=1e-9, atol=1e-12)
+    assert np.array_equal(compiled.predict(splits.X_test), model.predict(scaler.transform(splits.X_test)))
+
+
+def test_compiled_model_single_row_and_save_load(tmp_path, splits, sklearn_model):
+    model, scaler = sklearn_model
+    compiled = CompiledModel.from_sklearn(model, scaler)
+    path = str(tmp_path / 'compiled.npz')
+    compiled.save(path)
+    loaded = CompiledModel.load(path)
+    row = splits.X_test[:1]
+    np.testing.assert_allclose(loaded.predict_proba(row), model.predict_proba(scaler.transform(row)), atol=1e-12)
+
+
+def test_bundle_float64_variant_matches_sklearn(splits, sklearn_model):
+    model, scaler = sklearn_model
+    arrays = bundle_arrays(model, scaler)
+    compiled = compile_variant(arrays, len(model.coefs_), model.classes_, 'float64')
+    np.testing.assert_allclose(compiled.predict_proba(splits.X_test),
+                               model.predict_proba(scaler.transform(splits.X_test)), atol=1e-12)
+
+
+def test_missing_variant_fails_to_load(tmp_path, sklearn_model):
+    import joblib
+    from model_bundle import BundleError, load_bundle, write_bundle
+    model, scaler = sklearn_model
+    root = str(tmp_path)
+    path = write_bundle(model, scaler, joblib.load('le_gender.pkl'), joblib.load('le_occup.pkl'), root=root,
+                        variants=['float32'])
+    assert load_bundle(path, root=root, variant='float32').variant == 'float32'
+    with pytest.raises(BundleError, match="no 'int8' variant"):
+        load_bundle(path, root=root, variant='int8')
+
+
+def test_committed_bundle_matches_train_model():
+    # The shipped bundle must carry everything train_model.py writes
+    from model_bundle import load_bundle
+    for variant in ('float64', 'float32', 'int8'):
+        bundle = load_bundle(variant=variant)
+        assert bundle.variant == variant
+    assert {'drift_reference', 'encoder_most_frequent'} <= set(bundle.manifest)
+    assert load_bundle(unknown_policy='most_frequent').occupation_encoder.encode(['Nurse'])[0] >= 0
@@ -0,0 +1,70 @@
+import copy
+import time
+
+import numpy as np
+import pytest
+
+from drift import DriftMonitor
+from model_bundle import load_bundle
+
+
+@pytest.fixture(scope='module')
+def bundles():
+    old = load_bundle(verify=False)
+    new = copy.copy(old)
+    new.version = old.version + '-next'
+    return old, new
+
+
+def _items(bundle, X):
+    labels = [str(c) for c in bundle.model.predict(X)]
+    return [(bundle.version, X, labels, time.time())]
+
+
+def test_hot_swap_with_interleaved_requests_keeps_statistics(bundles, splits):
+    old, new = bundles
+    monitor = DriftMonitor()
+    monitor.observe(old, splits.X_test[:1], ['Healthy'])  # first call picks the bundle
+    assert monitor.version == old.version
+    monitor.update(_items(old, splits.X_test[:100]))
+
+    monitor.reset(new)  # registry swap
+    monitor.update(_items(new, splits.X_test[:50]))
+    monitor.observe(old, splits.X_test[:1], ['Healthy'])  # an in-flight request on the old bundle
+    assert monitor.version == new.version
+    monitor.update(_items(old, splits.X_test[:10]) + _items(new, splits.X_test[50:80]))
+    assert monitor.count == 80
+
+
+def test_merged_stats_match_a_single_pass(bundles, splits):
+    bundle = bundles[0]
+    X = splits.X_test
+    whole = DriftMonitor()
+    whole.reset(bundle)
+    whole.update(_items(bundle, X))
+
+    merged = DriftMonitor()
+    merged.reset(bundle)
+    for chunk in np.array_split(X, 4):
+        part = DriftMonitor()
+        part.reset(bundle)
+        part.update(_items(bundle, chunk))
+        merged.merge(part.stats())
+
+    assert merged.count == whole.count == len(X)
+    np.testing.assert_allclose(merged.mean, whole.mean)
+    np.testing.assert_allclose(merged.m2, whole.m2, rtol=1e-9)
+    for a, b in zip(merged.hist, whole.hist):
+        np.testing.assert_array_equal(a, b)
+    assert merged.class_window.sum() == whole.class_window.sum() == len(X)
+
+
+def test_stats_from_another_version_are_not_merged(bundles, splits):
+    old, new = bundles
+    part = DriftMonitor()
+    part.reset(old)
+    part.update(_items(old, splits.X_test[:20]))
+    monitor = DriftMonitor()
+    monitor.reset(new)
+    monitor.merge(part.stats())
+    assert monitor.count == 0
@@ -0,0 +1,32 @@
+import re
+
+from model_bundle import load_bundle
+
+
+def _options(html, name):
+    select = re.search(rf'<select name="{name}">(.*?)</select>', html, re.S).group(1)
+    return re.findall(r'<option value="([^"]*)"', select)
+
+
+def test_form_offers_only_trained_categories(client):
+    html = client.get('/').get_data(as_text=True)
+    bundle = load_bundle(verify=False)
+    assert sorted(_options(html, 'occupation')) == sorted(bundle.occupation_classes)
+    assert sorted(_options(html, 'gender')) == sorted(bundle.gender_classes)
+
+
+def test_every_form_option_predicts(client, record):
+    html = client.get('/').get_data(as_text=True)
+    for occupation in _options(html, 'occupation'):
+        for gender in _options(html, 'gender'):
+            res = client.post('/predict', data=dict(record, occupation=occupation, gender=gender))
+            assert res.status_code == 200, (occupation, gender)
+            assert 'Error' not in res.get_data(as_text=True)[:200]
+
+
+def test_invalid_form_input_renders_the_form_with_a_message(client, record):
+    res = client.post('/predict', data=dict(record, occupation='Nurse'))
+    assert res.status_code == 400
+    html = res.get_data(as_text=True)
+    assert 'class="form-error"' in html and "unknown occupation &#39;Nurse&#39;" in html
+    assert '<form action="/predict"' in html
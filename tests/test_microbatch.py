@@ -0,0 +1,74 @@
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from microbatch import MicroBatcher
+
+
+class _Model:
+    """Tags each row with the model's id so tests can tell which model scored it."""
+
+    def __init__(self, tag, fail=False):
+        self.tag = tag
+        self.fail = fail
+        self.calls = []
+
+    def predict_proba(self, X):
+        self.calls.append(len(X))
+        if self.fail:
+            raise RuntimeError(f'model {self.tag} failed')
+        return np.column_stack([X[:, 0], np.full(len(X), self.tag)])
+
+
+def _bundle(tag, fail=False):
+    return SimpleNamespace(version=f'v{tag}', model=_Model(tag, fail))
+
+
+def _item(bundle, rows):
+    X = np.array([[float(r)] for r in rows])
+    return bundle, X, time.perf_counter(), Future()
+
+
+def test_results_go_back_to_their_own_futures():
+    bundle = _bundle(1)
+    items = [_item(bundle, rows) for rows in ([1], [2, 3, 4], [5, 6])]
+    MicroBatcher()._run_batch(items)
+    assert bundle.model.calls == [6]  # one forward pass for every request
+    for _, X, _, future in items:
+        np.testing.assert_array_equal(future.result(timeout=0)[:, 0], X[:, 0])
+
+
+def test_rows_are_grouped_per_model_version_during_a_swap():
+    old, new = _bundle(1), _bundle(2)
+    items = [_item(old, [1, 2]), _item(new, [3]), _item(old, [4]), _item(new, [5, 6])]
+    batcher = MicroBatcher()
+    batcher._run_batch(items)
+    assert old.model.calls == [3] and new.model.calls == [3]
+    for bundle, X, _, future in items:
+        result = future.result(timeout=0)
+        np.testing.assert_array_equal(result[:, 0], X[:, 0])
+        assert (result[:, 1] == bundle.model.tag).all()
+    assert batcher.batches == 1 and batcher.rows == 6
+
+
+def test_a_failing_pass_reaches_every_waiter_of_its_version():
+    broken, ok = _bundle(1, fail=True), _bundle(2)
+    items = [_item(broken, [1]), _item(ok, [2]), _item(broken, [3, 4])]
+    MicroBatcher()._run_batch(items)
+    for future in (items[0][3], items[2][3]):
+        with pytest.raises(RuntimeError, match='model 1 failed'):
+            future.result(timeout=0)
+    np.testing.assert_array_equal(items[1][3].result(timeout=0)[:, 1], [2])
+
+
+def test_submit_matches_direct_prediction(splits):
+    from model_bundle import load_bundle
+    bundle = load_bundle()
+    X = splits.X_test[:20]
+    batcher = MicroBatcher(max_batch=8, max_delay_ms=1)
+    futures = [batcher.submit(bundle, X[i:i + 3]) for i in range(0, len(X), 3)]
+    np.testing.assert_allclose(np.vstack([f.result(timeout=5) for f in futures]),
+                               bundle.model.predict_proba(X), atol=1e-12)
@@ -0,0 +1,69 @@
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pytest
+
+from model_bundle import write_bundle
+from prediction_cache import PredictionCache, feature_keys
+from registry import ModelRegistry
+
+PROBA = np.array([0.7, 0.2, 0.1])
+
+
+def _count(cache):
+    return cache._shared().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+
+def test_shared_tier_is_pruned_to_its_row_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(PredictionCache, 'PRUNE_EVERY', 10)
+    cache = PredictionCache(shared_path=str(tmp_path / 'cache.db'), shared_rows=25)
+    for start in range(0, 100, 5):
+        keys = [(i,) for i in range(start, start + 5)]
+        cache.put_many('v1', keys, [PROBA] * len(keys))
+    assert _count(cache) <= 25 + 10
+    cache.prune_shared()
+    assert _count(cache) == 25
+    # The most recently written rows survive
+    assert cache._shared_get('v1', (99,)) is not None
+    assert cache._shared_get('v1', (0,)) is None
+
+
+def test_shared_tier_drops_expired_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(PredictionCache, 'PRUNE_EVERY', 4)
+    cache = PredictionCache(shared_path=str(tmp_path / 'cache.db'), ttl=0.05)
+    cache.put_many('v1', [(1,), (2,)], [PROBA] * 2)
+    time.sleep(0.1)
+    cache.put_many('v1', [(3,), (4,)], [PROBA] * 2)  # 4th write triggers a prune
+    assert _count(cache) == 2
+
+
+@pytest.fixture
+def two_versions(tmp_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        model, scaler = joblib.load('sleep_model.pkl'), joblib.load('scaler.pkl')
+        encoders = joblib.load('le_gender.pkl'), joblib.load('le_occup.pkl')
+    root = str(tmp_path / 'models')
+    first = write_bundle(model, scaler, *encoders, root=root, extra={'note': 'first'})
+    return root, first, lambda: write_bundle(model, scaler, *encoders, root=root, extra={'note': 'second'})
+
+
+def test_cache_is_invalidated_on_model_swap(tmp_path, splits, two_versions):
+    root, _, write_second = two_versions
+    registry = ModelRegistry(root=root, poll_seconds=0)
+    cache = PredictionCache(shared_path=str(tmp_path / 'cache.db'))
+    registry.on_swap(lambda old, new: cache.invalidate(new.version))
+
+    old = registry.get()
+    keys = feature_keys(splits.X_test[:3])
+    cache.put_many(old.cache_version, keys, old.model.predict_proba(splits.X_test[:3]))
+    assert all(p is not None for p in cache.get_many(old.cache_version, keys))
+
+    write_second()
+    new_version = registry.reload()
+    assert new_version != old.version
+    assert cache.stats['invalidations'] == 1
+    assert cache._entries == {} and _count(cache) == 0
+    assert cache.get_many(registry.get().cache_version, keys) == [None] * 3
@@ -0,0 +1,28 @@
+import os
+
+import numpy as np
+
+from preprocessing import load_splits, splits_cache_path
+
+
+def test_split_cache_round_trip(tmp_path, splits):
+    cache_dir = str(tmp_path)
+    built = load_splits(cache_dir=cache_dir)
+    assert os.path.exists(splits_cache_path(built.dataset_hash, cache_dir=cache_dir))
+
+    cached = load_splits(cache_dir=cache_dir)  # served from the .npz without allow_pickle
+    for name in ('X_train', 'X_test'):
+        np.testing.assert_array_equal(getattr(cached, name), getattr(splits, name))
+    for name in ('y_train', 'y_test', 'gender_classes', 'occupation_classes'):
+        assert list(getattr(cached, name)) == list(getattr(splits, name))
+        assert getattr(cached, name).dtype == object
+    assert list(cached.feature_names) == list(splits.feature_names)
+    assert cached.dataset_hash == splits.dataset_hash
+
+
+def test_cached_splits_build_the_same_encoders(tmp_path, splits):
+    load_splits(cache_dir=str(tmp_path))
+    cached = load_splits(cache_dir=str(tmp_path))
+    gender, occupation = cached.encoders()
+    assert list(gender.classes_) == list(splits.gender_classes)
+    assert occupation.encode(['Engineer'])[0] == list(splits.occupation_classes).index('Engineer')
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from reports import build_details
+from report_store import SharedMemoryReportStore
+
+
+def _report(stress):
+    return {'prediction': 'Insomnia', 'timestamp': '2026-01-01 00:00:00',
+            'details': build_details('Insomnia', [f'Stress: {stress}']),
+            'stats': {'night_screen': '3.5', 'stress': str(stress)}}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'reports.shm')
+
+
+def test_round_trip_and_shared_between_instances(path):
+    store = SharedMemoryReportStore(path, capacity=4, ttl=60)
+    report_id = store.put(_report(8))
+    assert store.get(report_id) == _report(8)
+    # Another worker mapping the same file sees it
+    assert SharedMemoryReportStore(path, capacity=4, ttl=60).get(report_id) == _report(8)
+
+
+def test_reused_slot_invalidates_the_old_id(path):
+    store = SharedMemoryReportStore(path, capacity=2, ttl=60)
+    first = store.put(_report(1))
+    later = [store.put(_report(stress)) for stress in (2, 3)]
+    assert first.split('.')[0] == later[1].split('.')[0]  # same slot, new token
+    assert store.get(first) is None
+    assert store.get(later[0]) == _report(2)
+    assert store.get(later[1]) == _report(3)
+
+
+def test_expired_reports_do_not_resolve(path):
+    store = SharedMemoryReportStore(path, capacity=2, ttl=-1)  # already past its expiry when written
+    assert store.get(store.put(_report(5))) is None
+
+
+@pytest.mark.parametrize('report_id', [None, 42, '', 'abc', '0', '0.', '0.zz', '0.00', '-1.' + '00' * 16,
+                                       '2.' + '00' * 16, '0.1.2', '0.' + '00' * 16])
+def test_malformed_or_unknown_ids(path, report_id):
+    store = SharedMemoryReportStore(path, capacity=2, ttl=60)
+    store.put(_report(5))
+    assert store.get(report_id) is None
+
+
+def test_capacity_change_starts_a_new_file(path):
+    old = SharedMemoryReportStore(path, capacity=4, ttl=60)
+    report_id = old.put(_report(7))
+    store = SharedMemoryReportStore(path, capacity=8, ttl=60)
+    assert store.get(report_id) is None
+    assert os.path.getsize(path) == store.size
+    assert store.get(store.put(_report(6))) == _report(6)
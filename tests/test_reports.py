@@ -0,0 +1,50 @@
+import io
+import re
+
+import pytest
+
+from reports import STAMP_FIELDS, ReportRenderer, _render_pdf
+
+pypdf = pytest.importorskip('pypdf')
+
+VALUES = {'timestamp': '2026-01-01 00:00:00', 'night_screen': 3.5, 'stress': 7}
+CAUSES = ['High Night Screen Time: 3.5 hrs',
+          'Very long cause text ' * 4,          # wider than the 48-character slot
+          'Stress ≥ 7 — Café']                  # characters the template cannot carry
+
+
+def _text(pdf):
+    # Stamped fields are padded to a fixed width: compare words, not spacing
+    text = pypdf.PdfReader(io.BytesIO(pdf), strict=True).pages[0].extract_text()
+    return [' '.join(line.split()) for line in text.splitlines() if line.strip()]
+
+
+def _check_xref(pdf):
+    start = int(re.search(rb'startxref\s+(\d+)\s+%%EOF\s*$', pdf).group(1))
+    assert pdf[start:].startswith(b'xref')
+    lines = pdf[start:].split(b'\n')
+    first, count = map(int, lines[1].split())
+    assert count > 1
+    for number, entry in enumerate(lines[2:2 + count], first):
+        offset, _, kind = entry.split()[:3]
+        if kind == b'n':
+            assert pdf[int(offset):].startswith(f'{number} 0 obj'.encode()), number
+
+
+@pytest.mark.parametrize('prediction', ['Healthy', 'Insomnia', 'Sleep Apnea'])
+def test_stamp_matches_a_full_render(prediction):
+    causes = {f'cause_{i}': f'- {c}' for i, c in enumerate(CAUSES)}
+    pdf = ReportRenderer().stamp(prediction, **VALUES, **causes)
+    _check_xref(pdf)
+
+    # Causes are cut to their slot and reduced to the characters the template allows
+    width = STAMP_FIELDS['cause_0']
+    expected = [re.sub(r'[^0-9A-Za-z .:\-/]', '', f'- {c}')[:width][2:] for c in CAUSES]
+    assert expected[1] == CAUSES[1][:width - 2] and expected[2] == 'Stress  7  Caf'
+    assert _text(pdf) == _text(_render_pdf(prediction, causes=expected, **VALUES))
+
+
+def test_stamp_leaves_unused_cause_slots_blank():
+    pdf = ReportRenderer().stamp('Sleep Apnea', **VALUES, cause_0='- Snoring')
+    _check_xref(pdf)
+    assert _text(pdf) == _text(_render_pdf('Sleep Apnea', causes=['Snoring'], **VALUES))
@@ -0,0 +1,75 @@
+import shutil
+
+import numpy as np
+import pytest
+
+import db
+from model_bundle import BUNDLE_ROOT, current_version, load_bundle
+from retrain import retrain
+
+
+@pytest.fixture
+def logged_rows(splits):
+    """Five fresh prediction rows; returns their users.id values."""
+    db.init_db()
+    conn = db.connect()
+    before = conn.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0]
+    conn.close()
+    X = splits.X_test[:5]
+    classes = ['Healthy', 'Insomnia', 'Sleep Apnea']
+    db.log_predictions(X, ['Healthy'] * 5, np.full((5, 3), 1 / 3), classes, ['Engineer'] * 5, 'test',
+                       '2026-10-18 12:00:00')
+    db.writer.flush()
+    return list(range(before + 1, before + 6))
+
+
+def _labelled_after(seq):
+    return [s for seqs, _, _ in db.iter_labelled(seq) for s in seqs]
+
+
+def test_labelling_an_older_row_later_is_seen_after_the_cursor(logged_rows):
+    first, *_, last = logged_rows
+    db.set_labels([(last, 'Insomnia')])
+    db.writer.flush()
+    cursor = db.last_label_seq()
+    assert _labelled_after(cursor) == []
+
+    # The older row gets its label after the cursor moved past the newer one
+    db.set_labels([(first, 'Healthy')])
+    db.writer.flush()
+    assert len(_labelled_after(cursor)) == 1
+    conn = db.connect()
+    row_seq = conn.execute("SELECT label_seq FROM users WHERE id = ?", (first,)).fetchone()[0]
+    conn.close()
+    assert row_seq > cursor
+
+
+def test_iter_labelled_stops_at_until_seq(logged_rows):
+    start = db.last_label_seq()
+    db.set_labels([(uid, 'Healthy') for uid in logged_rows[:3]])
+    db.writer.flush()
+    until = db.last_label_seq()
+    db.set_labels([(logged_rows[3], 'Insomnia')])
+    db.writer.flush()
+    assert _labelled_after(start) == [start + 1, start + 2, start + 3, start + 4]
+    assert [s for seqs, _, _ in db.iter_labelled(start, until_seq=until) for s in seqs] == [start + 1, start + 2,
+                                                                                               start + 3]
+
+
+def test_retrain_picks_up_rows_labelled_out_of_id_order(tmp_path, logged_rows):
+    root = str(tmp_path / 'models')
+    version = current_version()
+    shutil.copytree(f'{BUNDLE_ROOT}/{version}', f'{root}/{version}')
+    shutil.copy(f'{BUNDLE_ROOT}/CURRENT', f'{root}/CURRENT')
+
+    db.set_labels([(logged_rows[-1], 'Insomnia')])
+    db.writer.flush()
+    first = retrain(root=root, epochs=1, tolerance=1.0)
+    assert first['status'] == 'swapped'
+    assert load_bundle(root=root, verify=False).manifest['retrain_watermark'] == db.last_label_seq()
+
+    db.set_labels([(logged_rows[0], 'Healthy')])
+    db.writer.flush()
+    second = retrain(root=root, epochs=1, tolerance=1.0)
+    assert second['status'] == 'swapped' and second['rows'] == 1
+    assert retrain(root=root, epochs=1, tolerance=1.0)['status'] == 'no-new-data'
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from score_file import score_file
+
+
+@pytest.fixture
+def dirty_csv(tmp_path):
+    df = pd.read_csv('sleep_disorder_dataset.csv').head(600).astype({'BMI': object, 'HeartRate': object})
+    df.loc[3, 'Occupation'] = 'Nurse'
+    df.loc[250, 'Age'] = None
+    df.loc[400, 'BMI'] = 'abc'
+    df.loc[401, 'HeartRate'] = float('inf')
+    path = tmp_path / 'in.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_bad_rows_get_an_error_instead_of_failing_the_run(tmp_path, dirty_csv, workers):
+    out = str(tmp_path / 'out.csv')
+    assert score_file(dirty_csv, out, workers=workers, chunk_rows=200) == 600
+    result = pd.read_csv(out)
+    assert len(result) == 600
+    failed = result.index[result['Error'].notna()].tolist()
+    assert failed == [3, 250, 400, 401]
+    assert "unknown occupation 'Nurse'" in result.loc[3, 'Error']
+    assert result.loc[failed, 'Prediction'].isna().all()
+    assert result.drop(index=failed)['Prediction'].notna().all()
+
+
+def test_parquet_output_marks_bad_rows(tmp_path, dirty_csv):
+    pytest.importorskip('pyarrow')
+    out = str(tmp_path / 'out.parquet')
+    score_file(dirty_csv, out)
+    result = pd.read_parquet(out)
+    assert result['Error'].notna().sum() == 4
+    assert result.loc[result['Error'].notna(), 'proba_healthy'].isna().all()
@@ -0,0 +1,75 @@
+import sys
+
+import pytest
+
+from setup_project import ArtifactCache, Step, adoptable, build_steps, run_step
+
+
+@pytest.fixture
+def step(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # step outputs are paths relative to the repo root
+    out = tmp_path / 'dataset.csv'
+    out.write_text('committed\n')
+    # The command would overwrite the output; adopting it must not run it
+    cmd = ['-c', 'open("dataset.csv", "w").write("regenerated\\n")']
+    return Step('dataset', [], 'generate_dataset.py', cmd, lambda: ['dataset.csv']), out
+
+
+def test_existing_outputs_are_adopted_without_running(tmp_path, step):
+    step, out = step
+    cache = ArtifactCache('cache')
+    status, _, manifest = run_step(step, 'k1', sys.executable, cache, force=False)
+    assert status == 'adopted'
+    assert out.read_text() == 'committed\n'
+    assert run_step(step, 'k1', sys.executable, cache, force=False)[0] == 'up-to-date'
+
+
+def test_force_rebuilds_existing_outputs(tmp_path, step):
+    step, out = step
+    cache = ArtifactCache('cache')
+    assert run_step(step, 'k1', sys.executable, cache, force=True)[0] == 'built'
+    assert out.read_text() == 'regenerated\n'
+
+
+def test_changed_inputs_rebuild_once_the_step_has_history(tmp_path, step):
+    step, out = step
+    cache = ArtifactCache('cache')
+    run_step(step, 'k1', sys.executable, cache, force=False)
+    assert run_step(step, 'k2', sys.executable, cache, force=False)[0] == 'built'
+    assert out.read_text() == 'regenerated\n'
+
+
+def test_explicit_parameters_never_adopt_the_committed_dataset(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dataset = next(s for s in build_steps(rows=20000, seed=7)[0] if s.name == 'dataset')
+    (tmp_path / dataset.outputs()[0]).write_text('committed\n')
+    assert not dataset.adopt
+    assert adoptable(dataset, ArtifactCache('cache'), committed_inputs=True) is None
+
+
+def test_outputs_built_from_regenerated_inputs_are_not_adopted(tmp_path, step):
+    step, out = step
+    model = Step('model', ['dataset'], 'train_model.py', step.cmd, step.outputs)
+    cache = ArtifactCache('cache')
+    status, _, manifest = run_step(model, 'k1', sys.executable, cache, force=False, committed_inputs=False)
+    assert status == 'built' and not manifest['committed']
+    assert out.read_text() == 'regenerated\n'
+
+
+def test_repointed_pointer_is_not_restored(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ('v1', 'v2'):
+        (tmp_path / name).write_text(name)
+    (tmp_path / 'CURRENT').write_text('v1')
+    step = Step('model', [], 'train_model.py', ['-c', 'raise SystemExit(1)'], lambda: ['v1'],
+                pointers=lambda: ['CURRENT'])
+    cache = ArtifactCache('cache')
+    assert run_step(step, 'k1', sys.executable, cache, force=False)[0] == 'adopted'
+
+    (tmp_path / 'CURRENT').write_text('v2')  # e.g. a rollback or a newer training run
+    assert run_step(step, 'k1', sys.executable, cache, force=False)[0] == 'up-to-date'
+    assert (tmp_path / 'CURRENT').read_text() == 'v2'
+
+    (tmp_path / 'CURRENT').unlink()
+    assert run_step(step, 'k1', sys.executable, cache, force=False)[0] == 'restored'
+    assert (tmp_path / 'CURRENT').read_text() == 'v1'
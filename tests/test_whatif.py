@@ -0,0 +1,65 @@
+import pytest
+
+
+GRID = {'stress': [1, 3, 5], 'night_screen': [0.0, 1.0, 2.0], 'coffee': [0, 1]}
+
+
+def _covers(big, small):
+    """big makes every change in small, in the same direction and at least as far."""
+    for name, c in small.items():
+        if name not in big:
+            return False
+        d, e = c['to'] - c['from'], big[name]['to'] - big[name]['from']
+        if d * e <= 0 or abs(e) < abs(d):
+            return False
+    return True
+
+
+def test_whatif_finds_changes(client, record):
+    base = dict(record, stress=9, night_screen=4.0, daily_screen=8, coffee=3)
+    res = client.post('/predict/whatif', json={'base': base, 'grid': GRID, 'target': 'Healthy', 'top': 5})
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body['base_prediction'] != 'Healthy'
+    # Every grid combination plus the base value on each axis
+    assert body['scenarios'] == 4 * 4 * 3
+    suggestions = body['suggestions']
+    assert suggestions and body['reaching_target'] >= len(suggestions)
+    for s in suggestions:
+        assert s['prediction'] == 'Healthy'
+        assert max(s['probabilities'], key=s['probabilities'].get) == 'Healthy'
+        assert s['changes'] and set(s['changes']) <= set(GRID)
+        for name, c in s['changes'].items():
+            assert c['from'] == base[name] and c['to'] in GRID[name]
+    # 5 asked for and more than 5 reach the target: the rest were supersets of a picked one
+    assert body['reaching_target'] > 5 > len(suggestions)
+    for i, picked in enumerate(suggestions):
+        for later in suggestions[i + 1:]:
+            assert not _covers(later['changes'], picked['changes'])
+
+
+def test_whatif_base_scenario_is_a_candidate(client, record):
+    # A base that already reaches the target: "change nothing" is the best suggestion
+    base = dict(record, stress=2, night_screen=0.5, coffee=0, bmi=22, snoring=0, blue_light=1)
+    res = client.post('/predict/whatif', json={'base': base, 'grid': {'stress': [7, 8]}, 'target': 'Healthy'})
+    body = res.get_json()
+    assert body['base_prediction'] == 'Healthy'
+    assert body['suggestions'][0]['changes'] == {}
+    assert len(body['suggestions']) == 1  # every other scenario contains the empty change set
+
+
+@pytest.mark.parametrize('overrides', [
+    {'top': None},
+    {'top': 'many'},
+    {'grid': {'stress': {'min': None, 'max': 5, 'step': 1}}},
+    {'grid': {'stress': {'min': 1, 'max': 5}}},
+    {'grid': {'stress': [1, None]}},
+    {'grid': {'stress': ['a']}},
+    {'grid': {'stress': 3}},
+    {'grid': ['stress']},
+    {'target': 'Narcolepsy'},
+])
+def test_whatif_bad_input_is_a_400(client, record, overrides):
+    res = client.post('/predict/whatif', json=dict({'base': record}, **overrides))
+    assert res.status_code == 400
+    assert 'error' in res.get_json()
@@ -1,30 +1,31 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+import argparse
 from sklearn.neural_network import MLPClassifier
 import joblib
+from drift import reference_profile
+from model_bundle import write_bundle
+from preprocessing import load_splits
 
-df = pd.read_csv('sleep_disorder_dataset.csv')
+parser = argparse.ArgumentParser(description="Train the MLP and write a new model bundle")
+parser.add_argument('--variants', default='float32,int8',
+                    help="reduced-precision variants to export alongside float64 (comma-separated, '' for none)")
+args = parser.parse_args()
 
-le_gender = LabelEncoder()
-df['Gender'] = le_gender.fit_transform(df['Gender'])
-le_occup = LabelEncoder()
-df['Occupation'] = le_occup.fit_transform(df['Occupation'])
-
-X = df.drop('Disorder', axis=1)
-y = df['Disorder']
-
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
+splits = load_splits()
+le_gender, le_occup = splits.label_encoders()
+gender_encoder, occupation_encoder = splits.encoders()
+scaler, X_train_scaled, _ = splits.scaled()
 
 # MLP Model
 mlp = MLPClassifier(hidden_layer_sizes=(32, 16), max_iter=1000, random_state=42)
-mlp.fit(X_train_scaled, y_train)
+mlp.fit(X_train_scaled, splits.y_train)
 
 # Save files
 joblib.dump(mlp, 'sleep_model.pkl')
 joblib.dump(scaler, 'scaler.pkl')
 joblib.dump(le_gender, 'le_gender.pkl')
 joblib.dump(le_occup, 'le_occup.pkl')
+bundle_path = write_bundle(mlp, scaler, gender_encoder, occupation_encoder,
+                           extra={'drift_reference': reference_profile(splits.X_train, splits.y_train, mlp.classes_)},
+                           variants=[v for v in args.variants.split(',') if v])
 print("✅ Model Trained!")
+print(f"📦 Bundle: {bundle_path}")
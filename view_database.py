@@ -1,25 +1,75 @@
+import argparse
 import sqlite3
+import time
 import pandas as pd
 
-# 1. Connect to the database
-connection = sqlite3.connect('sleep_data.db')
+from db import DB_PATH, init_db, rebuild_rollups
 
-# 2. Query all data
-try:
-    # We use pandas to make it look like a nice Excel table
-    df = pd.read_sql_query("SELECT * FROM users", connection)
-    
-    # 3. Print the data
+# Dashboard queries read the pre-aggregated rollups (primary key / bucket index),
+# never the raw users table.
+QUERIES = {
+    'hour': """SELECT bucket AS hour, prediction, SUM(count) AS count FROM prediction_rollups
+               WHERE granularity = 'hour' AND bucket >= ? AND bucket <= ?
+               GROUP BY bucket, prediction ORDER BY bucket, prediction""",
+    'day': """SELECT bucket AS day, prediction, SUM(count) AS count FROM prediction_rollups
+              WHERE granularity = 'day' AND bucket >= ? AND bucket <= ?
+              GROUP BY bucket, prediction ORDER BY bucket, prediction""",
+    'occupation': """SELECT occupation, prediction, SUM(count) AS count FROM prediction_rollups
+                     WHERE granularity = 'day' AND bucket >= ? AND bucket <= ?
+                     GROUP BY occupation, prediction ORDER BY occupation, prediction""",
+    'total': """SELECT prediction, SUM(count) AS count FROM prediction_rollups
+                WHERE granularity = 'day' AND bucket >= ? AND bucket <= ?
+                GROUP BY prediction ORDER BY prediction""",
+}
+RECENT_QUERY = "SELECT * FROM users ORDER BY id DESC LIMIT ?"
+
+
+def run_query(conn, group_by, since='', until='9999'):
+    start = time.perf_counter()
+    df = pd.read_sql_query(QUERIES[group_by], conn, params=(since, until + '~'))
+    return df, (time.perf_counter() - start) * 1e3
+
+
+def show(title, df, ms):
+    print(f"📊 {title}  ({ms:.2f} ms)")
+    print("------------------------------------------------")
     if df.empty:
-        print("📭 The database is empty. Go to the website and make a prediction first!")
+        print("📭 No predictions in this range.")
+    elif 'prediction' in df.columns and len(df.columns) == 3:
+        # Pivot to one column per disorder for readability
+        key = df.columns[0]
+        print(df.pivot_table(index=key, columns='prediction', values='count', fill_value=0, aggfunc='sum'))
     else:
-        print("📊 HERE IS YOUR USER DATA:")
-        print("------------------------------------------------")
         print(df)
-        print("------------------------------------------------")
+    print("------------------------------------------------")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prediction analytics over sleep_data.db")
+    parser.add_argument('--by', choices=['total', 'hour', 'day', 'occupation'], default='total')
+    parser.add_argument('--since', default='', help="start bucket, e.g. 2026-01-01 or '2026-01-01 09'")
+    parser.add_argument('--until', default='9999', help="end bucket (inclusive)")
+    parser.add_argument('--recent', type=int, default=0, help="also show the N most recent raw rows")
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help="recompute the rollup table from raw rows (after a migration)")
+    args = parser.parse_args()
+
+    init_db()
+    if args.rebuild_rollups:
+        from model_bundle import load_bundle
+        rebuild_rollups(load_bundle().occupation_classes)
+        print("✅ Rollups rebuilt from the users table.")
 
-except Exception as e:
-    print(f"❌ Error: {e}")
+    connection = sqlite3.connect(DB_PATH)
+    try:
+        df, ms = run_query(connection, args.by, args.since, args.until)
+        show(f"PREDICTIONS BY {args.by.upper()}", df, ms)
 
-# 4. Close connection
-connection.close()
\ No newline at end of file
+        if args.recent:
+            start = time.perf_counter()
+            recent = pd.read_sql_query(RECENT_QUERY, connection, params=(args.recent,))
+            show(f"{args.recent} MOST RECENT PREDICTIONS", recent, (time.perf_counter() - start) * 1e3)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+    finally:
+        connection.close()
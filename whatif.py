@@ -0,0 +1,156 @@
+import time
+import numpy as np
+
+import metrics
+from inference import FEATURE_FIELDS, encode_records
+
+# What-if analysis: expand a base record into a grid of lifestyle scenarios, score
+# them all in one forward pass and report the smallest changes that reach the
+# target class (Healthy by default).
+
+COLUMN = {name: j for j, (name, _) in enumerate(FEATURE_FIELDS)}
+
+# Features a user can change, with the default grid (min, max, step) searched when
+# the request does not give one. Ranges follow generate_dataset.py.
+MODIFIABLE = {
+    'night_screen': (0.0, 4.0, 0.5),
+    'blue_light': (0, 1, 1),
+    'coffee': (0, 4, 1),
+    'phys_act': (0, 120, 15),
+    'bmi': (18.5, 35.0, 1.5),
+    'stress': (1, 9, 1),
+}
+MAX_AXIS_VALUES = 200
+MAX_SCENARIOS = 200_000
+TOP_K = 5
+SCAN_LIMIT = 5000  # cheapest flipping scenarios considered when picking the top-k
+
+
+def _axis(name, spec):
+    if isinstance(spec, dict):
+        try:
+            lo, hi, step = (float(spec[k]) for k in ('min', 'max', 'step'))
+        except KeyError as e:
+            raise ValueError(f"range for '{name}' is missing {e}")
+        except TypeError:
+            raise ValueError(f"range for '{name}' needs numeric min, max and step")
+        if not np.isfinite([lo, hi, step]).all() or step <= 0 or hi < lo:
+            raise ValueError(f"invalid range for '{name}': need min <= max and step > 0")
+        values = np.round(np.arange(lo, hi + step / 2, step), 6)
+    elif isinstance(spec, list):
+        try:
+            values = np.unique(np.asarray(spec, dtype=np.float64))
+        except (TypeError, ValueError):
+            raise ValueError(f"grid for '{name}' must contain only numbers")
+        if not np.isfinite(values).all():
+            raise ValueError(f"grid for '{name}' must contain only numbers")
+    else:
+        raise ValueError(f"grid for '{name}' must be a list of values or {{'min', 'max', 'step'}}")
+    if not 0 < len(values) <= MAX_AXIS_VALUES:
+        raise ValueError(f"grid for '{name}' must have 1..{MAX_AXIS_VALUES} values")
+    return values
+
+
+def build_scenarios(x0, grid):
+    """Scenario matrix: every combination of the grid values, other features held at x0.
+
+    Returns (names, X) where names are the varied features in column order of X's grid.
+    """
+    names = list(grid)
+    axes = [np.union1d(grid[name], [x0[COLUMN[name]]]) for name in names]  # always include "no change"
+    n = int(np.prod([len(a) for a in axes]))
+    if n > MAX_SCENARIOS:
+        raise ValueError(f"{n:,} scenarios exceeds the limit of {MAX_SCENARIOS:,}; use coarser grids")
+    X = np.empty((n, len(x0)))
+    X[:] = x0
+    # Row-major product: axis k repeats each value over the axes after it, tiled over those before it
+    inner = n
+    for name, values in zip(names, axes):
+        inner //= len(values)
+        X[:, COLUMN[name]] = np.tile(np.repeat(values, inner), n // (inner * len(values)))
+    # Night-time screen use is part of the daily total
+    X = X[X[:, COLUMN['night_screen']] <= X[:, COLUMN['daily_screen']] + 1e-9]
+    return names, X
+
+
+def smallest_changes(names, X, x0, proba, target_index, scale, top_k=TOP_K):
+    """Indices of the top-k flipping scenarios, fewest changed features first, then
+    smallest change in standard-deviation units."""
+    cols = [COLUMN[name] for name in names]
+    delta = X[:, cols] - x0[cols]
+    flips = np.flatnonzero(proba.argmax(axis=1) == target_index)
+    if not len(flips):
+        return []
+    n_changed = np.count_nonzero(delta[flips], axis=1)
+    cost = np.abs(delta[flips] / scale[cols]).sum(axis=1)
+    order = flips[np.lexsort((-proba[flips, target_index], cost, n_changed))][:SCAN_LIMIT]
+
+    # Drop scenarios that contain an already-picked one: same changes in the same
+    # direction, each at least as large, possibly plus others
+    candidates = delta[order]
+    alive = np.ones(len(order), dtype=bool)
+    picked = []
+    while len(picked) < top_k and alive.any():
+        k = int(np.argmax(alive))
+        picked.append(order[k])
+        d = candidates[k]
+        covered = (d == 0) | ((np.sign(candidates) == np.sign(d)) & (np.abs(candidates) >= np.abs(d)))
+        alive &= ~covered.all(axis=1)
+    return picked
+
+
+def what_if(body, bundle):
+    """Run a what-if request: {'base': record, 'grid': {feature: [values] | {min, max, step}},
+    'target': class, 'top': k}. Raises ValueError on bad input."""
+    start = time.perf_counter()
+    if not isinstance(body, dict) or not isinstance(body.get('base'), dict):
+        raise ValueError("expected a JSON object with a 'base' record")
+    X0, _, errors = encode_records([body['base']], bundle.gender_encoder, bundle.occupation_encoder)
+    if errors:
+        raise ValueError(errors[0])
+    x0 = X0[0]
+
+    specs = body.get('grid') or {name: dict(zip(('min', 'max', 'step'), r)) for name, r in MODIFIABLE.items()}
+    if not isinstance(specs, dict):
+        raise ValueError("'grid' must map feature names to value lists or ranges")
+    unknown = [name for name in specs if name not in MODIFIABLE]
+    if unknown:
+        raise ValueError(f"not modifiable: {', '.join(unknown)} (choose from {', '.join(MODIFIABLE)})")
+    grid = {name: _axis(name, spec) for name, spec in specs.items()}
+
+    classes = [str(c) for c in bundle.classes]
+    target = body.get('target', 'Healthy')
+    if target not in classes:
+        raise ValueError(f"unknown target class {target!r}")
+    target_index = classes.index(target)
+    try:
+        top_k = max(1, min(int(body.get('top', TOP_K)), 50))
+    except (TypeError, ValueError):
+        raise ValueError("'top' must be an integer")
+
+    names, X = build_scenarios(x0, grid)
+    with metrics.stage('whatif', 'inference'):
+        proba = bundle.model.predict_proba(X)
+        base_proba = bundle.model.predict_proba(x0[None, :])[0]
+    picked = smallest_changes(names, X, x0, proba, target_index, np.asarray(bundle.scaler_scale), top_k)
+
+    def value(name, v):
+        return int(v) if dict(FEATURE_FIELDS)[name] is int else round(float(v), 2)
+
+    suggestions = []
+    for i in picked:
+        changes = {name: {'from': value(name, x0[COLUMN[name]]), 'to': value(name, X[i, COLUMN[name]])}
+                   for name in names if X[i, COLUMN[name]] != x0[COLUMN[name]]}
+        suggestions.append({'changes': changes, 'prediction': classes[int(proba[i].argmax())],
+                            'probabilities': {c: round(float(p), 6) for c, p in zip(classes, proba[i])}})
+
+    return {
+        'model_version': bundle.version,
+        'base_prediction': classes[int(base_proba.argmax())],
+        'base_probabilities': {c: round(float(p), 6) for c, p in zip(classes, base_proba)},
+        'target': target,
+        'scenarios': len(X),
+        'reaching_target': int((proba.argmax(axis=1) == target_index).sum()),
+        'suggestions': suggestions,
+        'elapsed_ms': round((time.perf_counter() - start) * 1e3, 2),
+    }